@@ -0,0 +1,73 @@
+"""
+Usuario y permisos cacheados entre peticiones.
+
+AuthenticationMiddleware resuelve `request.user` con `backend.get_user()`
+(un SELECT por petición) y cada has_perm() de un usuario no superusuario
+consulta sus permisos y los de sus grupos la primera vez en la petición.
+BackendCacheado guarda en la caché el usuario ya con sus permisos
+calculados (los atributos _perm_cache de ModelBackend), así que una
+petición del admin con la entrada vigente no consulta auth_* en absoluto.
+
+La entrada depende de la versión del modelo de usuario (ProyectoSIGAP/cache.py);
+cualquier save/delete de usuarios, grupos o permisos y cualquier cambio en
+los m2m user.groups, user.user_permissions y group.permissions la
+incrementa. Los cambios masivos (queryset.update) deben llamar a
+invalidar_modelo(User); AUTH_CACHE_TIMEOUT acota lo que dure lo demás.
+
+Está desactivada por defecto y solo se permite con una caché compartida
+entre workers (CACHE_BACKEND 'file' o 'redis'; ver settings): con 'locmem'
+la invalidación no llegaría a los otros workers. Con AUTH_CACHEADA=False
+se comporta igual que ModelBackend. La ruta del
+backend queda guardada en la sesión, por eso se usa siempre este y no se
+cambia por ModelBackend al desactivarlo (cerraría todas las sesiones).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .cache import cachear, invalidar_modelo
+
+REGION = 'usuario'
+
+
+class BackendCacheado(ModelBackend):
+
+    def _cargar(self, user_id):
+        UserModel = get_user_model()
+        try:
+            usuario = UserModel._default_manager.get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        # Deja calculados _user_perm_cache, _group_perm_cache y _perm_cache
+        self.get_all_permissions(usuario)
+        return usuario
+
+    def get_user(self, user_id):
+        if not settings.AUTH_CACHEADA:
+            return super().get_user(user_id)
+        usuario = cachear(
+            REGION, [get_user_model()], lambda: self._cargar(user_id), user_id,
+            timeout=settings.AUTH_CACHE_TIMEOUT,
+        )
+        return usuario if usuario is not None and self.user_can_authenticate(usuario) else None
+
+
+def _invalidar(sender, **kwargs):
+    # m2m_changed avisa antes y después de cada cambio; basta con el 'post_'
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidar_modelo(get_user_model())
+
+
+def conectar():
+    User = get_user_model()
+    for modelo in (User, Group, Permission):
+        uid = f'autenticacion_{modelo._meta.label_lower}'
+        post_save.connect(_invalidar, sender=modelo, dispatch_uid=uid + '_save')
+        post_delete.connect(_invalidar, sender=modelo, dispatch_uid=uid + '_delete')
+    for relacion in (User.groups, User.user_permissions, Group.permissions):
+        m2m_changed.connect(
+            _invalidar, sender=relacion.through,
+            dispatch_uid=f'autenticacion_{relacion.through._meta.label_lower}',
+        )
@@ -0,0 +1,298 @@
+"""
+Capa de caché de la aplicación.
+
+Las claves se versionan por modelo: cada modelo guarda un número de versión
+en la caché y cualquier save/delete lo incrementa, de modo que todas las
+entradas que dependían de ese modelo quedan invalidadas sin borrarlas una
+por una (simplemente dejan de consultarse y expiran solas).
+
+La versión se incrementa al escribir y otra vez al confirmarse la
+transacción: mientras está abierta, otro proceso todavía lee las filas
+viejas y podría cachearlas con la versión nueva; el segundo incremento deja
+esas entradas sin uso.
+"""
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router, transaction
+from django.db.models.signals import post_save, post_delete
+from django.db.models.sql import Query
+from django.utils.functional import cached_property
+
+from .routers import leyendo_de_replica
+
+PREFIJO_VERSION = 'version'
+PREFIJO_ESTADISTICA = 'estadistica'
+PREFIJO_DATO = 'dato'
+
+# Registro de regiones en la caché compartida (para reportar sus contadores
+# sin importar qué worker responde); _REGISTRADAS evita releerlo en cada acierto
+CLAVE_REGIONES = 'regiones'
+_REGISTRADAS = set()
+
+
+# ====================================================================
+# 1. Versiones por modelo e invalidación
+# ====================================================================
+
+def _etiqueta(modelo):
+    return modelo._meta.label_lower
+
+
+def version_modelo(modelo):
+    """Devuelve la versión vigente de un modelo, inicializándola si no existe."""
+    clave = f"{PREFIJO_VERSION}:{_etiqueta(modelo)}"
+    version = cache.get(clave)
+    if version is None:
+        # Se parte de un valor basado en el reloj para que, si la versión fue
+        # expulsada de la caché, nunca se reutilice un número ya usado.
+        cache.add(clave, int(time.time() * 1000), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def _incrementar(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, int(time.time() * 1000), timeout=None)
+
+
+class _AlConfirmar(set):
+    """Versiones por incrementar al confirmarse la transacción abierta (una vez cada una)."""
+
+    def __init__(self, alias):
+        super().__init__()
+        self.alias = alias
+
+    def vaciar(self):
+        conexion = connections[self.alias]
+        if getattr(conexion, '_versiones_al_confirmar', None) is self:
+            conexion._versiones_al_confirmar = None
+        for clave in self:
+            _incrementar(clave)
+
+
+def _al_confirmar(clave, alias):
+    conexion = connections[alias]
+    if not conexion.in_atomic_block:
+        return  # Sin transacción abierta ya quedó confirmado
+    actuales = getattr(conexion, '_versiones_al_confirmar', None)
+    # Si el bloque donde se programó se revirtió, Django descartó el callback
+    if actuales is None or not any(f == actuales.vaciar for _, f, _ in conexion.run_on_commit):
+        actuales = _AlConfirmar(alias)
+        conexion._versiones_al_confirmar = actuales
+        transaction.on_commit(actuales.vaciar, using=alias)
+    actuales.add(clave)
+
+
+def invalidar_modelo(modelo):
+    """Incrementa la versión del modelo; usar tras operaciones masivas (update/bulk)."""
+    clave = f"{PREFIJO_VERSION}:{_etiqueta(modelo)}"
+    _incrementar(clave)
+    _al_confirmar(clave, router.db_for_write(modelo))
+
+
+def _invalidar_por_senal(sender, **kwargs):
+    invalidar_modelo(sender)
+
+
+def conectar_invalidacion(*modelos):
+    """Conecta las señales post_save/post_delete de los modelos a la invalidación."""
+    for modelo in modelos:
+        uid = f"cache_invalidacion_{_etiqueta(modelo)}"
+        post_save.connect(_invalidar_por_senal, sender=modelo, dispatch_uid=uid + '_save')
+        post_delete.connect(_invalidar_por_senal, sender=modelo, dispatch_uid=uid + '_delete')
+
+
+def _tablas(query, tablas):
+    tablas.update(alias.table_name for alias in query.alias_map.values())
+    tablas.add(query.model._meta.db_table)
+    # Subconsultas en anotaciones (Subquery, Exists) y en filtros (pk__in=queryset)
+    pendientes = [*query.annotations.values(), query.where]
+    while pendientes:
+        expresion = pendientes.pop()
+        anidada = expresion if isinstance(expresion, Query) else getattr(expresion, 'query', None)
+        if isinstance(anidada, Query):
+            _tablas(anidada, tablas)
+        elif hasattr(expresion, 'get_source_expressions'):
+            pendientes.extend(e for e in expresion.get_source_expressions() if e is not None)
+    return tablas
+
+
+def modelos_de_consulta(query):
+    """Obtiene los modelos cuyas tablas participan en una consulta (JOINs y subconsultas)."""
+    tablas = _tablas(query, set())
+    return [m for m in apps.get_models(include_auto_created=True) if m._meta.db_table in tablas]
+
+
+def construir_clave(nombre, modelos, *partes):
+    """Clave = región + versiones de los modelos dependientes + hash de las partes."""
+    versiones = ','.join(
+        f"{_etiqueta(m)}={version_modelo(m)}"
+        for m in sorted(set(modelos), key=_etiqueta)
+    )
+    huella = hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+    return f"{PREFIJO_DATO}:{nombre}:{hashlib.sha1(versiones.encode('utf-8')).hexdigest()}:{huella}"
+
+
+# ====================================================================
+# 2. Contadores de aciertos/fallos
+# ====================================================================
+
+def _contar(nombre, tipo):
+    clave = f"{PREFIJO_ESTADISTICA}:{nombre}:{tipo}"
+    if not cache.add(clave, 1, timeout=None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+
+def _registrar_region(nombre):
+    # Leer, agregar y volver a comprobar: si otro worker escribió a la vez, se reintenta
+    for _ in range(3):
+        regiones = cache.get(CLAVE_REGIONES, set())
+        if nombre in regiones:
+            break
+        cache.set(CLAVE_REGIONES, regiones | {nombre}, timeout=None)
+    _REGISTRADAS.add(nombre)
+
+
+def estadisticas_cache():
+    """Devuelve {region: {'aciertos', 'fallos', 'ratio'}} para las regiones registradas."""
+    regiones = cache.get(CLAVE_REGIONES, set())
+    claves = {}
+    for nombre in regiones:
+        for tipo in ('aciertos', 'fallos'):
+            claves[f"{PREFIJO_ESTADISTICA}:{nombre}:{tipo}"] = (nombre, tipo)
+    valores = cache.get_many(list(claves))
+
+    resultado = {}
+    for nombre in sorted(regiones):
+        aciertos = valores.get(f"{PREFIJO_ESTADISTICA}:{nombre}:aciertos", 0)
+        fallos = valores.get(f"{PREFIJO_ESTADISTICA}:{nombre}:fallos", 0)
+        total = aciertos + fallos
+        resultado[nombre] = {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'ratio': round(aciertos / total, 4) if total else None,
+        }
+    return resultado
+
+
+# ====================================================================
+# 3. Helpers de cacheo
+# ====================================================================
+
+_FALTANTE = object()
+
+
+def cachear(nombre, modelos, calcular, *partes, timeout=None):
+    """
+    Devuelve el valor cacheado para (nombre, partes) o lo calcula con `calcular()`.
+    La entrada queda ligada a la versión de cada modelo en `modelos`.
+    """
+    if nombre not in _REGISTRADAS:
+        _registrar_region(nombre)
+    clave = construir_clave(nombre, modelos, *partes)
+    valor = cache.get(clave, _FALTANTE)
+    if valor is not _FALTANTE:
+        _contar(nombre, 'aciertos')
+        return valor
+
+    _contar(nombre, 'fallos')
+    # Un fallo ya cuesta una consulta: se comprueba que el registro siga en la caché
+    _registrar_region(nombre)
+    valor = calcular()
+    if leyendo_de_replica():
+        # Lo leído de la réplica puede venir retrasado respecto a la versión
+        # vigente del modelo: se guarda poco tiempo para no fijar datos viejos.
+        tope = settings.DB_REPLICA_CACHE_TIMEOUT
+        timeout = tope if timeout is None else min(timeout, tope)
+    if timeout is None:
+        cache.set(clave, valor)
+    else:
+        cache.set(clave, valor, timeout)
+    return valor
+
+
+def cachear_queryset(nombre, queryset, modelos=(), timeout=None):
+    """Evalúa el queryset una sola vez y guarda la lista de resultados."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return []
+    dependencias = list(modelos) + modelos_de_consulta(queryset.query)
+    return cachear(nombre, dependencias, lambda: list(queryset), sql, timeout=timeout)
+
+
+def cachear_fragmento(nombre, modelos, renderizar, *partes, timeout=None):
+    """Cachea un fragmento HTML ya renderizado (cadena)."""
+    return cachear(nombre, modelos, lambda: str(renderizar()), *partes, timeout=timeout)
+
+
+def cachear_agregado(nombre, queryset, timeout=None, **agregados):
+    """Cachea el resultado de `queryset.aggregate(**agregados)` o de un values().annotate()."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        sql = None
+    dependencias = modelos_de_consulta(queryset.query)
+    if agregados:
+        calcular = lambda: queryset.aggregate(**agregados)
+    else:
+        calcular = lambda: list(queryset)
+    return cachear(nombre, dependencias, calcular, sql, sorted(agregados), timeout=timeout)
+
+
+# ====================================================================
+# 4. Paginador cacheado (changelists y autocompletado del admin)
+# ====================================================================
+
+class PaginadorCacheado(Paginator):
+    """
+    Paginador que cachea el COUNT y el contenido de cada página.
+    Lo usan los changelists y las respuestas de autocompletado del admin,
+    que pasan por `ModelAdmin.get_paginator`.
+    """
+    region = 'paginador'
+
+    def _sql(self):
+        try:
+            return str(self.object_list.query)
+        except (AttributeError, EmptyResultSet):
+            return None
+
+    def _dependencias(self):
+        return modelos_de_consulta(self.object_list.query)
+
+    @cached_property
+    def count(self):
+        sql = self._sql()
+        if sql is None:
+            return super().count
+        return cachear(
+            f"{self.region}:conteo", self._dependencias(),
+            lambda: Paginator.count.func(self), sql,
+        )
+
+    def page(self, number):
+        sql = self._sql()
+        if sql is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        inicio = (number - 1) * self.per_page
+        fin = inicio + self.per_page
+        if fin + self.orphans >= self.count:
+            fin = self.count
+        objetos = cachear(
+            f"{self.region}:pagina", self._dependencias(),
+            lambda: list(self.object_list[inicio:fin]), sql, inicio, fin,
+        )
+        return self._get_page(objetos, number, self)
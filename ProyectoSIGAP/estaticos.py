@@ -0,0 +1,160 @@
+"""
+Archivos estáticos con nombre por contenido, precomprimidos y servidos por
+la propia aplicación cuando no hay un proxy delante.
+
+- AlmacenComprimido (STORAGES['staticfiles']): en collectstatic deja cada
+  archivo con el hash de su contenido en el nombre (ManifestStaticFilesStorage)
+  y, para los de texto, variantes .gz y .br (esta solo si está instalado el
+  paquete `brotli`) junto al original.
+- EstaticosMiddleware: responde STATIC_URL desde STATIC_ROOT eligiendo la
+  variante según Accept-Encoding (con sus valores q). Los nombres con hash
+  llevan `Cache-Control: immutable` por un año (un cambio de contenido
+  cambia el nombre); los demás se revalidan con ETag y responden 304 sin
+  cuerpo.
+
+Con ESTATICOS_SERVIR=False (el proxy sirve /static/) el middleware se
+descarta al arrancar.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ttf', '.eot', '.ico')
+# Una variante que no ahorra al menos esto no vale la pena servirla
+AHORRO_MINIMO = 0.95
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'public, max-age=0, must-revalidate'
+# Variantes precomprimidas en orden de preferencia del servidor (a igual q)
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _comprimir(ruta, brotli):
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    if not datos:
+        return
+    variantes = [('.gz', gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append(('.br', brotli.compress(datos, quality=11)))
+    for sufijo, comprimido in variantes:
+        destino = ruta + sufijo
+        if len(comprimido) < len(datos) * AHORRO_MINIMO:
+            with open(destino, 'wb') as f:
+                f.write(comprimido)
+        elif os.path.exists(destino):
+            os.remove(destino)
+
+
+def codificaciones_aceptadas(cabecera):
+    """
+    {codificación: q} de un Accept-Encoding. Sin q vale 1; un q que no es
+    número cuenta como 0 (no aceptada).
+    """
+    aceptadas = {}
+    for parte in cabecera.split(','):
+        token, _, parametros = parte.partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        calidad = 1.0
+        for parametro in parametros.split(';'):
+            clave, _, valor = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0
+        aceptadas[token] = calidad
+    return aceptadas
+
+
+class AlmacenComprimido(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que además escribe las variantes .gz/.br."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        brotli = _brotli()
+        # hashed_files ya es el manifiesto final (sin los nombres intermedios de cada pasada)
+        for original, procesado in self.hashed_files.items():
+            # Se comprimen el nombre con hash y el original (las referencias sin hash siguen funcionando)
+            for nombre in {original, procesado}:
+                if nombre.lower().endswith(EXTENSIONES_COMPRIMIBLES) and self.exists(nombre):
+                    _comprimir(self.path(nombre), brotli)
+
+
+class EstaticosMiddleware:
+    """Va primero en MIDDLEWARE: los estáticos no necesitan sesión, usuario ni métricas."""
+
+    def __init__(self, get_response):
+        if not settings.ESTATICOS_SERVIR or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefijo = '/' + settings.STATIC_URL.lstrip('/')
+        self.raiz = os.path.realpath(settings.STATIC_ROOT)
+        self._con_hash = None
+
+    def con_hash(self):
+        """Nombres con hash del manifiesto (se lee una vez por proceso; cambia solo al desplegar)."""
+        if self._con_hash is None:
+            manifiesto = getattr(staticfiles_storage, 'hashed_files', None) or {}
+            self._con_hash = set(manifiesto.values())
+        return self._con_hash
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefijo):
+            return self.get_response(request)
+        nombre = posixpath.normpath(request.path[len(self.prefijo):]).lstrip('/')
+        ruta = os.path.realpath(os.path.join(self.raiz, nombre))
+        if not ruta.startswith(self.raiz + os.sep) or not os.path.isfile(ruta):
+            return self.get_response(request)
+        return self.servir(request, nombre, ruta)
+
+    def servir(self, request, nombre, ruta):
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        # Las no mencionadas toman el q de '*'; q=0 las excluye
+        comodin = aceptadas.get('*', 0.0)
+        codificacion, archivo, mejor = None, ruta, 0.0
+        for nombre_codificacion, sufijo in VARIANTES:
+            calidad = aceptadas.get(nombre_codificacion, comodin)
+            if calidad > mejor and os.path.isfile(ruta + sufijo):
+                codificacion, archivo, mejor = nombre_codificacion, ruta + sufijo, calidad
+
+        info = os.stat(archivo)
+        etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}{"-" + codificacion if codificacion else ""}"'
+        inmutable = nombre in self.con_hash()
+        cabeceras = {
+            'ETag': etag,
+            'Last-Modified': formatdate(info.st_mtime, usegmt=True),
+            'Cache-Control': CACHE_INMUTABLE if inmutable else CACHE_REVALIDAR,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            tipo, _ = mimetypes.guess_type(ruta)
+            response = FileResponse(open(archivo, 'rb'), content_type=tipo or 'application/octet-stream')
+            response['Content-Length'] = info.st_size
+            if codificacion:
+                response['Content-Encoding'] = codificacion
+            # FileResponse lo deriva del nombre del archivo (p. ej. base.css.gz)
+            del response['Content-Disposition']
+        for clave, valor in cabeceras.items():
+            response[clave] = valor
+        return response
@@ -0,0 +1,348 @@
+"""
+Métricas en formato de texto de Prometheus, sin servicios externos.
+
+Cada proceso acumula contadores e histogramas en memoria (diccionarios
+protegidos por un lock) y cada METRICAS_INTERVALO segundos vuelca su estado
+acumulado a METRICAS_DIR/<pid>-<inicio>.json. El endpoint suma los archivos
+de todos los procesos, así que los valores son correctos con varios workers
+de gunicorn. Los archivos de procesos que ya terminaron se fusionan en
+`finalizados.json` para que los contadores nunca retrocedan.
+
+Se mide:
+    - latencia de cada petición por nombre de vista (histograma)
+    - consultas SQL y su tiempo por alias de base de datos
+    - etapas de la importación (lectura, limpieza, guardado) y filas procesadas
+    - correos enviados y fallidos
+    - aciertos/fallos de caché (se leen de ProyectoSIGAP.cache al exponer)
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+BUCKETS_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_ETAPA = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# nombre -> (tipo, ayuda, buckets)
+DEFINICIONES = {
+    'sigap_http_peticion_segundos': ('histogram', "Latencia de las peticiones por vista.", BUCKETS_PETICION),
+    'sigap_http_respuestas_total': ('counter', "Respuestas por vista y código HTTP.", None),
+    'sigap_db_consultas_total': ('counter', "Consultas SQL ejecutadas por alias.", None),
+    'sigap_db_consultas_segundos_total': ('counter', "Tiempo total en consultas SQL por alias.", None),
+    'sigap_importacion_etapa_segundos': ('histogram', "Duración de cada etapa de una importación.", BUCKETS_ETAPA),
+    'sigap_importacion_filas_total': ('counter', "Filas procesadas por etapa y resultado.", None),
+    'sigap_correos_total': ('counter', "Correos enviados por resultado.", None),
+}
+ARCHIVO_FINALIZADOS = 'finalizados.json'
+
+_lock = threading.Lock()
+_contadores = {}    # (nombre, etiquetas) -> valor
+_histogramas = {}   # (nombre, etiquetas) -> [conteos por bucket..., suma, cuenta]
+_inicio_proceso = int(time.time() * 1000)
+_ultimo_volcado = 0.0
+
+
+def activas():
+    return settings.METRICAS_ACTIVAS
+
+
+def _etiquetas(valores):
+    return tuple(sorted((k, str(v)) for k, v in valores.items()))
+
+
+# ====================================================================
+# Registro en el proceso
+# ====================================================================
+
+def incrementar(nombre, valor=1, **etiquetas):
+    if not activas():
+        return
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+
+
+def observar(nombre, valor, **etiquetas):
+    if not activas():
+        return
+    buckets = DEFINICIONES[nombre][2]
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        datos = _histogramas.get(clave)
+        if datos is None:
+            datos = _histogramas[clave] = [0] * len(buckets) + [0.0, 0]
+        for i, limite in enumerate(buckets):
+            if valor <= limite:
+                datos[i] += 1
+                break
+        datos[-2] += valor
+        datos[-1] += 1
+
+
+@contextmanager
+def medir(nombre, **etiquetas):
+    """Observa en el histograma `nombre` la duración del bloque."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+
+def _medir_consulta(alias):
+    def envoltura(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            incrementar('sigap_db_consultas_total', alias=alias)
+            incrementar('sigap_db_consultas_segundos_total', time.perf_counter() - inicio, alias=alias)
+    return envoltura
+
+
+def _instrumentar_conexion(sender, connection, **kwargs):
+    if activas():
+        connection.execute_wrappers.append(_medir_consulta(connection.alias))
+
+
+connection_created.connect(_instrumentar_conexion, dispatch_uid='metricas_instrumentar_conexion')
+# Conexiones abiertas antes de importar este módulo (p. ej. en comandos)
+for _conexion in connections.all(initialized_only=True):
+    if _conexion.connection is not None:
+        _instrumentar_conexion(None, _conexion)
+
+
+# ====================================================================
+# Volcado a disco y agregación entre procesos
+# ====================================================================
+
+def _archivo_proceso():
+    return os.path.join(settings.METRICAS_DIR, f"{os.getpid()}-{_inicio_proceso}.json")
+
+
+def _estado_proceso():
+    with _lock:
+        return {
+            'contadores': [[n, list(map(list, e)), v] for (n, e), v in _contadores.items()],
+            'histogramas': [[n, list(map(list, e)), list(d)] for (n, e), d in _histogramas.items()],
+        }
+
+
+def _escribir(ruta, estado):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f)
+    os.replace(temporal, ruta)
+
+
+def volcar(forzar=False):
+    """Escribe el estado del proceso si pasó el intervalo (o si se fuerza)."""
+    global _ultimo_volcado
+    if not activas():
+        return
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultimo_volcado < settings.METRICAS_INTERVALO:
+        return
+    _ultimo_volcado = ahora
+    if not _contadores and not _histogramas:
+        return
+    os.makedirs(settings.METRICAS_DIR, exist_ok=True)
+    _escribir(_archivo_proceso(), _estado_proceso())
+
+
+atexit.register(lambda: volcar(forzar=True))
+
+
+def _reiniciar_en_hijo():
+    # Un proceso hijo (p. ej. workers de gunicorn con --preload) no debe
+    # volver a reportar lo que ya acumuló el padre
+    global _inicio_proceso, _ultimo_volcado
+    _contadores.clear()
+    _histogramas.clear()
+    _inicio_proceso = int(time.time() * 1000)
+    _ultimo_volcado = 0.0
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_en_hijo)
+
+
+def _vivo(pid):
+    if os.name != 'posix':
+        # En Windows os.kill(pid, 0) terminaría el proceso: se asume vivo
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _sumar(total, estado):
+    for nombre, etiquetas, valor in estado.get('contadores', []):
+        clave = (nombre, tuple(map(tuple, etiquetas)))
+        total['contadores'][clave] = total['contadores'].get(clave, 0) + valor
+    for nombre, etiquetas, datos in estado.get('histogramas', []):
+        clave = (nombre, tuple(map(tuple, etiquetas)))
+        actual = total['histogramas'].get(clave)
+        total['histogramas'][clave] = datos if actual is None else [a + b for a, b in zip(actual, datos)]
+
+
+def _a_estado(total):
+    return {
+        'contadores': [[n, list(map(list, e)), v] for (n, e), v in total['contadores'].items()],
+        'histogramas': [[n, list(map(list, e)), d] for (n, e), d in total['histogramas'].items()],
+    }
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@contextmanager
+def _candado(directorio):
+    """Lock exclusivo sobre el directorio (solo POSIX; en otros sistemas no hace nada)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(directorio, '.lock'), 'w') as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        yield
+
+
+def _compactar(directorio, muertos):
+    """Fusiona en finalizados.json los archivos de procesos que ya terminaron."""
+    ruta_finalizados = os.path.join(directorio, ARCHIVO_FINALIZADOS)
+    total = {'contadores': {}, 'histogramas': {}}
+    _sumar(total, _leer(ruta_finalizados))
+    for ruta in muertos:
+        _sumar(total, _leer(ruta))
+    _escribir(ruta_finalizados, _a_estado(total))
+    for ruta in muertos:
+        os.remove(ruta)
+
+
+def recolectar():
+    """Suma el estado de todos los procesos (vivos y finalizados)."""
+    volcar(forzar=True)
+    directorio = settings.METRICAS_DIR
+    total = {'contadores': {}, 'histogramas': {}}
+    if not os.path.isdir(directorio):
+        return total
+
+    # Bajo el lock, para no sumar dos veces un archivo que otro proceso está compactando
+    with _candado(directorio):
+        archivos = [n for n in os.listdir(directorio) if n.endswith('.json')]
+        muertos = []
+        for nombre in archivos:
+            pid = nombre.split('-', 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _vivo(int(pid)):
+                muertos.append(os.path.join(directorio, nombre))
+        if muertos:
+            _compactar(directorio, muertos)
+            archivos = [n for n in os.listdir(directorio) if n.endswith('.json')]
+        for nombre in archivos:
+            _sumar(total, _leer(os.path.join(directorio, nombre)))
+    return total
+
+
+# ====================================================================
+# Exposición en formato de texto
+# ====================================================================
+
+def _formato_etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + texto + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer():
+    """Texto en formato de exposición de Prometheus (version=0.0.4)."""
+    from .cache import estadisticas_cache
+
+    total = recolectar()
+    por_nombre = {}
+    for (nombre, etiquetas), valor in total['contadores'].items():
+        por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+    for (nombre, etiquetas), datos in total['histogramas'].items():
+        por_nombre.setdefault(nombre, []).append((etiquetas, datos))
+
+    lineas = []
+    for nombre in sorted(por_nombre):
+        tipo, ayuda, buckets = DEFINICIONES.get(nombre, ('untyped', '', None))
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in sorted(por_nombre[nombre]):
+            if tipo != 'histogram':
+                lineas.append(f"{nombre}{_formato_etiquetas(etiquetas)} {_numero(valor)}")
+                continue
+            acumulado = 0
+            for limite, conteo in zip(buckets, valor):
+                acumulado += conteo
+                lineas.append(f"{nombre}_bucket{_formato_etiquetas(etiquetas, [('le', limite)])} {acumulado}")
+            lineas.append(f"{nombre}_bucket{_formato_etiquetas(etiquetas, [('le', '+Inf')])} {valor[-1]}")
+            lineas.append(f"{nombre}_sum{_formato_etiquetas(etiquetas)} {_numero(valor[-2])}")
+            lineas.append(f"{nombre}_count{_formato_etiquetas(etiquetas)} {valor[-1]}")
+
+    # La caché ya guarda sus contadores en el backend compartido
+    regiones = estadisticas_cache()
+    if regiones:
+        for metrica, campo, tipo, ayuda in (
+            ('sigap_cache_aciertos_total', 'aciertos', 'counter', "Aciertos de caché por región."),
+            ('sigap_cache_fallos_total', 'fallos', 'counter', "Fallos de caché por región."),
+            ('sigap_cache_ratio_aciertos', 'ratio', 'gauge', "Proporción de aciertos de caché por región."),
+        ):
+            lineas.append(f"# HELP {metrica} {ayuda}")
+            lineas.append(f"# TYPE {metrica} {tipo}")
+            for region, datos in regiones.items():
+                if datos[campo] is not None:
+                    lineas.append(f"{metrica}{_formato_etiquetas([('region', region)])} {_numero(datos[campo])}")
+    return '\n'.join(lineas) + '\n'
+
+
+# ====================================================================
+# Middleware
+# ====================================================================
+
+class MetricasMiddleware:
+    """Mide la latencia de cada petición; va primero en MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not activas():
+            return self.get_response(request)
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+        observar('sigap_http_peticion_segundos', duracion, vista=vista, metodo=request.method)
+        incrementar('sigap_http_respuestas_total', vista=vista, codigo=response.status_code)
+        volcar()
+        return response
@@ -0,0 +1,176 @@
+"""
+Perfilado bajo demanda de peticiones del admin y de importaciones.
+
+Un usuario staff agrega `?_perfil=1` a cualquier URL para perfilar esa sola
+petición, o `?_perfil=sesion` para perfilar todas las de su sesión hasta
+`?_perfil=0`. La petición corre bajo cProfile y con un execute_wrapper que
+registra cada consulta SQL; el informe (funciones por tiempo propio y
+acumulado, llamadas de las más costosas y consultas agrupadas) se guarda en
+InformePerfil y se consulta en el admin. La respuesta lleva el id en la
+cabecera X-Perfil-Informe.
+
+Las importaciones (importar_archivo, vigilar_procesados, cargar_historico)
+se perfilan completas con PERFIL_IMPORTACIONES.
+
+Sin PERFIL_ACTIVO el middleware se descarta al arrancar (MiddlewareNotUsed)
+y `perfilar()` con activo=False no hace nada: sin costo en producción.
+Solo se conservan los PERFIL_MAXIMO_INFORMES informes más recientes.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PARAMETRO = '_perfil'
+CLAVE_SESION = 'perfil_activo'
+CABECERA = 'X-Perfil-Informe'
+FUNCIONES_LISTADAS = 40
+FUNCIONES_CON_LLAMADAS = 12
+CONSULTAS_LISTADAS = 100
+LARGO_SQL = 2000
+
+
+class _Consultas:
+    """execute_wrapper que acumula las consultas por texto SQL."""
+
+    def __init__(self):
+        self.total = 0
+        self.segundos = 0.0
+        self.por_sql = {}  # sql -> [veces, segundos, máximo, alias]
+
+    def envoltura(self, alias):
+        def envolver(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duracion = time.perf_counter() - inicio
+                self.total += 1
+                self.segundos += duracion
+                datos = self.por_sql.setdefault(sql[:LARGO_SQL], [0, 0.0, 0.0, alias])
+                datos[0] += 1
+                datos[1] += duracion
+                datos[2] = max(datos[2], duracion)
+        return envolver
+
+    def resumen(self):
+        """Las consultas más costosas en total (las repetidas delatan un N+1)."""
+        filas = sorted(self.por_sql.items(), key=lambda x: -x[1][1])[:CONSULTAS_LISTADAS]
+        return [
+            {'sql': sql, 'veces': veces, 'ms': round(segundos * 1000, 2), 'max_ms': round(maximo * 1000, 2), 'alias': alias}
+            for sql, (veces, segundos, maximo, alias) in filas
+        ]
+
+
+def _texto_stats(perfil, orden, llamadas=False):
+    salida = io.StringIO()
+    stats = pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats(orden)
+    if llamadas:
+        stats.print_callees(FUNCIONES_CON_LLAMADAS)
+    else:
+        stats.print_stats(FUNCIONES_LISTADAS)
+    return salida.getvalue()
+
+
+def _guardar(tipo, nombre, usuario, duracion, perfil, consultas):
+    from registration.models import InformePerfil
+
+    informe = InformePerfil(
+        tipo=tipo, nombre=nombre[:255], usuario=usuario[:150],
+        duracion_ms=round(duracion * 1000, 2),
+        consultas=consultas.total, consultas_ms=round(consultas.segundos * 1000, 2),
+        sql=consultas.resumen(),
+    )
+    if perfil is not None:
+        informe.funciones = _texto_stats(perfil, pstats.SortKey.TIME)
+        informe.acumulado = _texto_stats(perfil, pstats.SortKey.CUMULATIVE)
+        informe.llamadas = _texto_stats(perfil, pstats.SortKey.CUMULATIVE, llamadas=True)
+        perfil.create_stats()
+        informe.datos = marshal.dumps(perfil.stats)
+    informe.save()
+    InformePerfil.recortar(settings.PERFIL_MAXIMO_INFORMES)
+    return informe
+
+
+@contextmanager
+def perfilar(nombre, tipo, usuario='', activo=True):
+    """
+    Perfila el bloque y guarda un InformePerfil. Entrega un dict donde queda
+    el informe (`resultado['informe']`) al salir. Con activo=False no hace nada.
+    """
+    resultado = {'informe': None}
+    if not activo:
+        yield resultado
+        return
+
+    consultas = _Consultas()
+    perfil = cProfile.Profile()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(consultas.envoltura(conexion.alias)))
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otro perfilador activo en el proceso: se guarda solo el SQL
+            perfil = None
+        inicio = time.perf_counter()
+        try:
+            yield resultado
+        finally:
+            duracion = time.perf_counter() - inicio
+            if perfil is not None:
+                perfil.disable()
+    try:
+        resultado['informe'] = _guardar(tipo, nombre, usuario, duracion, perfil, consultas)
+    except Exception:
+        # Perfilar nunca debe romper la petición o la importación
+        logger.exception("No se pudo guardar el informe de perfilado.")
+
+
+class PerfiladoMiddleware:
+    """Va después de AuthenticationMiddleware (necesita request.user y la sesión)."""
+
+    def __init__(self, get_response):
+        if not settings.PERFIL_ACTIVO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _solicitado(self, request):
+        if not request.user.is_staff:
+            return False
+        valor = request.GET.get(PARAMETRO)
+        if valor is not None:
+            # Que la vista no lo vea (el listado del admin lo tomaría por un filtro inválido)
+            request.GET = request.GET.copy()
+            del request.GET[PARAMETRO]
+        if valor == 'sesion':
+            request.session[CLAVE_SESION] = True
+        elif valor == '0':
+            request.session.pop(CLAVE_SESION, None)
+            return False
+        return valor is not None or request.session.get(CLAVE_SESION, False)
+
+    def __call__(self, request):
+        if not self._solicitado(request):
+            return self.get_response(request)
+
+        from registration.models import InformePerfil
+
+        with perfilar(
+            f"{request.method} {request.path}{'?' + request.GET.urlencode() if request.GET else ''}",
+            InformePerfil.PETICION, request.user.get_username(),
+        ) as resultado:
+            # Incluye el render de las TemplateResponse (lo hace el handler antes de volver aquí)
+            response = self.get_response(request)
+        if resultado['informe'] is not None:
+            response[CABECERA] = str(resultado['informe'].pk)
+        return response
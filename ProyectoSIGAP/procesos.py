@@ -0,0 +1,20 @@
+"""
+Tareas que necesitan Django en un pool de procesos (ProcessPoolExecutor).
+
+Con el método de arranque 'spawn' (o 'forkserver') cada proceso empieza sin
+Django configurado y deserializar una función definida en un módulo que
+importa modelos fallaría con AppRegistryNotReady. Este módulo no importa
+Django al cargarse: `iniciar` se usa como initializer del pool y `ejecutar`
+importa la tarea ('modulo:funcion') cuando Django ya está listo.
+"""
+import importlib
+
+
+def iniciar():
+    import django
+    django.setup()
+
+
+def ejecutar(tarea, *args, **kwargs):
+    modulo, funcion = tarea.split(':')
+    return getattr(importlib.import_module(modulo), funcion)(*args, **kwargs)
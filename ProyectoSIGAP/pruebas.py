@@ -0,0 +1,33 @@
+"""Ajustes y clases comunes de las pruebas (los tests.py de cada app los aplican con override_settings)."""
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+# Caché en memoria (la de 'file' se comparte con el servidor de desarrollo) y
+# estáticos sin manifiesto (las pruebas corren con DEBUG=False y sin collectstatic)
+AJUSTES_PRUEBAS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas'}},
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+}
+
+
+class PruebaMigracion(TransactionTestCase):
+    """
+    Lleva la base a las migraciones `desde` antes de cada prueba y la regresa a
+    la última al terminar. `migrar()` devuelve los modelos históricos del destino.
+    """
+    desde = None
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(self.migrar)
+        self.apps = self.migrar(self.desde)
+
+    def migrar(self, destino=None):
+        ejecutor = MigrationExecutor(connection)
+        destino = destino or ejecutor.loader.graph.leaf_nodes()
+        ejecutor.migrate(destino)
+        return MigrationExecutor(connection).loader.project_state(destino).apps
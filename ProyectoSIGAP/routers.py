@@ -0,0 +1,114 @@
+"""
+Enrutamiento de lecturas a la réplica de la base de datos.
+
+Solo se leen de la réplica las cargas marcadas como de solo lectura: las
+vistas listadas en VISTAS_SOLO_LECTURA (peticiones GET/HEAD) y el código
+envuelto en `lectura_replica()` (reportes, exportaciones, comandos). Todo
+lo demás, y cualquier lectura posterior a una escritura en la misma
+petición, va a la primaria. Tras una petición que escribió, una cookie de
+corta duración fija también la siguiente petición a la primaria para que
+el usuario vea sus propios cambios aunque la réplica vaya retrasada.
+"""
+import contextvars
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIA = 'sigap_primaria'
+
+# Solo los datos del dominio se leen de la réplica; sesiones, usuarios y
+# permisos siempre de la primaria (un login reciente aún no estaría replicado).
+APPS_REPLICA = {'people', 'projects', 'evaluation'}
+
+
+class _Estado:
+    __slots__ = ('replica', 'fijado', 'escribio')
+
+    def __init__(self, fijado=False):
+        self.replica = False
+        self.fijado = fijado
+        self.escribio = False
+
+
+_estado = contextvars.ContextVar('sigap_estado_bd', default=None)
+
+
+def hay_replica():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def leyendo_de_replica():
+    """True si las lecturas del contexto actual se están enviando a la réplica."""
+    estado = _estado.get()
+    return bool(estado and estado.replica and not estado.fijado and hay_replica())
+
+
+@contextmanager
+def lectura_replica():
+    """Envía a la réplica las lecturas del bloque (si no hubo escrituras antes)."""
+    estado = _estado.get()
+    token = None
+    if estado is None:
+        estado = _Estado()
+        token = _estado.set(estado)
+    anterior = estado.replica
+    estado.replica = True
+    try:
+        yield
+    finally:
+        estado.replica = anterior
+        if token is not None:
+            _estado.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in APPS_REPLICA and leyendo_de_replica():
+            return ALIAS_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            # Leer lo propio: el resto de la petición se lee de la primaria
+            estado.fijado = True
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias contienen los mismos datos
+        return True
+
+
+class ReplicaMiddleware:
+    """Inicializa el estado por petición y aplica la fijación a la primaria."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        estado = _Estado(fijado=COOKIE_PRIMARIA in request.COOKIES)
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+
+        if estado.escribio and hay_replica():
+            response.set_cookie(
+                COOKIE_PRIMARIA, '1',
+                max_age=settings.DB_REPLICA_RETRASO,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') or request.resolver_match is None:
+            return None
+        nombre = request.resolver_match.view_name
+        if any(fnmatchcase(nombre, patron) for patron in settings.VISTAS_SOLO_LECTURA):
+            _estado.get().replica = True
+        return None
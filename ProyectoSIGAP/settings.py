@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -70,11 +71,15 @@ JET_THEMES = [
 JET_SIDE_MENU_COMPACT = True
 
 MIDDLEWARE = [
+    'ProyectoSIGAP.estaticos.EstaticosMiddleware',
+    'ProyectoSIGAP.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'ProyectoSIGAP.routers.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ProyectoSIGAP.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -109,11 +114,154 @@ DATABASES = {
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT')
+        'PORT': config('DB_PORT'),
+        # Conexiones persistentes: segundos que se reutiliza una conexión (0 = una por petición)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        # Verifica la conexión reutilizada antes de la primera consulta de cada petición
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=False, cast=bool),
+        'OPTIONS': {},
+    }
+}
+
+# Pool de conexiones (solo PostgreSQL con psycopg 3 y psycopg-pool instalados).
+# Es incompatible con CONN_MAX_AGE, así que al activarlo las conexiones
+# persistentes se desactivan y el propio pool se encarga de reutilizarlas.
+if config('DB_POOL', default=False, cast=bool):
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        # Cierra conexiones ociosas o demasiado viejas (reconexión gradual tras un failover)
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+        # Health check: valida cada conexión al sacarla del pool
+        'check': ConnectionPool.check_connection,
+    }
+
+# Réplica de solo lectura (opcional). Si no se define DB_REPLICA_NAME todo va a la primaria.
+# Para probar en local basta con una segunda base (p. ej. una copia del archivo SQLite).
+if config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME'),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # En las pruebas la réplica es la misma base que la primaria
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['ProyectoSIGAP.routers.ReplicaRouter']
+
+# Segundos que una petición con escrituras fija las siguientes a la primaria
+DB_REPLICA_RETRASO = config('DB_REPLICA_RETRASO', default=5, cast=int)
+
+# Vigencia máxima (segundos) de las entradas de caché calculadas con datos de la réplica
+DB_REPLICA_CACHE_TIMEOUT = config('DB_REPLICA_CACHE_TIMEOUT', default=30, cast=int)
+
+# Vistas (view_name, admite comodines) cuyas peticiones GET se leen de la réplica
+VISTAS_SOLO_LECTURA = [
+    'admin:autocomplete',
+    'admin:*_changelist',
+    'estadisticas_cache',
+]
+
+
+# ============================
+# MÉTRICAS
+# ============================
+# Cada proceso vuelca sus contadores a METRICAS_DIR y /metricas/ los suma.
+# El recolector de Prometheus se autentica con 'Authorization: Bearer <METRICAS_TOKEN>'.
+
+METRICAS_ACTIVAS = config('METRICAS_ACTIVAS', default=True, cast=bool)
+METRICAS_DIR = config('METRICAS_DIR', default=os.path.join(BASE_DIR, 'estado', 'metricas'))
+METRICAS_INTERVALO = config('METRICAS_INTERVALO', default=5, cast=float)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+
+# ============================
+# CACHÉ
+# ============================
+# CACHE_BACKEND: 'file' (compartida entre workers en el mismo servidor; por
+# defecto), 'redis' (cualquier servidor compatible con Redis, compartida entre
+# servidores; requiere el paquete `redis`) o 'locmem' (por proceso: solo para
+# desarrollo con un único proceso). La invalidación incrementa una versión en
+# la caché; con 'locmem' solo la ve el proceso que escribió y los demás
+# workers siguen mostrando listados viejos hasta CACHE_TIMEOUT.
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='file')
+
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'sigap'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+if CACHE_BACKEND not in _CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND={CACHE_BACKEND!r} no es válido; opciones: {', '.join(_CACHE_BACKENDS)}."
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': _CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=_CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': 'sigap',
+        # locmem y file descartan entradas al pasar de MAX_ENTRIES (300 por omisión en Django)
+        'OPTIONS': {} if CACHE_BACKEND == 'redis' else {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
     }
 }
 
 
+# ============================
+# SESIONES Y AUTENTICACIÓN
+# ============================
+# SESION_MODO: 'db' (una lectura de django_session por petición; por defecto),
+# 'cached_db' (se lee de la caché y se escribe en ambas), 'cache' (solo
+# caché: se pierden si la caché se vacía) o 'signed_cookies' (sin estado en
+# el servidor; la sesión viaja firmada en la cookie).
+# AUTH_CACHEADA guarda el usuario y sus permisos en la caché entre peticiones
+# (ver ProyectoSIGAP/autenticacion.py); desactivada por defecto.
+# Los modos con caché y AUTH_CACHEADA necesitan una caché compartida entre
+# workers ('file' o 'redis'): con 'locmem' cada worker tendría su propia
+# sesión y su propio usuario, y cerrar sesión o quitar un permiso solo se
+# vería en uno de ellos.
+
+SESION_MODO = config('SESION_MODO', default='db')
+
+_SESION_MOTORES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+if SESION_MODO not in _SESION_MOTORES:
+    raise ImproperlyConfigured(
+        f"SESION_MODO={SESION_MODO!r} no es válido; opciones: {', '.join(_SESION_MOTORES)}."
+    )
+
+SESSION_ENGINE = _SESION_MOTORES[SESION_MODO]
+
+AUTHENTICATION_BACKENDS = ['ProyectoSIGAP.autenticacion.BackendCacheado']
+AUTH_CACHEADA = config('AUTH_CACHEADA', default=False, cast=bool)
+
+if CACHE_BACKEND == 'locmem' and (SESION_MODO in ('cached_db', 'cache') or AUTH_CACHEADA):
+    raise ImproperlyConfigured(
+        "SESION_MODO='cached_db'/'cache' y AUTH_CACHEADA necesitan una caché compartida "
+        "entre workers; con CACHE_BACKEND='locmem' usa SESION_MODO='db' y AUTH_CACHEADA=False."
+    )
+AUTH_CACHE_TIMEOUT = config('AUTH_CACHE_TIMEOUT', default=300, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,11 +298,62 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# collectstatic deja en STATIC_ROOT los archivos con hash en el nombre y sus
+# variantes .gz/.br (brotli es opcional: `pip install brotli`); sin DEBUG hay
+# que ejecutarlo en cada despliegue. Ver ProyectoSIGAP/estaticos.py.
+STATIC_ROOT = config('STATIC_ROOT', default=os.path.join(BASE_DIR, 'staticfiles'))
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'ProyectoSIGAP.estaticos.AlmacenComprimido'},
+}
+# La aplicación sirve STATIC_URL con caché inmutable; False si un proxy ya sirve /static/
+ESTATICOS_SERVIR = config('ESTATICOS_SERVIR', default=True, cast=bool)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ============================
+# IMPORTACIÓN DE PROYECTOS
+# ============================
+
+RUTA_PROCESADOS = config('RUTA_PROCESADOS')
+NOMBRE_ARCHIVO_BASE = config('NOMBRE_ARCHIVO_BASE')
+
+# Snapshots comprimidos de calendarios archivados
+RUTA_ARCHIVO = config('RUTA_ARCHIVO', default=os.path.join(BASE_DIR, 'archivo'))
+
+# Tamaño máximo de una hoja subida desde registro/importar/
+IMPORTACION_TAMANO_MAXIMO_MB = config('IMPORTACION_TAMANO_MAXIMO_MB', default=25, cast=int)
+
+# Índice de hojas ya importadas por el comando vigilar_procesados
+INDICE_IMPORTACIONES = config('INDICE_IMPORTACIONES', default=os.path.join(BASE_DIR, 'estado', 'indice_importaciones.json'))
+
+# ============================
+# REGISTRO DE CAMBIOS (registro/cambios/)
+# ============================
+# Altas, cambios y bajas de Proyecto, Participacion, Alumno, Prorroga y
+# Evaluaciones para la sincronización incremental de otros sistemas. Los
+# consumidores se autentican con 'Authorization: Bearer <CAMBIOS_TOKEN>'.
+
+CAMBIOS_ACTIVOS = config('CAMBIOS_ACTIVOS', default=True, cast=bool)
+CAMBIOS_TOKEN = config('CAMBIOS_TOKEN', default='')
+CAMBIOS_RETENCION_DIAS = config('CAMBIOS_RETENCION_DIAS', default=30, cast=int)
+CAMBIOS_COMPACTAR_HORAS = config('CAMBIOS_COMPACTAR_HORAS', default=24, cast=int)
+
+# ============================
+# PERFILADO BAJO DEMANDA (ver ProyectoSIGAP/perfilado.py)
+# ============================
+# Con PERFIL_ACTIVO un usuario staff perfila una petición con ?_perfil=1 (o
+# su sesión con ?_perfil=sesion hasta ?_perfil=0); los informes se ven en el
+# admin. PERFIL_IMPORTACIONES perfila cada importación de hojas. Desactivado,
+# el middleware ni siquiera se instala.
+
+PERFIL_ACTIVO = config('PERFIL_ACTIVO', default=False, cast=bool)
+PERFIL_IMPORTACIONES = config('PERFIL_IMPORTACIONES', default=False, cast=bool)
+PERFIL_MAXIMO_INFORMES = config('PERFIL_MAXIMO_INFORMES', default=50, cast=int)
+
 # ============================
 # CONFIGURACIÓN DE CORREO SMTP
 # ============================
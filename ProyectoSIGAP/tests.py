@@ -0,0 +1,467 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import OuterRef, Subquery
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from people.models import Alumno
+from projects.models import EstadoEnlace, Proyecto
+
+from registration.models import InformePerfil
+
+from . import cache as cache_sigap, metricas, perfilado, routers
+from .estaticos import CACHE_INMUTABLE, CACHE_REVALIDAR, EstaticosMiddleware
+from .pruebas import AJUSTES_PRUEBAS
+from .routers import ALIAS_REPLICA, COOKIE_PRIMARIA, ReplicaMiddleware, hay_replica, lectura_replica
+
+
+# ====================================================================
+# Réplica de lectura (routers.py)
+# ====================================================================
+
+@override_settings(**AJUSTES_PRUEBAS)
+class ReplicaRouterTests(SimpleTestCase):
+    """Decisiones del router y del middleware; no necesitan que exista el alias 'replica'."""
+
+    def setUp(self):
+        parche = mock.patch.object(routers, 'hay_replica', return_value=True)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _peticion(self, metodo, ruta, cookies=None, escribir=False):
+        """Pasa una petición por ReplicaMiddleware y devuelve (alias de lectura en la vista, respuesta)."""
+        request = RequestFactory().generic(metodo, ruta)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(ruta)
+        visto = {}
+
+        def vista(request):
+            visto['lectura'] = router.db_for_read(Proyecto)
+            if escribir:
+                router.db_for_write(Proyecto)
+                visto['despues'] = router.db_for_read(Proyecto)
+            return HttpResponse()
+
+        def get_response(request):
+            # El handler llama a process_view después de todos los __call__
+            middleware.process_view(request, vista, (), {})
+            return vista(request)
+
+        middleware = ReplicaMiddleware(get_response)
+        response = middleware(request)
+        self.assertIsNone(routers._estado.get())
+        return visto, response
+
+    def test_changelist_get_lee_de_la_replica(self):
+        visto, response = self._peticion('GET', '/admin/projects/proyecto/')
+        self.assertEqual(visto['lectura'], ALIAS_REPLICA)
+        self.assertNotIn(COOKIE_PRIMARIA, response.cookies)
+
+    def test_vista_no_listada_lee_de_la_primaria(self):
+        visto, _ = self._peticion('GET', '/admin/projects/proyecto/add/')
+        self.assertEqual(visto['lectura'], DEFAULT_DB_ALIAS)
+
+    def test_post_lee_de_la_primaria(self):
+        visto, _ = self._peticion('POST', '/admin/projects/proyecto/')
+        self.assertEqual(visto['lectura'], DEFAULT_DB_ALIAS)
+
+    def test_cookie_fija_la_primaria(self):
+        visto, _ = self._peticion('GET', '/admin/projects/proyecto/', cookies={COOKIE_PRIMARIA: '1'})
+        self.assertEqual(visto['lectura'], DEFAULT_DB_ALIAS)
+
+    def test_escritura_fija_la_primaria_y_pone_la_cookie(self):
+        visto, response = self._peticion('GET', '/admin/projects/proyecto/', escribir=True)
+        self.assertEqual(visto['lectura'], ALIAS_REPLICA)
+        self.assertEqual(visto['despues'], DEFAULT_DB_ALIAS)
+        self.assertIn(COOKIE_PRIMARIA, response.cookies)
+
+    def test_auth_siempre_de_la_primaria(self):
+        with lectura_replica():
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_lectura_replica_restablece_el_contextvar(self):
+        self.assertIsNone(routers._estado.get())
+        with lectura_replica():
+            self.assertEqual(router.db_for_read(Proyecto), ALIAS_REPLICA)
+        self.assertIsNone(routers._estado.get())
+        self.assertEqual(router.db_for_read(Proyecto), DEFAULT_DB_ALIAS)
+
+        with self.assertRaises(ZeroDivisionError), lectura_replica():
+            1 / 0
+        self.assertIsNone(routers._estado.get())
+
+    def test_lectura_replica_anidada_conserva_el_estado_exterior(self):
+        with lectura_replica():
+            with lectura_replica():
+                pass
+            self.assertEqual(router.db_for_read(Proyecto), ALIAS_REPLICA)
+        self.assertIsNone(routers._estado.get())
+
+
+@skipUnless(hay_replica(), "Sin DB_REPLICA_NAME no hay alias 'replica' (en pruebas es espejo de la primaria)")
+@override_settings(**AJUSTES_PRUEBAS)
+class ReplicaEspejoTests(TransactionTestCase):
+    """Con DB_REPLICA_NAME definido la réplica es un espejo de la base de pruebas (TEST['MIRROR'])."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def _consultas_replica(self, **extra):
+        with CaptureQueriesContext(connections[ALIAS_REPLICA]) as consultas:
+            self.assertEqual(self.client.get('/admin/projects/proyecto/', **extra).status_code, 200)
+        return [c['sql'] for c in consultas.captured_queries]
+
+    def test_changelist_consulta_la_replica(self):
+        self.assertTrue(any('projects_proyecto' in sql for sql in self._consultas_replica()))
+
+    def test_cookie_evita_la_replica(self):
+        self.client.cookies[COOKIE_PRIMARIA] = '1'
+        self.assertEqual(self._consultas_replica(), [])
+
+
+# ====================================================================
+# Sesión y usuario cacheados (autenticacion.py)
+# ====================================================================
+
+@override_settings(**AJUSTES_PRUEBAS)
+class AutenticacionCacheadaTests(TestCase):
+    URL = '/admin/projects/proyecto/'
+
+    def setUp(self):
+        # Todo en la primaria, haya o no DB_REPLICA_NAME: solo se cuentan sus consultas
+        parche = mock.patch.object(routers, 'hay_replica', return_value=False)
+        parche.start()
+        self.addCleanup(parche.stop)
+        cache.clear()
+        self.grupo = Group.objects.create(name='Consulta')
+        self.grupo.permissions.add(Permission.objects.get(codename='view_proyecto'))
+        self.usuario = User.objects.create_user('staff', 'staff@example.com', 'x', is_staff=True)
+        self.usuario.groups.add(self.grupo)
+
+    def test_consultas_por_modo(self):
+        # 9 de la vista del admin; la sesión, 1 con 'db'; el usuario, 1, y sus permisos y los de sus grupos, 2
+        modos = [
+            ('django.contrib.sessions.backends.db', False, 9 + 1 + 3),
+            ('django.contrib.sessions.backends.cached_db', False, 9 + 3),
+            ('django.contrib.sessions.backends.cached_db', True, 9),
+        ]
+        for motor, auth_cacheada, esperadas in modos:
+            with self.subTest(motor=motor, auth_cacheada=auth_cacheada), \
+                    override_settings(SESSION_ENGINE=motor, AUTH_CACHEADA=auth_cacheada):
+                cache.clear()
+                # Cliente nuevo: SessionMiddleware toma el motor al cargarse
+                cliente = self.client_class()
+                cliente.force_login(self.usuario)
+                cliente.get(self.URL)  # Calienta la sesión, el usuario y las cachés de la vista
+                with self.assertNumQueries(esperadas):
+                    self.assertEqual(cliente.get(self.URL).status_code, 200)
+
+    @override_settings(AUTH_CACHEADA=True)
+    def test_cambio_de_grupo_o_permiso_invalida_el_usuario(self):
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(self.URL).status_code, 200)
+
+        self.grupo.permissions.clear()
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+
+        self.usuario.user_permissions.add(Permission.objects.get(codename='view_proyecto'))
+        self.assertEqual(self.client.get(self.URL).status_code, 200)
+
+        self.usuario.groups.clear()
+        self.usuario.user_permissions.clear()
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+
+
+# ====================================================================
+# Caché versionada (cache.py)
+# ====================================================================
+
+@override_settings(**AJUSTES_PRUEBAS)
+class CacheVersionadaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cache_sigap._REGISTRADAS.clear()
+
+    def _crear(self, *numeros):
+        for numero in numeros:
+            Alumno.objects.create(codigo_estudiante=f'{numero:09d}', nombre_completo=f'Alumno {numero}')
+
+    def _alumnos(self):
+        return cache_sigap.cachear_queryset('prueba:alumnos', Alumno.objects.order_by('pk'))
+
+    def test_senal_invalida_las_entradas_del_modelo(self):
+        self._crear(1)
+        self.assertEqual(len(self._alumnos()), 1)
+        with self.assertNumQueries(0):
+            self._alumnos()
+        self._crear(2)
+        self.assertEqual(len(self._alumnos()), 2)
+
+    def test_version_se_incrementa_otra_vez_al_confirmar(self):
+        inicial = cache_sigap.version_modelo(Alumno)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            self._crear(1, 2)
+            # Dentro de la transacción: un incremento por escritura
+            self.assertEqual(cache_sigap.version_modelo(Alumno), inicial + 2)
+            # Lo que un lector cacheara ahora con las filas viejas...
+            cache_sigap.cachear('prueba:viejo', [Alumno], lambda: 'viejo')
+        # ...queda sin uso tras el commit (un solo callback para todas las escrituras)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cache_sigap.version_modelo(Alumno), inicial + 3)
+        self.assertEqual(cache_sigap.cachear('prueba:viejo', [Alumno], lambda: 'nuevo'), 'nuevo')
+
+    def test_dependencias_incluyen_subconsultas(self):
+        consulta = Proyecto.objects.annotate(
+            ok=Subquery(EstadoEnlace.objects.filter(url=OuterRef('evidencia_url')).values('ok')[:1])
+        ).filter(representante__in=Alumno.objects.values('pk'))
+        self.assertEqual(set(cache_sigap.modelos_de_consulta(consulta.query)), {Proyecto, EstadoEnlace, Alumno})
+
+    def test_paginador_cachea_conteo_y_paginas(self):
+        self._crear(1, 2, 3, 4, 5)
+        paginador = cache_sigap.PaginadorCacheado(Alumno.objects.order_by('pk'), 2)
+        self.assertEqual([a.pk for a in paginador.page(2)], ['000000003', '000000004'])
+
+        with self.assertNumQueries(0):
+            otro = cache_sigap.PaginadorCacheado(Alumno.objects.order_by('pk'), 2)
+            self.assertEqual(otro.count, 5)
+            self.assertEqual([a.pk for a in otro.page(2)], ['000000003', '000000004'])
+
+        Alumno.objects.filter(pk='000000003').delete()
+        nuevo = cache_sigap.PaginadorCacheado(Alumno.objects.order_by('pk'), 2)
+        self.assertEqual(nuevo.count, 4)
+        self.assertEqual([a.pk for a in nuevo.page(2)], ['000000004', '000000005'])
+
+    def test_estadisticas_por_region_compartidas(self):
+        self._crear(1)
+        self._alumnos()
+        self._alumnos()
+        self._alumnos()
+        # Otro worker no tiene la región en memoria: la lee del registro en la caché
+        cache_sigap._REGISTRADAS.clear()
+        self.assertEqual(
+            cache_sigap.estadisticas_cache()['prueba:alumnos'], {'aciertos': 2, 'fallos': 1, 'ratio': 0.6667}
+        )
+
+
+# ====================================================================
+# Métricas entre workers (metricas.py)
+# ====================================================================
+
+def _pid_terminado():
+    proceso = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proceso.wait()
+    return proceso.pid
+
+
+@override_settings(**AJUSTES_PRUEBAS, METRICAS_ACTIVAS=True, METRICAS_TOKEN='secreto')
+class MetricasTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ajustes = override_settings(METRICAS_DIR=self.directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        for estado in (metricas._contadores, metricas._histogramas):
+            parche = mock.patch.dict(estado, clear=True)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _worker(self, pid, correos, latencia):
+        etiquetas = [['resultado', 'enviado']]
+        buckets = [0] * len(metricas.BUCKETS_PETICION)
+        buckets[metricas.BUCKETS_PETICION.index(latencia)] = 1
+        estado = {
+            'contadores': [['sigap_correos_total', etiquetas, correos]],
+            'histogramas': [['sigap_http_peticion_segundos', [['metodo', 'GET'], ['vista', 'inicio']], buckets + [latencia, 1]]],
+        }
+        with open(os.path.join(self.directorio, f'{pid}-1.json'), 'w', encoding='utf-8') as f:
+            json.dump(estado, f)
+
+    def _correos(self, total):
+        return total['contadores'][('sigap_correos_total', (('resultado', 'enviado'),))]
+
+    def test_suma_los_workers_y_compacta_los_terminados(self):
+        muerto = _pid_terminado()
+        self._worker(os.getppid(), 2, 0.01)
+        self._worker(muerto, 3, 0.5)
+        metricas.incrementar('sigap_correos_total', resultado='enviado')
+
+        total = metricas.recolectar()
+        self.assertEqual(self._correos(total), 6)
+        histograma = total['histogramas'][('sigap_http_peticion_segundos', (('metodo', 'GET'), ('vista', 'inicio')))]
+        self.assertEqual(histograma[-2:], [0.51, 2])
+
+        # El archivo del proceso terminado pasa a finalizados.json y los totales no retroceden
+        archivos = set(os.listdir(self.directorio))
+        self.assertNotIn(f'{muerto}-1.json', archivos)
+        self.assertIn(metricas.ARCHIVO_FINALIZADOS, archivos)
+        self.assertEqual(self._correos(metricas.recolectar()), 6)
+
+    def test_exposicion_acumula_los_buckets(self):
+        self._worker(os.getppid(), 1, 0.01)
+        self._worker(os.getppid() + 10 ** 7, 1, 0.5)  # pid inexistente
+
+        respuesta = self.client.get('/metricas/', HTTP_AUTHORIZATION='Bearer secreto')
+        texto = respuesta.content.decode()
+        self.assertIn('sigap_correos_total{resultado="enviado"} 2', texto)
+        self.assertIn('sigap_http_peticion_segundos_bucket{metodo="GET",vista="inicio",le="0.1"} 1', texto)
+        self.assertIn('sigap_http_peticion_segundos_bucket{metodo="GET",vista="inicio",le="0.5"} 2', texto)
+        self.assertIn('sigap_http_peticion_segundos_count{metodo="GET",vista="inicio"} 2', texto)
+        self.assertEqual(self.client.get('/metricas/', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+
+
+# ====================================================================
+# Perfilado bajo demanda (perfilado.py)
+# ====================================================================
+
+@override_settings(**AJUSTES_PRUEBAS, PERFIL_ACTIVO=True, PERFIL_MAXIMO_INFORMES=2)
+class PerfiladoTests(TestCase):
+    URL = '/admin/projects/proyecto/'
+
+    def setUp(self):
+        # Sin réplica aunque exista DB_REPLICA_NAME: la prueba corre en una transacción de la primaria
+        parche = mock.patch.object(routers, 'hay_replica', return_value=False)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.staff = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def _informe(self, respuesta):
+        return respuesta.headers.get(perfilado.CABECERA)
+
+    def test_solo_el_personal_que_lo_pide(self):
+        self.assertIsNone(self._informe(self.client.get(self.URL, {perfilado.PARAMETRO: '1'})))
+
+        self.client.force_login(User.objects.create_user('alumno', password='x'))
+        self.assertIsNone(self._informe(self.client.get('/registro/importar/', {perfilado.PARAMETRO: '1'})))
+
+        self.client.force_login(self.staff)
+        self.assertIsNone(self._informe(self.client.get(self.URL)))
+        self.assertFalse(InformePerfil.objects.exists())
+
+        respuesta = self.client.get(self.URL, {perfilado.PARAMETRO: '1'})
+        # El parámetro no llega al admin (lo tomaría por un filtro inválido y redirigiría)
+        self.assertEqual(respuesta.status_code, 200)
+        informe = InformePerfil.objects.get(pk=self._informe(respuesta))
+        self.assertEqual((informe.tipo, informe.nombre, informe.usuario), (InformePerfil.PETICION, f'GET {self.URL}', 'admin'))
+        self.assertGreater(informe.consultas, 0)
+        self.assertIn('function calls', informe.funciones)
+
+    def test_modo_sesion_y_recorte(self):
+        self.client.force_login(self.staff)
+        self.assertIsNotNone(self._informe(self.client.get(self.URL, {perfilado.PARAMETRO: 'sesion'})))
+        self.assertIsNotNone(self._informe(self.client.get(self.URL)))
+        self.assertIsNotNone(self._informe(self.client.get(self.URL)))
+        self.assertIsNone(self._informe(self.client.get(self.URL, {perfilado.PARAMETRO: '0'})))
+        self.assertIsNone(self._informe(self.client.get(self.URL)))
+        self.assertEqual(InformePerfil.objects.count(), 2)
+
+    def test_desactivado(self):
+        with override_settings(PERFIL_ACTIVO=False):
+            cliente = self.client_class()
+            cliente.force_login(self.staff)
+            self.assertIsNone(self._informe(cliente.get(self.URL, {perfilado.PARAMETRO: '1'})))
+        with perfilado.perfilar('importación', InformePerfil.IMPORTACION, activo=False) as resultado:
+            Alumno.objects.count()
+        self.assertIsNone(resultado['informe'])
+        self.assertFalse(InformePerfil.objects.exists())
+
+
+# ====================================================================
+# Estáticos precomprimidos (estaticos.py)
+# ====================================================================
+
+class EstaticosTests(SimpleTestCase):
+    CON_HASH = 'css/base.0123456789ab.css'
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        os.makedirs(os.path.join(directorio.name, 'css'))
+        for nombre, contenido in (
+            ('css/base.css', b'body{}' * 100), ('css/base.css.gz', b'gz'), ('css/base.css.br', b'br'),
+            (self.CON_HASH, b'body{}' * 100), (self.CON_HASH + '.gz', b'gz'),
+        ):
+            with open(os.path.join(directorio.name, nombre), 'wb') as f:
+                f.write(contenido)
+        ajustes = override_settings(ESTATICOS_SERVIR=True, STATIC_ROOT=directorio.name, STATIC_URL='static/')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.middleware = EstaticosMiddleware(lambda request: HttpResponse('vista'))
+        self.middleware._con_hash = {self.CON_HASH}
+        self.factory = RequestFactory()
+
+    def _get(self, ruta, **cabeceras):
+        response = self.middleware(self.factory.get(ruta, headers=cabeceras))
+        if response.streaming:
+            cuerpo = b''.join(response.streaming_content)
+            response.close()
+        else:
+            cuerpo = response.content
+        return response, cuerpo
+
+    def test_elige_la_variante_codificada(self):
+        for aceptadas, esperada in (
+            ('', (None, b'body{}' * 100)),
+            ('gzip, deflate', ('gzip', b'gz')),
+            ('gzip, deflate, br', ('br', b'br')),
+        ):
+            with self.subTest(aceptadas=aceptadas):
+                response, cuerpo = self._get('/static/css/base.css', accept_encoding=aceptadas)
+                self.assertEqual((response.get('Content-Encoding'), cuerpo), esperada)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(int(response['Content-Length']), len(cuerpo))
+
+        # Sin variante .br del archivo con hash se sirve la .gz
+        response, _ = self._get(f'/static/{self.CON_HASH}', accept_encoding='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_respeta_los_valores_q(self):
+        for aceptadas, esperada in (
+            ('gzip;q=0', None),
+            ('gzip;q=0, br;q=0', None),
+            ('br;q=0.5, gzip;q=1.0', 'gzip'),
+            ('br;q=0.8, gzip;q=0.8', 'br'),
+            ('*', 'br'),
+            ('*;q=0.5, br;q=0', 'gzip'),
+            ('GZIP;Q=0.7, identity', 'gzip'),
+            ('gzip;q=x', None),
+        ):
+            with self.subTest(aceptadas=aceptadas):
+                response, _ = self._get('/static/css/base.css', accept_encoding=aceptadas)
+                self.assertEqual(response.get('Content-Encoding'), esperada)
+
+    def test_etag_y_304(self):
+        response, _ = self._get('/static/css/base.css', accept_encoding='gzip')
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], CACHE_REVALIDAR)
+        self.assertNotEqual(self._get('/static/css/base.css')[0]['ETag'], etag)
+
+        response, cuerpo = self._get('/static/css/base.css', accept_encoding='gzip', if_none_match=etag)
+        self.assertEqual((response.status_code, cuerpo), (304, b''))
+        self.assertEqual(response['ETag'], etag)
+
+    def test_inmutable_solo_con_hash(self):
+        self.assertEqual(self._get(f'/static/{self.CON_HASH}')[0]['Cache-Control'], CACHE_INMUTABLE)
+        self.assertEqual(self._get('/static/css/base.css')[0]['Cache-Control'], CACHE_REVALIDAR)
+
+    def test_fuera_de_static_root_pasa_a_la_vista(self):
+        for ruta in ('/static/css/nada.css', '/static/../settings.py', '/admin/'):
+            with self.subTest(ruta=ruta):
+                self.assertEqual(self._get(ruta)[1], b'vista')
@@ -16,9 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from . import views
 
 urlpatterns = [
     path('jet/', include('jet.urls', 'jet')), # Django JET URLS (intefaz del panel de administración :p)
+    path('admin/cache/estadisticas/', views.estadisticas_cache_view, name='estadisticas_cache'),
     path('admin/', admin.site.urls),
+    path('metricas/', views.metricas_view, name='metricas'),
     path('registro/', include('registration.urls')),
+    path('evaluacion/', include('evaluation.urls')),
 ]
@@ -0,0 +1,27 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+
+from . import metricas
+from .cache import estadisticas_cache
+
+
+@staff_member_required
+def estadisticas_cache_view(request):
+    """Contadores de aciertos/fallos por región de caché (solo personal)."""
+    return JsonResponse({'regiones': estadisticas_cache()})
+
+
+def metricas_view(request):
+    """
+    Métricas en formato de texto de Prometheus. Acceso para el personal o con
+    el encabezado `Authorization: Bearer <METRICAS_TOKEN>` (para el recolector).
+    """
+    token = settings.METRICAS_TOKEN
+    encabezado = request.headers.get('Authorization', '')
+    autorizado_token = bool(token) and hmac.compare_digest(encabezado, f"Bearer {token}")
+    if not autorizado_token and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse("No autorizado.\n", status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from ProyectoSIGAP.cache import PaginadorCacheado
 from .models import Evaluaciones
 admin.site.site_header = "Panel Administrativo QFB"
 admin.site.site_title = "QFB| Administración"
@@ -14,6 +15,8 @@ class EvaluacionesAdmin(admin.ModelAdmin):
     list_display = ('id_evaluacion', 'proyecto', 'evaluador', 'tipo_revision', 'resolutivo', 'fecha_evaluacion')
     list_filter = ('tipo_revision', 'resolutivo', 'evaluador', 'fecha_evaluacion')
     search_fields = ('proyecto__folio', 'evaluador__nombre_completo', 'observaciones')
+    paginator = PaginadorCacheado
+    list_select_related = ('proyecto', 'evaluador')
     
     # Hacemos la fecha de solo lectura porque es auto_now_add
     readonly_fields = ('fecha_evaluacion',)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class EvaluationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'evaluation'
+
+    def ready(self):
+        # Invalida las entradas de caché que dependen de los modelos de esta app
+        from ProyectoSIGAP.cache import conectar_invalidacion
+        conectar_invalidacion(*self.get_models())
+
+        # Mantiene la cola de trabajo precalculada de cada evaluador
+        from . import cola
+        cola.conectar()
@@ -0,0 +1,122 @@
+"""
+Cola de trabajo precalculada de cada evaluador (modelo ColaEvaluador).
+
+Por proyecto con evaluador asignado se guarda su última evaluación y la
+siguiente revisión requerida, de modo que el portal del evaluador lee una
+sola tabla por un índice. Las filas se recalculan por conjunto (una
+consulta con subconsultas, un DELETE y un INSERT) para los proyectos
+tocados: las señales de Proyecto y Evaluaciones lo hacen al confirmarse la
+transacción; las operaciones masivas usan `diferido()` o llaman a
+`recalcular()` al terminar.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_save, post_delete
+
+from projects.models import Proyecto
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import ColaEvaluador, Evaluaciones
+
+ORDEN_REVISIONES = [valor for valor, _ in Evaluaciones.REVISION_CHOICES]  # FORMA, FONDO, FINAL
+RESOLUTIVOS_QUE_AVANZAN = {'APROBADO', 'NO_APLICA'}
+
+_pendientes = contextvars.ContextVar('cola_pendientes', default=None)
+
+
+def siguiente_revision(tipo, resolutivo):
+    """
+    Revisión que sigue tras la última evaluación (None si ya no hay más).
+    Sin evaluaciones toca FORMA; una aprobada avanza a la siguiente etapa;
+    con correcciones pendientes o rechazo se repite la misma, salvo el
+    rechazo en el dictamen final, que cierra el proceso.
+    """
+    if tipo is None:
+        return ORDEN_REVISIONES[0]
+    if resolutivo in RESOLUTIVOS_QUE_AVANZAN:
+        posicion = ORDEN_REVISIONES.index(tipo) + 1 if tipo in ORDEN_REVISIONES else len(ORDEN_REVISIONES)
+        return ORDEN_REVISIONES[posicion] if posicion < len(ORDEN_REVISIONES) else None
+    if tipo == ORDEN_REVISIONES[-1] and resolutivo == 'RECHAZADO':
+        return None
+    return tipo
+
+
+def _filas(proyectos):
+    ultima = Evaluaciones.objects.filter(proyecto=OuterRef('pk')).order_by('-fecha_evaluacion', '-id_evaluacion')
+    consulta = proyectos.filter(evaluador__isnull=False).annotate(
+        ultima_revision=Subquery(ultima.values('tipo_revision')[:1]),
+        ultimo_resolutivo=Subquery(ultima.values('resolutivo')[:1]),
+        fecha_ultima_evaluacion=Subquery(ultima.values('fecha_evaluacion')[:1]),
+    ).values_list(
+        'folio', 'evaluador_id', 'titulo', 'modalidad', 'calendario_registro', 'dictamen',
+        'ultima_revision', 'ultimo_resolutivo', 'fecha_ultima_evaluacion',
+    )
+    for folio, evaluador, titulo, modalidad, calendario, dictamen, tipo, resolutivo, fecha in consulta.iterator():
+        siguiente = siguiente_revision(tipo, resolutivo)
+        yield ColaEvaluador(
+            proyecto_id=folio, evaluador_id=evaluador, titulo=titulo, modalidad=modalidad,
+            calendario=calendario, dictamen=dictamen, ultima_revision=tipo, ultimo_resolutivo=resolutivo,
+            fecha_ultima_evaluacion=fecha, siguiente_revision=siguiente, pendiente=siguiente is not None,
+        )
+
+
+def recalcular(folios=None, calendario=None, lote=2000):
+    """Reconstruye las filas de la cola. Sin filtros, la de todos los proyectos."""
+    proyectos, filas = Proyecto.objects.all(), ColaEvaluador.objects.all()
+    if folios is not None:
+        folios = list(folios)
+        if not folios:
+            return 0
+        proyectos, filas = proyectos.filter(pk__in=folios), filas.filter(proyecto_id__in=folios)
+    if calendario:
+        calendario = calendario.upper()
+        proyectos = proyectos.filter(calendario_registro=calendario)
+        filas = filas.filter(proyecto__calendario_registro=calendario)
+
+    with transaction.atomic():
+        filas.delete()
+        total = len(ColaEvaluador.objects.bulk_create(_filas(proyectos), batch_size=lote))
+    invalidar_modelo(ColaEvaluador)
+    return total
+
+
+@contextmanager
+def diferido():
+    """Acumula los proyectos tocados en el bloque y recalcula su cola una vez al final."""
+    if _pendientes.get() is not None:
+        yield
+        return
+    folios = set()
+    token = _pendientes.set(folios)
+    try:
+        yield
+    finally:
+        _pendientes.reset(token)
+    recalcular(folios)
+
+
+def _programar(folio):
+    pendientes = _pendientes.get()
+    if pendientes is not None:
+        pendientes.add(folio)
+    else:
+        # Tras el commit: si el proyecto se está borrando en cascada, ya no existirá
+        transaction.on_commit(lambda: recalcular([folio]))
+
+
+def _al_guardar_proyecto(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _programar(instance.pk)
+
+
+def _al_cambiar_evaluacion(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _programar(instance.proyecto_id)
+
+
+def conectar():
+    post_save.connect(_al_guardar_proyecto, sender=Proyecto, dispatch_uid='cola_al_guardar_proyecto')
+    post_save.connect(_al_cambiar_evaluacion, sender=Evaluaciones, dispatch_uid='cola_al_guardar_evaluacion')
+    post_delete.connect(_al_cambiar_evaluacion, sender=Evaluaciones, dispatch_uid='cola_al_borrar_evaluacion')
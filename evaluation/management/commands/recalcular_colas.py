@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from evaluation import cola
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye la cola de trabajo precalculada de los evaluadores (ColaEvaluador) "
+        "a partir de Proyecto y Evaluaciones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendario', help="Limitar a los proyectos de un calendario.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = cola.recalcular(calendario=options['calendario'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} filas de cola generadas en {time.perf_counter() - inicio:.2f} s."
+        ))
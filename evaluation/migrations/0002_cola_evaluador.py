@@ -0,0 +1,78 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+# Copia de evaluation.cola a la fecha de esta migración: la migración no debe
+# depender del código vivo, que puede cambiar después
+ORDEN_REVISIONES = ['FORMA', 'FONDO', 'FINAL']
+RESOLUTIVOS_QUE_AVANZAN = {'APROBADO', 'NO_APLICA'}
+
+
+def siguiente_revision(tipo, resolutivo):
+    if tipo is None:
+        return ORDEN_REVISIONES[0]
+    if resolutivo in RESOLUTIVOS_QUE_AVANZAN:
+        posicion = ORDEN_REVISIONES.index(tipo) + 1 if tipo in ORDEN_REVISIONES else len(ORDEN_REVISIONES)
+        return ORDEN_REVISIONES[posicion] if posicion < len(ORDEN_REVISIONES) else None
+    if tipo == ORDEN_REVISIONES[-1] and resolutivo == 'RECHAZADO':
+        return None
+    return tipo
+
+
+def llenar_colas(apps, schema_editor):
+    # Misma construcción que evaluation.cola.recalcular()
+    Proyecto = apps.get_model('projects', 'Proyecto')
+    Evaluaciones = apps.get_model('evaluation', 'Evaluaciones')
+    ColaEvaluador = apps.get_model('evaluation', 'ColaEvaluador')
+    ultima = Evaluaciones.objects.filter(proyecto=OuterRef('pk')).order_by('-fecha_evaluacion', '-id_evaluacion')
+    filas = []
+    for p in Proyecto.objects.filter(evaluador__isnull=False).annotate(
+        ultima_revision=Subquery(ultima.values('tipo_revision')[:1]),
+        ultimo_resolutivo=Subquery(ultima.values('resolutivo')[:1]),
+        fecha_ultima_evaluacion=Subquery(ultima.values('fecha_evaluacion')[:1]),
+    ).iterator():
+        siguiente = siguiente_revision(p.ultima_revision, p.ultimo_resolutivo)
+        filas.append(ColaEvaluador(
+            proyecto_id=p.folio, evaluador_id=p.evaluador_id, titulo=p.titulo, modalidad=p.modalidad,
+            calendario=p.calendario_registro, dictamen=p.dictamen, ultima_revision=p.ultima_revision,
+            ultimo_resolutivo=p.ultimo_resolutivo, fecha_ultima_evaluacion=p.fecha_ultima_evaluacion,
+            siguiente_revision=siguiente, pendiente=siguiente is not None,
+        ))
+    ColaEvaluador.objects.bulk_create(filas, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluation', '0001_initial'),
+        ('people', '0001_initial'),
+        ('projects', '0008_participantes_desnormalizados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColaEvaluador',
+            fields=[
+                ('proyecto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cola', serialize=False, to='projects.proyecto', verbose_name='PROYECTO')),
+                ('titulo', models.CharField(max_length=255, verbose_name='TÍTULO DEL PROYECTO')),
+                ('modalidad', models.CharField(max_length=50, verbose_name='MODALIDAD')),
+                ('calendario', models.CharField(max_length=10, verbose_name='CALENDARIO')),
+                ('dictamen', models.CharField(max_length=50, verbose_name='DICTAMEN FINAL')),
+                ('ultima_revision', models.CharField(blank=True, max_length=10, null=True, verbose_name='ÚLTIMA REVISIÓN')),
+                ('ultimo_resolutivo', models.CharField(blank=True, max_length=20, null=True, verbose_name='ÚLTIMO RESOLUTIVO')),
+                ('fecha_ultima_evaluacion', models.DateTimeField(blank=True, null=True, verbose_name='FECHA DE ÚLTIMA EVALUACIÓN')),
+                ('siguiente_revision', models.CharField(blank=True, max_length=10, null=True, verbose_name='SIGUIENTE REVISIÓN')),
+                ('pendiente', models.BooleanField(default=True, verbose_name='PENDIENTE')),
+                ('evaluador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cola', to='people.evaluador', verbose_name='EVALUADOR')),
+            ],
+            options={
+                'verbose_name': 'Cola de Evaluador',
+                'verbose_name_plural': 'Colas de Evaluadores',
+                'indexes': [models.Index(fields=['evaluador', '-pendiente', '-calendario', 'proyecto'], name='cola_evaluador_orden')],
+            },
+        ),
+        migrations.RunPython(llenar_colas, migrations.RunPython.noop),
+    ]
@@ -77,3 +77,41 @@ class Evaluaciones(models.Model):
 
     def __str__(self):
         return f"EVALUACIÓN {self.id_evaluacion} - {self.proyecto.folio} ({self.tipo_revision})"
+
+
+# ====================================================================
+# Cola de trabajo por evaluador (precalculada, ver evaluation/cola.py)
+# ====================================================================
+class ColaEvaluador(models.Model):
+    """
+    Una fila por proyecto con evaluador asignado: estado de su última
+    evaluación y la siguiente revisión que le toca. Se mantiene desde
+    evaluation/cola.py; no se edita a mano.
+    """
+    proyecto = models.OneToOneField(
+        Proyecto, on_delete=models.CASCADE, primary_key=True, related_name='cola', verbose_name="PROYECTO"
+    )
+    evaluador = models.ForeignKey(
+        Evaluador, on_delete=models.CASCADE, related_name='cola', verbose_name="EVALUADOR"
+    )
+    titulo = models.CharField(max_length=255, verbose_name="TÍTULO DEL PROYECTO")
+    modalidad = models.CharField(max_length=50, verbose_name="MODALIDAD")
+    calendario = models.CharField(max_length=10, verbose_name="CALENDARIO")
+    dictamen = models.CharField(max_length=50, verbose_name="DICTAMEN FINAL")
+    ultima_revision = models.CharField(max_length=10, null=True, blank=True, verbose_name="ÚLTIMA REVISIÓN")
+    ultimo_resolutivo = models.CharField(max_length=20, null=True, blank=True, verbose_name="ÚLTIMO RESOLUTIVO")
+    fecha_ultima_evaluacion = models.DateTimeField(null=True, blank=True, verbose_name="FECHA DE ÚLTIMA EVALUACIÓN")
+    # Vacío cuando el proyecto ya no requiere revisiones
+    siguiente_revision = models.CharField(max_length=10, null=True, blank=True, verbose_name="SIGUIENTE REVISIÓN")
+    pendiente = models.BooleanField(default=True, verbose_name="PENDIENTE")
+
+    class Meta:
+        verbose_name = "Cola de Evaluador"
+        verbose_name_plural = "Colas de Evaluadores"
+        indexes = [
+            # Cubre la consulta del portal: filtro por evaluador y su orden
+            models.Index(fields=['evaluador', '-pendiente', '-calendario', 'proyecto'], name='cola_evaluador_orden'),
+        ]
+
+    def __str__(self):
+        return f"{self.evaluador_id} - {self.proyecto_id} ({self.siguiente_revision or 'CONCLUIDO'})"
@@ -1,3 +1,103 @@
-from django.test import TestCase
+import importlib
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from people.models import Evaluador
+from projects.models import Calendario, Formato1, Proyecto
+from ProyectoSIGAP.pruebas import AJUSTES_PRUEBAS, PruebaMigracion
+from . import cola
+from .models import ColaEvaluador, Evaluaciones
+
+migracion_cola = importlib.import_module('evaluation.migrations.0002_cola_evaluador')
+
+CAMPOS_COLA = (
+    'proyecto_id', 'evaluador_id', 'titulo', 'modalidad', 'calendario', 'dictamen',
+    'ultima_revision', 'ultimo_resolutivo', 'siguiente_revision', 'pendiente',
+)
+
+
+def _filas_cola():
+    return set(ColaEvaluador.objects.values_list(*CAMPOS_COLA))
+
+
+class MigracionColaTests(PruebaMigracion):
+    # Estado previo a la cola, tal como lo encuentra la migración en un despliegue
+    desde = [('projects', '0008_participantes_desnormalizados'), ('evaluation', '0001_initial')]
+
+    def test_la_migracion_llena_la_misma_cola_que_recalcular(self):
+        # Modelos históricos: las señales de la cola aún no tienen tabla
+        self.apps.get_model('people', 'Evaluador').objects.create(
+            codigo_evaluador='E1', nombre_completo='EVA', correo_evaluador='e1@example.com', especializacion='GENERAL',
+        )
+        Proyecto = self.apps.get_model('projects', 'Proyecto')
+        for folio in ('P1-2023A', 'P2-2023A', 'P3-2023A'):
+            Proyecto.objects.create(folio=folio, titulo=folio, modalidad='PROTOTIPO', calendario_registro='2023A',
+                                    evaluador_id=None if folio == 'P3-2023A' else 'E1')
+        Evaluaciones = self.apps.get_model('evaluation', 'Evaluaciones')
+        Evaluaciones.objects.create(proyecto_id='P1-2023A', tipo_revision='FORMA', resolutivo='APROBADO', observaciones='')
+
+        self.migrar([('evaluation', '0002_cola_evaluador')])
+        migradas = _filas_cola()
+        self.assertEqual({fila[0] for fila in migradas}, {'P1-2023A', 'P2-2023A'})
+
+        self.migrar()
+        cola.recalcular()
+        self.assertEqual(_filas_cola(), migradas)
+
+@override_settings(**AJUSTES_PRUEBAS)
+class ColaTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A'])
+        Evaluador.objects.create(codigo_evaluador='E1', nombre_completo='Eva', correo_evaluador='e1@example.com', especializacion='General')
+        for folio in ('P1-2023A', 'P2-2023A'):
+            formato = Formato1.objects.create(folio=folio, introduccion='I', justificacion='J', objetivo='O', resumen='R')
+            with self.captureOnCommitCallbacks(execute=True):
+                Proyecto.objects.create(folio=folio, titulo=folio, modalidad='PROTOTIPO', calendario_registro_id='2023A',
+                                        evaluador_id='E1', formato1=formato)
+
+    def _siguiente(self):
+        return dict(ColaEvaluador.objects.values_list('proyecto_id', 'siguiente_revision'))
+
+    def test_las_senales_recalculan_al_confirmar(self):
+        self.assertEqual(self._siguiente(), {'P1-2023A': 'FORMA', 'P2-2023A': 'FORMA'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Evaluaciones.objects.create(proyecto_id='P1-2023A', tipo_revision='FORMA', resolutivo='APROBADO', observaciones='')
+            # Hasta el commit la cola no cambia
+            self.assertEqual(self._siguiente()['P1-2023A'], 'FORMA')
+        self.assertEqual(self._siguiente()['P1-2023A'], 'FONDO')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Evaluaciones.objects.create(proyecto_id='P1-2023A', tipo_revision='FINAL', resolutivo='RECHAZADO', observaciones='')
+        fila = ColaEvaluador.objects.get(pk='P1-2023A')
+        self.assertEqual((fila.siguiente_revision, fila.pendiente), (None, False))
+
+        proyecto = Proyecto.objects.get(pk='P2-2023A')
+        proyecto.evaluador = None
+        with self.captureOnCommitCallbacks(execute=True):
+            proyecto.save()
+        self.assertNotIn('P2-2023A', self._siguiente())
+
+    def test_diferido_recalcula_una_vez(self):
+        with mock.patch.object(cola, 'recalcular', wraps=cola.recalcular) as recalcular, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with cola.diferido():
+                for folio in ('P1-2023A', 'P2-2023A', 'P1-2023A'):
+                    Evaluaciones.objects.create(proyecto_id=folio, tipo_revision='FORMA', resolutivo='PENDIENTE', observaciones='')
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(recalcular.call_count, 1)
+        self.assertEqual(set(recalcular.call_args.args[0]), {'P1-2023A', 'P2-2023A'})
+        self.assertEqual(set(ColaEvaluador.objects.values_list('ultimo_resolutivo', flat=True)), {'PENDIENTE'})
+
+    def test_copia_congelada_de_siguiente_revision(self):
+        tipos = [None] + cola.ORDEN_REVISIONES
+        resolutivos = [valor for valor, _ in Evaluaciones.RESOLUTIVO_CHOICES]
+        for tipo, resolutivo in product(tipos, resolutivos):
+            with self.subTest(tipo=tipo, resolutivo=resolutivo):
+                self.assertEqual(
+                    migracion_cola.siguiente_revision(tipo, resolutivo), cola.siguiente_revision(tipo, resolutivo)
+                )
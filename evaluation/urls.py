@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.cola_evaluador_view, name='cola_evaluador'),
+]
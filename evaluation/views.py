@@ -1,3 +1,55 @@
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
-# Create your views here.
+from people.models import Evaluador
+from ProyectoSIGAP.cache import cachear, cachear_queryset
+from .models import ColaEvaluador, Evaluaciones
+
+
+def _evaluador_de(request):
+    """(código, nombre) del evaluador del usuario, por su correo; el personal puede elegir otro."""
+    codigo = request.GET.get('evaluador', '').strip().upper()
+    if codigo and request.user.is_staff:
+        return cachear(
+            'portal:evaluador', [Evaluador],
+            lambda: Evaluador.objects.filter(pk=codigo).values_list('codigo_evaluador', 'nombre_completo').first(),
+            'codigo', codigo,
+        )
+    correo = (request.user.email or '').strip().upper()
+    if not correo:
+        return None
+    return cachear(
+        'portal:evaluador', [Evaluador],
+        lambda: Evaluador.objects.filter(correo_evaluador=correo).values_list('codigo_evaluador', 'nombre_completo').first(),
+        'correo', correo,
+    )
+
+
+# --- Portal del evaluador: su cola de trabajo ---
+@login_required(login_url='admin:login')
+def cola_evaluador_view(request):
+    evaluador = _evaluador_de(request)
+    if evaluador is None:
+        return render(request, 'cola_evaluador.html', {
+            'error': "Tu usuario no corresponde a ningún evaluador registrado (se busca por correo electrónico).",
+        }, status=403)
+
+    codigo, nombre = evaluador
+    # Una sola consulta sobre el índice cola_evaluador_orden (o un acierto de caché)
+    filas = cachear_queryset(
+        'portal:cola_evaluador',
+        ColaEvaluador.objects.filter(evaluador_id=codigo).order_by('-pendiente', '-calendario', 'proyecto'),
+    )
+    revisiones = dict(Evaluaciones.REVISION_CHOICES)
+    resolutivos = dict(Evaluaciones.RESOLUTIVO_CHOICES)
+    for fila in filas:
+        fila.siguiente_display = revisiones.get(fila.siguiente_revision, fila.siguiente_revision)
+        fila.ultima_display = revisiones.get(fila.ultima_revision, fila.ultima_revision)
+        fila.resolutivo_display = resolutivos.get(fila.ultimo_resolutivo, fila.ultimo_resolutivo)
+
+    return render(request, 'cola_evaluador.html', {
+        'codigo': codigo,
+        'nombre': nombre,
+        'filas': filas,
+        'pendientes': sum(1 for f in filas if f.pendiente),
+    })
@@ -1,5 +1,19 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from ProyectoSIGAP.cache import PaginadorCacheado
 from .models import Alumno, Asesor, Evaluador
+from . import duplicados
+
+
+# --- Acción compartida: fusionar personas duplicadas ---
+@admin.action(description="Fusionar seleccionados (conserva el que tiene más referencias)")
+def fusionar_seleccionados(modeladmin, request, queryset):
+    personas = list(queryset)
+    if len(personas) < 2:
+        messages.warning(request, "Selecciona al menos dos registros para fusionar.")
+        return
+    principal = duplicados.elegir_principal(modeladmin.model, [p.pk for p in personas])
+    eliminados = duplicados.fusionar(principal, personas)
+    messages.success(request, f"✅ {eliminados} registro(s) fusionados en {principal}.")
 
 @admin.register(Alumno)
 class AlumnoAdmin(admin.ModelAdmin):
@@ -8,6 +22,8 @@ class AlumnoAdmin(admin.ModelAdmin):
     """
     list_display = ('codigo_estudiante', 'nombre_completo', 'correo_electronico')
     search_fields = ('codigo_estudiante', 'nombre_completo', 'correo_electronico')
+    paginator = PaginadorCacheado
+    actions = [fusionar_seleccionados]
 
 @admin.register(Asesor)
 class AsesorAdmin(admin.ModelAdmin):
@@ -16,6 +32,8 @@ class AsesorAdmin(admin.ModelAdmin):
     """
     list_display = ('codigo_asesor', 'nombre_completo', 'correo_electronico')
     search_fields = ('codigo_asesor', 'nombre_completo', 'correo_electronico')
+    paginator = PaginadorCacheado
+    actions = [fusionar_seleccionados]
 
 @admin.register(Evaluador)
 class EvaluadorAdmin(admin.ModelAdmin):
@@ -24,4 +42,6 @@ class EvaluadorAdmin(admin.ModelAdmin):
     """
     list_display = ('codigo_evaluador', 'nombre_completo', 'correo_evaluador', 'especializacion')
     search_fields = ('codigo_evaluador', 'nombre_completo', 'correo_evaluador')
+    paginator = PaginadorCacheado
+    actions = [fusionar_seleccionados]
     list_filter = ('especializacion',)
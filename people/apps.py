@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PeopleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'people'
+
+    def ready(self):
+        # Invalida las entradas de caché que dependen de los modelos de esta app
+        from ProyectoSIGAP.cache import conectar_invalidacion
+        conectar_invalidacion(*self.get_models())
@@ -0,0 +1,208 @@
+"""
+Detección y fusión de personas duplicadas (Alumno, Asesor, Evaluador).
+
+La importación identifica a las personas por el código que viene en la hoja;
+un código mal capturado o con otro formato crea un duplicado con el mismo
+nombre o correo. Para no comparar todos contra todos se usa un índice de
+bloques: solo se comparan las personas que comparten alguna clave de bloque
+(nombre normalizado con tokens ordenados, parte local del correo, código
+con solo dígitos y sin ceros a la izquierda).
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Count
+
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import Alumno, Asesor, Evaluador
+
+# Bloques más grandes que esto (p. ej. una parte local genérica) se ignoran
+TAMANO_MAXIMO_BLOQUE = 50
+
+
+@dataclass
+class Candidato:
+    a: object
+    b: object
+    puntaje: float
+    motivos: list
+
+
+def _campos(modelo):
+    """(campo código, campo correo) de cada modelo de persona."""
+    if modelo is Alumno:
+        return 'codigo_estudiante', 'correo_electronico'
+    if modelo is Asesor:
+        return 'codigo_asesor', 'correo_electronico'
+    if modelo is Evaluador:
+        return 'codigo_evaluador', 'correo_evaluador'
+    raise ValueError(f"{modelo} no es un modelo de persona.")
+
+
+def normalizar_nombre(nombre):
+    texto = unicodedata.normalize('NFKD', (nombre or '').upper())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[A-Z]+', texto))
+
+
+def normalizar_codigo(codigo):
+    digitos = re.sub(r'\D', '', codigo or '')
+    return digitos.lstrip('0') or (codigo or '').upper().strip()
+
+
+def parte_local(correo):
+    return (correo or '').split('@')[0].upper().strip()
+
+
+def claves_bloque(persona, campo_codigo, campo_correo):
+    nombre = normalizar_nombre(persona.nombre_completo)
+    claves = set()
+    if nombre:
+        claves.add('n:' + ' '.join(sorted(nombre.split())))
+    local = parte_local(getattr(persona, campo_correo))
+    if local:
+        claves.add('e:' + local)
+    codigo = normalizar_codigo(getattr(persona, campo_codigo))
+    if codigo:
+        claves.add('c:' + codigo)
+    return claves
+
+
+def _puntuar(a, b, campo_codigo, campo_correo):
+    motivos = []
+    nombre_a, nombre_b = normalizar_nombre(a.nombre_completo), normalizar_nombre(b.nombre_completo)
+    similitud_nombre = SequenceMatcher(None, ' '.join(sorted(nombre_a.split())), ' '.join(sorted(nombre_b.split()))).ratio()
+    if similitud_nombre >= 0.9:
+        motivos.append('nombre')
+
+    correo_a, correo_b = (getattr(a, campo_correo) or '').upper(), (getattr(b, campo_correo) or '').upper()
+    mismo_correo = bool(correo_a) and correo_a == correo_b
+    misma_local = bool(correo_a) and parte_local(correo_a) == parte_local(correo_b)
+    if mismo_correo:
+        motivos.append('correo')
+    elif misma_local:
+        motivos.append('correo (parte local)')
+
+    codigo_a, codigo_b = getattr(a, campo_codigo), getattr(b, campo_codigo)
+    similitud_codigo = SequenceMatcher(None, normalizar_codigo(codigo_a), normalizar_codigo(codigo_b)).ratio()
+    if normalizar_codigo(codigo_a) == normalizar_codigo(codigo_b):
+        motivos.append('código con otro formato')
+    elif similitud_codigo >= 0.8:
+        motivos.append('código parecido')
+
+    puntaje = 0.5 * similitud_nombre + 0.3 * (1.0 if mismo_correo else 0.6 if misma_local else 0.0) + 0.2 * similitud_codigo
+    return puntaje, motivos
+
+
+def buscar_duplicados(modelo, umbral=0.75):
+    """Devuelve los pares candidatos a duplicado, del más al menos probable."""
+    campo_codigo, campo_correo = _campos(modelo)
+    personas = list(modelo.objects.only(campo_codigo, 'nombre_completo', campo_correo).iterator(chunk_size=5000))
+
+    bloques = defaultdict(list)
+    for indice, persona in enumerate(personas):
+        for clave in claves_bloque(persona, campo_codigo, campo_correo):
+            bloques[clave].append(indice)
+
+    pares = set()
+    for indices in bloques.values():
+        if 1 < len(indices) <= TAMANO_MAXIMO_BLOQUE:
+            pares.update(combinations(indices, 2))
+
+    candidatos = []
+    for i, j in pares:
+        puntaje, motivos = _puntuar(personas[i], personas[j], campo_codigo, campo_correo)
+        if puntaje >= umbral:
+            candidatos.append(Candidato(personas[i], personas[j], round(puntaje, 3), motivos))
+    candidatos.sort(key=lambda c: -c.puntaje)
+    return candidatos
+
+
+# ====================================================================
+# Fusión
+# ====================================================================
+
+def elegir_principal(modelo, pks):
+    """La persona con más referencias se conserva (empate: el código menor)."""
+    if modelo is Alumno:
+        anotada = modelo.objects.annotate(referencias=Count('participacion'))
+    else:
+        anotada = modelo.objects.annotate(referencias=Count('proyecto'))
+    return anotada.filter(pk__in=pks).order_by('-referencias', 'pk').first()
+
+
+@transaction.atomic
+def fusionar(principal, duplicados):
+    """
+    Reapunta en bloque todas las referencias de `duplicados` a `principal` y los
+    elimina. Completa los datos vacíos de la principal con los de los duplicados.
+    """
+    from projects.models import Proyecto, Participacion
+    from projects import participantes
+    from registration import cambios
+    from evaluation.models import Evaluaciones, ColaEvaluador
+
+    modelo = type(principal)
+    _, campo_correo = _campos(modelo)
+    claves = [d.pk for d in duplicados if d.pk != principal.pk]
+    if not claves:
+        return 0
+
+    if modelo is Alumno:
+        # Si varias de las personas fusionadas participan en el mismo proyecto queda
+        # una sola participación (la de la principal o, si no tiene, la más antigua),
+        # representante si cualquiera de ellas lo era. Las sobrantes se borran antes
+        # de promover y de reapuntar (un representante por proyecto, unique_together).
+        por_proyecto = defaultdict(list)
+        for fila in (
+            Participacion.objects.filter(alumno_id__in=[principal.pk, *claves]).order_by('pk')
+            .values_list('pk', 'proyecto_id', 'alumno_id', 'es_representante')
+        ):
+            por_proyecto[fila[1]].append(fila)
+        sobrantes, promover, afectados = [], [], set()
+        for proyecto_id, filas in por_proyecto.items():
+            if any(alumno_id != principal.pk for _, _, alumno_id, _ in filas):
+                afectados.add(proyecto_id)
+            if len(filas) < 2:
+                continue
+            conservada = next((f for f in filas if f[2] == principal.pk), filas[0])
+            sobrantes.extend(f[0] for f in filas if f is not conservada)
+            if not conservada[3] and any(f[3] for f in filas):
+                promover.append(conservada[0])
+        with participantes.diferido():
+            Participacion.objects.filter(pk__in=sobrantes).delete()
+            promovidas = Participacion.objects.filter(pk__in=promover)
+            cambios.registrar_consulta(promovidas)
+            promovidas.update(es_representante=True)
+            cambios.registrar_consulta(Participacion.objects.filter(alumno_id__in=claves))
+            Participacion.objects.filter(alumno_id__in=claves).update(alumno=principal)
+        participantes.recalcular(afectados)
+        invalidar_modelo(Participacion)
+    elif modelo is Asesor:
+        cambios.registrar_consulta(Proyecto.objects.filter(asesor_id__in=claves))
+        Proyecto.objects.filter(asesor_id__in=claves).update(asesor=principal)
+        invalidar_modelo(Proyecto)
+    else:
+        cambios.registrar_consulta(Proyecto.objects.filter(evaluador_id__in=claves))
+        cambios.registrar_consulta(Evaluaciones.objects.filter(evaluador_id__in=claves))
+        Proyecto.objects.filter(evaluador_id__in=claves).update(evaluador=principal)
+        Evaluaciones.objects.filter(evaluador_id__in=claves).update(evaluador=principal)
+        # La cola se borraría en cascada con los duplicados: se reasigna también
+        ColaEvaluador.objects.filter(evaluador_id__in=claves).update(evaluador=principal)
+        invalidar_modelo(Proyecto)
+        invalidar_modelo(Evaluaciones)
+        invalidar_modelo(ColaEvaluador)
+
+    if not getattr(principal, campo_correo):
+        correo = next((getattr(d, campo_correo) for d in duplicados if getattr(d, campo_correo)), None)
+        if correo:
+            setattr(principal, campo_correo, correo)
+            principal.save()
+
+    eliminados, _ = modelo.objects.filter(pk__in=claves).delete()
+    return eliminados
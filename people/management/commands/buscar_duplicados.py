@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from people import duplicados
+from people.models import Alumno, Asesor, Evaluador
+
+MODELOS = {'alumno': Alumno, 'asesor': Asesor, 'evaluador': Evaluador}
+
+
+class Command(BaseCommand):
+    help = (
+        "Lista posibles personas duplicadas (mismo nombre/correo con otro código). "
+        "La fusión se hace desde la acción 'Fusionar seleccionados' del admin o con --fusionar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=sorted(MODELOS))
+        parser.add_argument('--umbral', type=float, default=0.75, help="Puntaje mínimo (0-1).")
+        parser.add_argument('--fusionar', action='store_true',
+                            help="Fusiona cada par con puntaje ≥ --umbral-fusion.")
+        parser.add_argument('--umbral-fusion', type=float, default=0.95)
+
+    def handle(self, *args, **options):
+        modelo = MODELOS[options['modelo']]
+        candidatos = duplicados.buscar_duplicados(modelo, umbral=options['umbral'])
+        for c in candidatos:
+            self.stdout.write(f"{c.puntaje:.3f}  {c.a.pk:<20}{c.b.pk:<20}{c.a.nombre_completo[:40]:<42}{', '.join(c.motivos)}")
+        self.stdout.write(f"{len(candidatos)} pares candidatos.")
+
+        if not options['fusionar']:
+            return
+        fusionados = 0
+        ya_fusionados = set()
+        for c in candidatos:
+            if c.puntaje < options['umbral_fusion'] or {c.a.pk, c.b.pk} & ya_fusionados:
+                continue
+            principal = duplicados.elegir_principal(modelo, [c.a.pk, c.b.pk])
+            duplicado = c.b if principal.pk == c.a.pk else c.a
+            fusionados += duplicados.fusionar(principal, [duplicado])
+            ya_fusionados.add(duplicado.pk)
+        self.stdout.write(self.style.SUCCESS(f"{fusionados} registros fusionados."))
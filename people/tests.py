@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from projects.models import Calendario, Participacion, Proyecto
+from ProyectoSIGAP.pruebas import AJUSTES_PRUEBAS
+from .duplicados import fusionar
+from .models import Alumno
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class FusionarAlumnosTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2024A'])
+        self.principal, self.dup1, self.dup2 = (
+            Alumno.objects.create(codigo_estudiante=codigo, nombre_completo='Ana Lopez')
+            for codigo in ('000000001', '000000002', '000000003')
+        )
+        self.proyectos = [
+            Proyecto.objects.create(folio=f'F{n}-2024A', titulo='T', modalidad='PROTOTIPO', calendario_registro_id='2024A')
+            for n in range(3)
+        ]
+
+    def test_duplicados_en_un_proyecto_sin_la_principal(self):
+        a, b, c = self.proyectos
+        Participacion.objects.create(proyecto=a, alumno=self.dup1)
+        Participacion.objects.create(proyecto=a, alumno=self.dup2, es_representante=True)
+        Participacion.objects.create(proyecto=b, alumno=self.principal)
+        Participacion.objects.create(proyecto=b, alumno=self.dup1, es_representante=True)
+        Participacion.objects.create(proyecto=c, alumno=self.dup2)
+
+        self.assertEqual(fusionar(self.principal, [self.dup1, self.dup2]), 2)
+
+        filas = set(Participacion.objects.values_list('proyecto_id', 'alumno_id', 'es_representante'))
+        self.assertEqual(filas, {
+            (a.pk, self.principal.pk, True),
+            (b.pk, self.principal.pk, True),
+            (c.pk, self.principal.pk, False),
+        })
+        a.refresh_from_db()
+        self.assertEqual((a.num_participantes, a.representante_id), (1, self.principal.pk))
@@ -1,10 +1,21 @@
+from django import forms
 from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import PermissionDenied
 from django.core.mail import send_mail
-from django.urls import path
-from django.shortcuts import redirect
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Left, Length
+from django.forms.models import BaseInlineFormSet
+from django.http import JsonResponse
+from django.template.defaultfilters import date as formato_fecha
+from django.urls import path, reverse
+from django.shortcuts import redirect, render, get_object_or_404
 from django.utils.html import format_html
-from .models import Proyecto, Formato1, Participacion, Prorroga
+from .models import Calendario, Proyecto, Formato1, Participacion, Prorroga, EstadoEnlace
+from . import masivo, similitud
 from evaluation.models import Evaluaciones
+from ProyectoSIGAP import metricas
+from ProyectoSIGAP.cache import PaginadorCacheado, cachear_agregado
 
 
 # --- Inlines (Formularios anidados dentro de ProyectoAdmin) ---
@@ -14,24 +25,170 @@ class ParticipacionInline(admin.TabularInline):
     extra = 1
     autocomplete_fields = ['alumno']
 
-class ProrrogaInline(admin.TabularInline):
+# Historiales (prórrogas y evaluaciones): solo la página más reciente se carga con
+# el formulario; el resto se pide con "Cargar más" (ProyectoAdmin.historial_view)
+TAMANO_PAGINA_HISTORIAL = 10
+LARGO_RESUMEN_TEXTO = 200
+
+
+class HistorialFormSet(BaseInlineFormSet):
+    """Formset limitado a los TAMANO_PAGINA_HISTORIAL registros más recientes."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_pagina'):
+            registros = list(super().get_queryset()[:TAMANO_PAGINA_HISTORIAL + 1])
+            self.hay_mas = len(registros) > TAMANO_PAGINA_HISTORIAL
+            self._pagina = registros[:TAMANO_PAGINA_HISTORIAL]
+            # El proyecto ya está cargado: evita una consulta por fila en __str__
+            for registro in self._pagina:
+                setattr(registro, self.fk.name, self.instance)
+        return self._pagina
+
+
+class HistorialInline(admin.TabularInline):
+    formset = HistorialFormSet
+    template = 'admin/projects/proyecto/historial_inline.html'
+    tipo_historial = None      # segmento de URL de ProyectoAdmin.historial_view
+    columnas_historial = ()    # encabezados de las filas que se cargan después
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.tipo_historial = self.tipo_historial
+        return formset
+
+
+def _texto_resumido(texto, largo_total, url):
+    if largo_total is None or largo_total <= LARGO_RESUMEN_TEXTO:
+        return texto or ''
+    return format_html(
+        '<span class="historial-texto">{}…</span> <a href="#" class="historial-ver-completo" data-url="{}">ver completo</a>',
+        texto, url,
+    )
+
+
+class ProrrogaInline(HistorialInline):
     model = Prorroga
     extra = 0
+    tipo_historial = 'prorrogas'
+    columnas_historial = ("ID", "Calendario para presentación", "Justificación")
 
-class EvaluacionesInline(admin.TabularInline):
+    def get_queryset(self, request):
+        return super().get_queryset(request).order_by('-id_prorroga')
+
+class EvaluacionesInline(HistorialInline):
     model = Evaluaciones
     extra = 0
-    readonly_fields = ('fecha_evaluacion', 'evaluador', 'tipo_revision', 'resolutivo', 'observaciones')
+    fields = ('fecha_evaluacion', 'evaluador', 'tipo_revision', 'resolutivo', 'observaciones_resumen')
+    readonly_fields = fields
     can_delete = False
+    tipo_historial = 'evaluaciones'
+    columnas_historial = ("Fecha", "Evaluador", "Tipo de revisión", "Resolutivo", "Observaciones")
+
+    def get_queryset(self, request):
+        # El texto completo de las observaciones no viaja con el formulario
+        return (
+            super().get_queryset(request)
+            .select_related('evaluador')
+            .defer('observaciones')
+            .annotate(
+                observaciones_inicio=Left('observaciones', LARGO_RESUMEN_TEXTO),
+                observaciones_largo=Length('observaciones'),
+            )
+            .order_by('-fecha_evaluacion', '-id_evaluacion')
+        )
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def observaciones_resumen(self, obj):
+        if obj.pk is None:
+            return ''
+        url = reverse('admin:proyecto_historial_texto', args=[obj.proyecto_id, self.tipo_historial, obj.pk])
+        return _texto_resumido(obj.observaciones_inicio, obj.observaciones_largo, url)
+    observaciones_resumen.short_description = "Observaciones"
+
+
+# --- Formularios de acciones masivas (campos junto al selector de acciones) ---
+
+class DictamenActionForm(ActionForm):
+    resolutivo = forms.ChoiceField(
+        choices=[('', 'Resolutivo…')] + Evaluaciones.RESOLUTIVO_CHOICES, required=False, label="Resolutivo"
+    )
+    observaciones = forms.CharField(required=False, label="Observaciones")
+
+
+class ProrrogaActionForm(ActionForm):
+    calendario = forms.CharField(required=False, max_length=5, label="Calendario",
+                                 widget=forms.TextInput(attrs={'placeholder': '2026A', 'size': 6}))
+
+
+@admin.action(description="Asignar dictamen a los seleccionados (registra evaluación FINAL)")
+def asignar_dictamen(modeladmin, request, queryset):
+    try:
+        total = masivo.dictaminar(queryset, request.POST.get('resolutivo'), request.POST.get('observaciones'))
+    except ValueError as e:
+        messages.error(request, f"❌ {e}")
+        return
+    messages.success(request, f"✅ Dictamen asignado a {total} proyecto(s).")
+
+
+@admin.action(description="Mover al calendario de presentación indicado")
+def mover_calendario(modeladmin, request, queryset):
+    try:
+        total = masivo.mover_prorrogas(queryset, request.POST.get('calendario'))
+    except ValueError as e:
+        messages.error(request, f"❌ {e}")
+        return
+    messages.success(request, f"✅ {total} prórroga(s) movidas a {request.POST.get('calendario').strip().upper()}.")
+
+
+# --- Filtros ---
+
+class EstadoEnlacesFilter(admin.SimpleListFilter):
+    """Filtra por el resultado del revisor de enlaces (comando revisar_enlaces)."""
+    title = "estado de enlaces"
+    parameter_name = 'enlaces'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('rotos', "Con enlaces rotos"),
+            ('ok', "Enlaces válidos"),
+            ('sin_revisar', "Sin revisar"),
+        ]
+
+    def queryset(self, request, queryset):
+        rotas = EstadoEnlace.objects.filter(ok=False).values('url')
+        revisadas = EstadoEnlace.objects.filter(ok__isnull=False).values('url')
+        if self.value() == 'rotos':
+            return queryset.filter(Q(evidencia_url__in=rotas) | Q(protocolo_dictamen_url__in=rotas))
+        if self.value() == 'ok':
+            return queryset.exclude(evidencia_url__in=rotas).exclude(protocolo_dictamen_url__in=rotas).filter(
+                Q(evidencia_url__in=revisadas) | Q(protocolo_dictamen_url__in=revisadas)
+            )
+        if self.value() == 'sin_revisar':
+            return queryset.filter(
+                Q(evidencia_url__isnull=False) & ~Q(evidencia_url__in=revisadas)
+                | Q(protocolo_dictamen_url__isnull=False) & ~Q(protocolo_dictamen_url__in=revisadas)
+            )
+        return queryset
 
 
 # --- Registros Principales ---
 
+@admin.register(Calendario)
+class CalendarioAdmin(admin.ModelAdmin):
+    list_display = ('clave', 'inicio', 'fin')
+    search_fields = ('clave',)
+
+
 @admin.register(Proyecto)
 class ProyectoAdmin(admin.ModelAdmin):
-    list_display = ('folio', 'titulo', 'asesor', 'evaluador', 'modalidad', 'calendario_registro', 'dictamen', 'boton_enviar_correo')
-    list_filter = ('modalidad', 'calendario_registro', 'dictamen', 'asesor', 'evaluador')
+    list_display = ('folio', 'titulo', 'representante', 'num_participantes', 'asesor', 'evaluador', 'modalidad', 'calendario_registro', 'dictamen', 'estado_enlaces', 'boton_enviar_correo')
+    list_filter = ('modalidad', 'calendario_registro', 'dictamen', 'num_participantes', EstadoEnlacesFilter, 'asesor', 'evaluador')
     search_fields = ('folio', 'titulo', 'asesor__nombre_completo', 'evaluador__nombre_completo', 'participantes__nombre_completo')
+    paginator = PaginadorCacheado
+    list_select_related = ('asesor', 'evaluador', 'representante', 'calendario_registro')
+    readonly_fields = ('representante', 'num_participantes')
     
     inlines = [
         ParticipacionInline,
@@ -40,6 +197,35 @@ class ProyectoAdmin(admin.ModelAdmin):
     ]
     
     autocomplete_fields = ['asesor', 'evaluador']
+    action_form = DictamenActionForm
+    actions = [asignar_dictamen]
+
+    def get_queryset(self, request):
+        # Estado de los enlaces en la misma consulta del listado (sin una consulta por fila)
+        return super().get_queryset(request).annotate(
+            evidencia_ok=Subquery(EstadoEnlace.objects.filter(url=OuterRef('evidencia_url')).values('ok')[:1]),
+            protocolo_ok=Subquery(EstadoEnlace.objects.filter(url=OuterRef('protocolo_dictamen_url')).values('ok')[:1]),
+        )
+
+    def estado_enlaces(self, obj):
+        iconos = {True: '✅', False: '❌', None: '—'}
+        return format_html(
+            '<span title="Evidencia / Protocolo">{} / {}</span>',
+            iconos[getattr(obj, 'evidencia_ok', None)] if obj.evidencia_url else '·',
+            iconos[getattr(obj, 'protocolo_ok', None)] if obj.protocolo_dictamen_url else '·',
+        )
+    estado_enlaces.short_description = "Enlaces"
+
+    # --- Resumen (reporte) en la parte superior del listado ---
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['resumen_dictamen'] = cachear_agregado(
+            'reporte:proyectos_por_dictamen',
+            Proyecto.objects.values('calendario_registro', 'dictamen')
+            .annotate(total=Count('folio'))
+            .order_by('-calendario_registro', 'dictamen'),
+        )
+        return super().changelist_view(request, extra_context=extra_context)
 
     # --- Botón personalizado en el panel ---
     def boton_enviar_correo(self, obj):
@@ -57,9 +243,73 @@ class ProyectoAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('enviar-correo/<str:folio>/', self.admin_site.admin_view(self.enviar_correo), name='enviar_correo'),
+            path('<path:folio>/historial/<str:tipo>/', self.admin_site.admin_view(self.historial_view), name='proyecto_historial'),
+            path('<path:folio>/historial/<str:tipo>/<int:pk>/texto/', self.admin_site.admin_view(self.historial_texto_view), name='proyecto_historial_texto'),
         ]
         return custom_urls + urls
 
+    # --- Historial paginado para los inlines de prórrogas y evaluaciones ---
+    def historial_view(self, request, folio, tipo):
+        if not self.has_view_permission(request):
+            return JsonResponse({'error': 'Sin permiso.'}, status=403)
+        try:
+            desde = max(int(request.GET.get('desde', TAMANO_PAGINA_HISTORIAL)), 0)
+        except ValueError:
+            desde = TAMANO_PAGINA_HISTORIAL
+
+        if tipo == 'evaluaciones':
+            registros = (
+                Evaluaciones.objects.filter(proyecto_id=folio)
+                .order_by('-fecha_evaluacion', '-id_evaluacion')
+                .values('id_evaluacion', 'fecha_evaluacion', 'evaluador__nombre_completo', 'tipo_revision', 'resolutivo')
+                .annotate(inicio=Left('observaciones', LARGO_RESUMEN_TEXTO), largo=Length('observaciones'))
+            )
+            tipos = dict(Evaluaciones.REVISION_CHOICES)
+            resolutivos = dict(Evaluaciones.RESOLUTIVO_CHOICES)
+            convertir = lambda r: {
+                'celdas': [
+                    formato_fecha(r['fecha_evaluacion'], 'DATETIME_FORMAT'),
+                    r['evaluador__nombre_completo'] or '-',
+                    tipos.get(r['tipo_revision'], r['tipo_revision']),
+                    resolutivos.get(r['resolutivo'], r['resolutivo']),
+                ],
+                'texto': r['inicio'] or '',
+                'url_completo': reverse('admin:proyecto_historial_texto', args=[folio, tipo, r['id_evaluacion']])
+                if (r['largo'] or 0) > LARGO_RESUMEN_TEXTO else None,
+            }
+        elif tipo == 'prorrogas':
+            registros = (
+                Prorroga.objects.filter(proyecto_id=folio).order_by('-id_prorroga')
+                .values('id_prorroga', 'calendario_presentacion')
+                .annotate(inicio=Left('justificacion', LARGO_RESUMEN_TEXTO), largo=Length('justificacion'))
+            )
+            convertir = lambda r: {
+                'celdas': [str(r['id_prorroga']), r['calendario_presentacion']],
+                'texto': r['inicio'] or '',
+                'url_completo': reverse('admin:proyecto_historial_texto', args=[folio, tipo, r['id_prorroga']])
+                if (r['largo'] or 0) > LARGO_RESUMEN_TEXTO else None,
+            }
+        else:
+            return JsonResponse({'error': 'Historial desconocido.'}, status=404)
+
+        pagina = list(registros[desde:desde + TAMANO_PAGINA_HISTORIAL + 1])
+        return JsonResponse({
+            'filas': [convertir(r) for r in pagina[:TAMANO_PAGINA_HISTORIAL]],
+            'siguiente': desde + TAMANO_PAGINA_HISTORIAL if len(pagina) > TAMANO_PAGINA_HISTORIAL else None,
+        })
+
+    def historial_texto_view(self, request, folio, tipo, pk):
+        """Texto completo (observaciones o justificación) de un registro del historial."""
+        if not self.has_view_permission(request):
+            return JsonResponse({'error': 'Sin permiso.'}, status=403)
+        if tipo == 'evaluaciones':
+            texto = get_object_or_404(Evaluaciones.objects.only('observaciones'), pk=pk, proyecto_id=folio).observaciones
+        elif tipo == 'prorrogas':
+            texto = get_object_or_404(Prorroga.objects.only('justificacion'), pk=pk, proyecto_id=folio).justificacion
+        else:
+            return JsonResponse({'error': 'Historial desconocido.'}, status=404)
+        return JsonResponse({'texto': texto})
+
     # --- Lógica del envío de correo ---
     def enviar_correo(self, request, folio):
         proyecto = Proyecto.objects.get(pk=folio)
@@ -94,13 +344,18 @@ class ProyectoAdmin(admin.ModelAdmin):
             f"Atentamente,\nComité de Evaluación"
         )
 
-        send_mail(
-            subject=asunto,
-            message=mensaje,
-            from_email=None,
-            recipient_list=destinatarios,
-            fail_silently=False,
-        )
+        try:
+            send_mail(
+                subject=asunto,
+                message=mensaje,
+                from_email=None,
+                recipient_list=destinatarios,
+                fail_silently=False,
+            )
+        except Exception:
+            metricas.incrementar('sigap_correos_total', resultado='fallido')
+            raise
+        metricas.incrementar('sigap_correos_total', resultado='enviado')
 
         messages.success(request, f"✅ Correo enviado correctamente a los participantes del proyecto {proyecto.folio}.")
         return redirect(request.META.get('HTTP_REFERER', 'admin:index'))
@@ -111,9 +366,66 @@ class ParticipacionAdmin(admin.ModelAdmin):
     list_display = ('proyecto', 'alumno', 'es_representante')
     list_filter = ('es_representante',)
     autocomplete_fields = ['proyecto', 'alumno']
+    paginator = PaginadorCacheado
+
+
+@admin.register(Prorroga)
+class ProrrogaAdmin(admin.ModelAdmin):
+    list_display = ('id_prorroga', 'proyecto', 'calendario_presentacion', 'justificacion_resumen')
+    list_filter = ('calendario_presentacion', 'proyecto__calendario_registro')
+    search_fields = ('proyecto__folio', 'proyecto__titulo', 'justificacion')
+    list_select_related = ('proyecto',)
+    autocomplete_fields = ['proyecto']
+    paginator = PaginadorCacheado
+    action_form = ProrrogaActionForm
+    actions = [mover_calendario]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            justificacion_inicio=Left('justificacion', LARGO_RESUMEN_TEXTO),
+        ).defer('justificacion')
+
+    def justificacion_resumen(self, obj):
+        return obj.justificacion_inicio
+    justificacion_resumen.short_description = "Justificación"
 
 
 @admin.register(Formato1)
 class Formato1Admin(admin.ModelAdmin):
-    list_display = ('folio', 'resumen')
+    list_display = ('folio', 'resumen', 'ver_similares')
     search_fields = ('folio', 'resumen', 'introduccion')
+    paginator = PaginadorCacheado
+
+    def ver_similares(self, obj):
+        return format_html('<a href="{}">Ver similares</a>', reverse('admin:formato1_similares', args=[obj.pk]))
+    ver_similares.short_description = "Similitud"
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('<path:folio>/similares/', self.admin_site.admin_view(self.similares_view), name='formato1_similares'),
+        ]
+        return custom_urls + urls
+
+    # --- Propuestas anteriores más parecidas (MinHash/LSH) ---
+    def similares_view(self, request, folio):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        formato1 = get_object_or_404(Formato1.objects.select_related('proyecto'), pk=folio)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"Propuestas similares a {formato1.folio}",
+            'formato1': formato1,
+            'similares': similitud.similares(formato1, limite=20),
+        }
+        return render(request, 'admin/projects/formato1/similares.html', context)
+
+
+@admin.register(EstadoEnlace)
+class EstadoEnlaceAdmin(admin.ModelAdmin):
+    list_display = ('url', 'ok', 'codigo_http', 'longitud', 'revisado', 'error')
+    list_filter = ('ok', 'codigo_http')
+    search_fields = ('url',)
+    readonly_fields = ('url', 'ok', 'codigo_http', 'longitud', 'revisado', 'error')
+    paginator = PaginadorCacheado
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
+
+    def ready(self):
+        # Invalida las entradas de caché que dependen de los modelos de esta app
+        from ProyectoSIGAP.cache import conectar_invalidacion
+        conectar_invalidacion(*self.get_models())
+
+        # Mantiene al día el índice de similitud de Formato1
+        from . import similitud
+        similitud.conectar()
+
+        # Mantiene num_participantes y representante de Proyecto
+        from . import participantes
+        participantes.conectar()
@@ -0,0 +1,309 @@
+"""
+Archivo de calendarios cerrados.
+
+Un calendario archivado se guarda en RUTA_ARCHIVO/<calendario>/ como:
+    datos.jsonl.gz   una línea JSON por objeto (formato del serializador 'python')
+    manifiesto.json  conteos por modelo y SHA-256 del archivo de datos
+
+Los proyectos del calendario y sus dependientes (Formato1, Participacion,
+Prorroga, Evaluaciones) se eliminan de las tablas vivas por lotes, y solo
+las claves primarias que quedaron en el archivo verificado. Alumnos,
+asesores y evaluadores se comparten entre calendarios: se incluyen en el
+archivo para poder restaurar en una base limpia, pero nunca se eliminan.
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Q
+
+from people.models import Alumno, Asesor, Evaluador
+from evaluation.models import ColaEvaluador, Evaluaciones
+from evaluation import cola
+from registration import cambios
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import BandaLSH, Calendario, FirmaFormato1, Formato1, Participacion, Prorroga, Proyecto
+from . import participantes, similitud
+
+ARCHIVO_DATOS = 'datos.jsonl.gz'
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+VERSION_FORMATO = 1
+
+
+class ErrorArchivo(Exception):
+    pass
+
+
+def ruta_calendario(calendario):
+    return os.path.join(settings.RUTA_ARCHIVO, calendario.upper())
+
+
+def _consultas(calendario):
+    """(modelo, queryset) en orden de restauración: primero lo referenciado."""
+    return [
+        (Alumno, Alumno.objects.filter(participacion__proyecto__calendario_registro=calendario).distinct()),
+        (Asesor, Asesor.objects.filter(proyecto__calendario_registro=calendario).distinct()),
+        (Evaluador, Evaluador.objects.filter(
+            Q(proyecto__calendario_registro=calendario) | Q(evaluaciones__proyecto__calendario_registro=calendario)
+        ).distinct()),
+        (Formato1, Formato1.objects.filter(proyecto__calendario_registro=calendario)),
+        (Proyecto, Proyecto.objects.filter(calendario_registro=calendario)),
+        (Participacion, Participacion.objects.filter(proyecto__calendario_registro=calendario)),
+        (Prorroga, Prorroga.objects.filter(proyecto__calendario_registro=calendario)),
+        (Evaluaciones, Evaluaciones.objects.filter(proyecto__calendario_registro=calendario)),
+    ]
+
+
+# Modelos que se eliminan al archivar, en orden de borrado (hijos primero)
+MODELOS_ARCHIVABLES = (Evaluaciones, Prorroga, Participacion, Proyecto, Formato1)
+
+# Se recalculan al restaurar (firmas de similitud y cola de evaluadores): el
+# borrado en cascada puede llevárselos sin archivarlos
+DERIVADOS = (FirmaFormato1, BandaLSH, ColaEvaluador)
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _sha256(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+# ====================================================================
+# Archivar
+# ====================================================================
+
+def exportar(calendario, lote=2000):
+    """Escribe el snapshot comprimido y su manifiesto. Devuelve el manifiesto."""
+    calendario = calendario.upper()
+    destino = ruta_calendario(calendario)
+    os.makedirs(destino, exist_ok=True)
+    ruta_datos = os.path.join(destino, ARCHIVO_DATOS)
+    temporal = ruta_datos + '.tmp'
+
+    conteos = {}
+    with gzip.open(temporal, 'wt', encoding='utf-8') as salida:
+        for modelo, queryset in _consultas(calendario):
+            total = 0
+            for objetos in _lotes(queryset.order_by('pk').iterator(chunk_size=lote), lote):
+                for registro in serializers.serialize('python', objetos):
+                    salida.write(json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False))
+                    salida.write('\n')
+                total += len(objetos)
+            conteos[modelo._meta.label_lower] = total
+    os.replace(temporal, ruta_datos)
+
+    manifiesto = {
+        'version': VERSION_FORMATO,
+        'calendario': calendario,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'conteos': conteos,
+        'sha256': _sha256(ruta_datos),
+    }
+    with open(os.path.join(destino, ARCHIVO_MANIFIESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
+
+
+def leer_manifiesto(calendario):
+    ruta = os.path.join(ruta_calendario(calendario), ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        raise ErrorArchivo(f"No existe un archivo para el calendario {calendario}.")
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verificar(calendario):
+    """Comprueba el checksum y que los conteos del archivo coincidan con el manifiesto."""
+    manifiesto = leer_manifiesto(calendario)
+    ruta_datos = os.path.join(ruta_calendario(calendario), ARCHIVO_DATOS)
+    if _sha256(ruta_datos) != manifiesto['sha256']:
+        raise ErrorArchivo(f"El checksum de {ruta_datos} no coincide con el manifiesto.")
+
+    conteos = {}
+    for registro in _leer_registros(ruta_datos):
+        conteos[registro['model']] = conteos.get(registro['model'], 0) + 1
+    esperados = {k: v for k, v in manifiesto['conteos'].items() if v}
+    if conteos != esperados:
+        raise ErrorArchivo(f"Los conteos del archivo {conteos} no coinciden con el manifiesto {esperados}.")
+    return manifiesto
+
+
+def claves_archivadas(calendario):
+    """{modelo archivable: set de PK} leídas del archivo de datos (lo único que se puede borrar)."""
+    ruta_datos = os.path.join(ruta_calendario(calendario), ARCHIVO_DATOS)
+    por_etiqueta = {modelo._meta.label_lower: modelo for modelo in MODELOS_ARCHIVABLES}
+    claves = {modelo: set() for modelo in MODELOS_ARCHIVABLES}
+    for registro in _leer_registros(ruta_datos):
+        modelo = por_etiqueta.get(registro['model'])
+        if modelo is not None:
+            claves[modelo].add(modelo._meta.pk.to_python(registro['pk']))
+    return claves
+
+
+def _comprobar_cascadas():
+    """Borrar un Proyecto o un Formato1 solo puede arrastrar modelos archivados o derivados."""
+    permitidos = set(MODELOS_ARCHIVABLES) | set(DERIVADOS)
+    for modelo in (Proyecto, Formato1):
+        for relacion in modelo._meta.related_objects:
+            if relacion.on_delete is models.CASCADE and relacion.related_model not in permitidos:
+                raise ErrorArchivo(
+                    f"{relacion.related_model._meta.label} se borra en cascada con {modelo._meta.label} "
+                    "pero no se archiva; agrégalo a _consultas() y MODELOS_ARCHIVABLES."
+                )
+
+
+def _diferencias(calendario, claves):
+    """Modelos cuyo conjunto vivo del calendario ya no es el archivado: {etiqueta: (nuevos, faltantes)}."""
+    diferencias = {}
+    for modelo, queryset in _consultas(calendario):
+        if modelo in claves:
+            vivas = set(queryset.values_list('pk', flat=True))
+            if vivas != claves[modelo]:
+                diferencias[modelo._meta.label_lower] = (len(vivas - claves[modelo]), len(claves[modelo] - vivas))
+    return diferencias
+
+
+def eliminar_vivos(calendario, lote=2000):
+    """
+    Borra de las tablas vivas exactamente las PK guardadas en el archivo verificado,
+    por lotes de proyectos. Aborta (ErrorArchivo) si el calendario cambió desde la
+    exportación: un objeto vivo que no está en el archivo nunca se borra.
+    """
+    calendario = calendario.upper()
+    verificar(calendario)
+    _comprobar_cascadas()
+    claves = claves_archivadas(calendario)
+    diferencias = _diferencias(calendario, claves)
+    if diferencias:
+        detalle = ', '.join(f"{etiqueta}: {nuevos} nuevos, {faltantes} faltantes"
+                            for etiqueta, (nuevos, faltantes) in diferencias.items())
+        raise ErrorArchivo(f"El calendario {calendario} cambió desde la exportación ({detalle}); archívalo de nuevo.")
+
+    eliminados = {modelo._meta.label_lower: 0 for modelo in MODELOS_ARCHIVABLES}
+    # Los proyectos se borran enseguida: no recalcular sus participantes por cada borrado
+    with participantes.diferido(), cola.diferido():
+        for grupo in _lotes(sorted(claves[Proyecto]), lote):
+            # Las entradas de cambios del lote se escriben juntas, una vez por lote
+            with transaction.atomic(), cambios.diferido():
+                # Bloquea los proyectos del lote: una evaluación, prórroga o participación
+                # nueva para ellos espera a que termine el borrado (y luego falla por la FK)
+                list(Proyecto.objects.select_for_update().filter(pk__in=grupo).values_list('pk', flat=True))
+                vivas = {
+                    modelo: set(modelo.objects.filter(proyecto_id__in=grupo).values_list('pk', flat=True))
+                    for modelo in (Evaluaciones, Prorroga, Participacion)
+                }
+                vivas[Formato1] = set(
+                    Proyecto.objects.filter(pk__in=grupo, formato1__isnull=False).values_list('formato1_id', flat=True)
+                )
+                for modelo, pks in vivas.items():
+                    sin_archivar = pks - claves[modelo]
+                    if sin_archivar:
+                        raise ErrorArchivo(
+                            f"{len(sin_archivar)} {modelo._meta.verbose_name_plural} de {calendario} no están en el "
+                            "archivo (se crearon después de exportar); los lotes anteriores ya se borraron y "
+                            "estaban archivados. Archiva de nuevo."
+                        )
+                # MODELOS_ARCHIVABLES está en orden de borrado (hijos primero)
+                for modelo in MODELOS_ARCHIVABLES:
+                    pks = grupo if modelo is Proyecto else vivas[modelo]
+                    if pks:
+                        borrados = modelo.objects.filter(pk__in=pks).delete()[1]
+                        eliminados[modelo._meta.label_lower] += borrados.get(modelo._meta.label, 0)
+        for modelo in MODELOS_ARCHIVABLES:
+            invalidar_modelo(modelo)
+    return eliminados
+
+
+# ====================================================================
+# Restaurar
+# ====================================================================
+
+def _leer_registros(ruta_datos):
+    with gzip.open(ruta_datos, 'rt', encoding='utf-8') as entrada:
+        for linea in entrada:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def _insertar(modelo, objetos):
+    # bulk_create aplica auto_now/auto_now_add: se reponen los valores originales
+    campos_auto = [
+        f for f in modelo._meta.concrete_fields
+        if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+    ]
+    originales = [[getattr(o, f.attname) for f in campos_auto] for o in objetos]
+
+    personas = modelo in (Alumno, Asesor, Evaluador)
+    modelo.objects.bulk_create(objetos, ignore_conflicts=personas)
+
+    if campos_auto and not personas:
+        for objeto, valores in zip(objetos, originales):
+            for campo, valor in zip(campos_auto, valores):
+                setattr(objeto, campo.attname, valor)
+        modelo.objects.bulk_update(objetos, [f.name for f in campos_auto])
+
+
+def restaurar(calendario, lote=2000):
+    """Carga de nuevo un calendario archivado en las tablas vivas."""
+    calendario = calendario.upper()
+    manifiesto = verificar(calendario)
+    if Proyecto.objects.filter(calendario_registro=calendario).exists():
+        raise ErrorArchivo(f"El calendario {calendario} ya tiene proyectos en las tablas vivas.")
+
+    ruta_datos = os.path.join(ruta_calendario(calendario), ARCHIVO_DATOS)
+    restaurados = {}
+    modelos = set()
+    with transaction.atomic():
+        Calendario.asegurar([calendario])
+        pendientes, modelo_actual = [], None
+        for registro in _leer_registros(ruta_datos):
+            objeto = next(serializers.deserialize('python', [registro])).object
+            if modelo_actual is not type(objeto) or len(pendientes) >= lote:
+                if pendientes:
+                    _insertar(modelo_actual, pendientes)
+                pendientes, modelo_actual = [], type(objeto)
+            pendientes.append(objeto)
+            modelos.add(modelo_actual)
+            etiqueta = modelo_actual._meta.label_lower
+            restaurados[etiqueta] = restaurados.get(etiqueta, 0) + 1
+        if pendientes:
+            _insertar(modelo_actual, pendientes)
+
+        # Las claves se insertaron explícitamente: reajustar secuencias (PostgreSQL)
+        sentencias = connection.ops.sequence_reset_sql(no_style(), list(modelos))
+        if sentencias:
+            with connection.cursor() as cursor:
+                for sql in sentencias:
+                    cursor.execute(sql)
+
+    for modelo in modelos:
+        invalidar_modelo(modelo)
+
+    # bulk_create no dispara señales: recalcular campos derivados y el índice de similitud
+    participantes.recalcular(calendario=calendario)
+    cola.recalcular(calendario=calendario)
+    for modelo, consulta in _consultas(calendario):
+        if modelo in cambios.MODELOS:
+            cambios.registrar_consulta(consulta, cambios.Cambio.ALTA)
+    for formato1 in Formato1.objects.filter(proyecto__calendario_registro=calendario).iterator():
+        similitud.indexar(formato1)
+    return manifiesto, restaurados
@@ -0,0 +1,184 @@
+"""
+Asignación automática de evaluadores a los proyectos de un calendario.
+
+Estrategia voraz balanceada: los proyectos se procesan del más restringido
+(menos evaluadores compatibles) al menos restringido, y cada uno se asigna
+al evaluador de menor costo, donde
+
+    costo = carga_actual + (0 si su especialización cubre la modalidad,
+                            si no `penalizacion`)
+
+Con esto la especialización se respeta mientras no desbalancee la carga en
+más de `penalizacion` proyectos. Un evaluador nunca revisa un proyecto cuyo
+asesor o alguno de sus participantes es la misma persona (mismo código,
+correo o nombre).
+"""
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from people.models import Evaluador
+from evaluation import cola
+from registration import cambios
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import Participacion, Proyecto
+
+PENALIZACION_ESPECIALIDAD = 5
+
+# Especializaciones que cubren cualquier modalidad
+ESPECIALIZACIONES_GENERALES = {'GENERAL', 'TODAS', 'CUALQUIERA'}
+PALABRAS_VACIAS = {'DE', 'DEL', 'LA', 'LAS', 'LOS', 'EL', 'Y', 'EN'}
+
+
+@dataclass
+class Asignacion:
+    folio: str
+    titulo: str
+    modalidad: str
+    codigo_evaluador: str
+    nombre_evaluador: str
+    especialidad_coincide: bool
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', (texto or '').upper())
+    return ''.join(c for c in texto if not unicodedata.combining(c)).strip()
+
+
+def _tokens(texto):
+    return {t for t in _normalizar(texto).replace(',', ' ').split() if t not in PALABRAS_VACIAS}
+
+
+def cubre_modalidad(especializacion, modalidad):
+    """True si la especialización del evaluador corresponde a la modalidad del proyecto."""
+    tokens = _tokens(especializacion)
+    if tokens & ESPECIALIZACIONES_GENERALES:
+        return True
+    return bool(tokens & _tokens(modalidad))
+
+
+def _identidades_evaluador(evaluador):
+    return {
+        _normalizar(evaluador.codigo_evaluador),
+        _normalizar(evaluador.correo_evaluador),
+        _normalizar(evaluador.nombre_completo),
+    } - {''}
+
+
+def _identidades_asesor(proyecto):
+    if proyecto.asesor_id is None:
+        return set()
+    return {
+        _normalizar(proyecto.asesor_id),
+        _normalizar(proyecto.asesor.correo_electronico),
+        _normalizar(proyecto.asesor.nombre_completo),
+    } - {''}
+
+
+def _identidades_participantes(calendario):
+    """Identidades normalizadas de los alumnos de cada proyecto pendiente, en una sola consulta."""
+    identidades = {}
+    filas = Participacion.objects.filter(
+        proyecto__calendario_registro=calendario, proyecto__evaluador__isnull=True,
+    ).values_list(
+        'proyecto_id', 'alumno__codigo_estudiante', 'alumno__correo_electronico', 'alumno__nombre_completo',
+    )
+    for folio, *datos in filas:
+        identidades.setdefault(folio, set()).update(_normalizar(d) for d in datos)
+    return {folio: datos - {''} for folio, datos in identidades.items()}
+
+
+def planear(calendario, penalizacion=PENALIZACION_ESPECIALIDAD, maximo=None):
+    """
+    Calcula las asignaciones para los proyectos sin evaluador del calendario.
+    Devuelve (asignaciones, folios_sin_asignar). No escribe en la base.
+    """
+    calendario = calendario.upper()
+    evaluadores = list(
+        Evaluador.objects.annotate(
+            carga=Count('proyecto', filter=Q(proyecto__calendario_registro=calendario))
+        ).order_by('codigo_evaluador')
+    )
+    pendientes = list(
+        Proyecto.objects.filter(calendario_registro=calendario, evaluador__isnull=True)
+        .select_related('asesor')
+        .only('folio', 'titulo', 'modalidad', 'asesor__codigo_asesor',
+              'asesor__nombre_completo', 'asesor__correo_electronico')
+        .order_by('folio')
+    )
+    if not evaluadores or not pendientes:
+        return [], [p.folio for p in pendientes]
+
+    carga = {e.codigo_evaluador: e.carga for e in evaluadores}
+    identidades = {e.codigo_evaluador: _identidades_evaluador(e) for e in evaluadores}
+
+    # Compatibilidad por modalidad (se calcula una vez por modalidad, no por proyecto)
+    cobertura = {}
+    for modalidad in {p.modalidad for p in pendientes}:
+        cobertura[modalidad] = {e.codigo_evaluador for e in evaluadores if cubre_modalidad(e.especializacion, modalidad)}
+
+    # Candidatos por proyecto, excluyendo conflictos de interés
+    participantes = _identidades_participantes(calendario)
+    candidatos = {}
+    for proyecto in pendientes:
+        conflicto = _identidades_asesor(proyecto) | participantes.get(proyecto.folio, set())
+        candidatos[proyecto.folio] = [
+            e for e in evaluadores if not (identidades[e.codigo_evaluador] & conflicto)
+        ]
+
+    # Primero los proyectos con menos evaluadores especializados disponibles
+    pendientes.sort(key=lambda p: (len(cobertura[p.modalidad]), p.folio))
+
+    asignaciones, sin_asignar = [], []
+    for proyecto in pendientes:
+        especialistas = cobertura[proyecto.modalidad]
+        mejor, mejor_costo = None, None
+        for evaluador in candidatos[proyecto.folio]:
+            codigo = evaluador.codigo_evaluador
+            if maximo is not None and carga[codigo] >= maximo:
+                continue
+            costo = carga[codigo] + (0 if codigo in especialistas else penalizacion)
+            if mejor is None or costo < mejor_costo:
+                mejor, mejor_costo = evaluador, costo
+        if mejor is None:
+            sin_asignar.append(proyecto.folio)
+            continue
+
+        carga[mejor.codigo_evaluador] += 1
+        asignaciones.append(Asignacion(
+            folio=proyecto.folio,
+            titulo=proyecto.titulo,
+            modalidad=proyecto.modalidad,
+            codigo_evaluador=mejor.codigo_evaluador,
+            nombre_evaluador=mejor.nombre_completo,
+            especialidad_coincide=mejor.codigo_evaluador in especialistas,
+        ))
+    return asignaciones, sin_asignar
+
+
+def aplicar(asignaciones):
+    """Escribe las asignaciones con un solo UPDATE masivo (CASE por folio)."""
+    if not asignaciones:
+        return 0
+    proyectos = [Proyecto(folio=a.folio, evaluador_id=a.codigo_evaluador) for a in asignaciones]
+    with transaction.atomic():
+        # Se vuelve a exigir evaluador vacío por si alguien asignó a mano mientras tanto
+        libres = set(
+            Proyecto.objects.select_for_update()
+            .filter(folio__in=[p.folio for p in proyectos], evaluador__isnull=True)
+            .values_list('folio', flat=True)
+        )
+        proyectos = [p for p in proyectos if p.folio in libres]
+        Proyecto.objects.bulk_update(proyectos, ['evaluador'], batch_size=None)
+        # bulk_update no dispara señales
+        cambios.registrar(Proyecto, libres)
+    invalidar_modelo(Proyecto)
+    cola.recalcular(libres)
+    return len(proyectos)
+
+
+def resumen_por_evaluador(asignaciones):
+    return Counter((a.codigo_evaluador, a.nombre_evaluador) for a in asignaciones)
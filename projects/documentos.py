@@ -0,0 +1,233 @@
+"""
+Generación por lotes de dictámenes (uno por Proyecto) y constancias de
+participación (una por Participacion) al cierre de un calendario.
+
+Los folios del calendario se reparten en lotes entre un pool de procesos;
+cada proceso lee los datos de su lote en pocas consultas (proyectos con
+asesor, evaluador y calendario, última evaluación FINAL de cada proyecto y
+participaciones con alumno), arma el texto con las plantillas de Django y
+genera y escribe los PDF. La salida queda en
+
+    RUTA_PROCESADOS/<calendario>/documentos/dictamenes/<folio>.pdf
+    RUTA_PROCESADOS/<calendario>/documentos/constancias/<folio>_<codigo>.pdf
+    RUTA_PROCESADOS/<calendario>/documentos/manifiesto.json
+
+Los procesos arrancan Django con ProyectoSIGAP/procesos.py, así que
+funciona con cualquier método de arranque. El manifiesto guarda el SHA-256
+del texto de cada documento: en una nueva corrida solo se regeneran los
+documentos cuyo contenido cambió. El proceso principal lo lee una vez, pasa
+a cada lote solo las huellas de sus folios y lo reescribe con las huellas
+que devuelve cada lote.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+
+from evaluation.models import Evaluaciones
+from ProyectoSIGAP import procesos as procesos_django
+from ProyectoSIGAP.routers import lectura_replica, leyendo_de_replica
+from .models import Proyecto, Participacion
+from .pdf import escribir_lote
+
+# Cambiarla obliga a regenerar todo (p. ej. si cambia el formato del PDF)
+VERSION_DOCUMENTOS = 1
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+# Tipo de documento -> subdirectorio
+DIRECTORIOS = {'dictamen': 'dictamenes', 'constancia': 'constancias'}
+TIPOS = tuple(DIRECTORIOS)
+
+
+@dataclass
+class Documento:
+    nombre: str  # ruta relativa dentro del directorio de documentos
+    titulo: str
+    texto: str
+
+    @property
+    def huella(self):
+        return hashlib.sha256(f"{VERSION_DOCUMENTOS}\n{self.texto}".encode('utf-8')).hexdigest()
+
+
+def ruta_documentos(calendario):
+    return os.path.join(settings.RUTA_PROCESADOS, calendario.upper(), 'documentos')
+
+
+def _nombre_archivo(*partes):
+    return '_'.join(re.sub(r'[^A-Z0-9-]+', '-', str(p).upper()).strip('-') for p in partes) + '.pdf'
+
+
+# ====================================================================
+# Datos y plantillas
+# ====================================================================
+
+def _datos(calendario, folios=None):
+    proyectos = Proyecto.objects.filter(calendario_registro=calendario)
+    evaluaciones = Evaluaciones.objects.filter(proyecto__calendario_registro=calendario, tipo_revision='FINAL')
+    participaciones_qs = Participacion.objects.filter(proyecto__calendario_registro=calendario)
+    if folios is not None:
+        proyectos = proyectos.filter(folio__in=folios)
+        evaluaciones = evaluaciones.filter(proyecto_id__in=folios)
+        participaciones_qs = participaciones_qs.filter(proyecto_id__in=folios)
+
+    proyectos = {
+        p.folio: p for p in
+        proyectos.select_related('asesor', 'evaluador', 'calendario_registro').order_by('folio')
+    }
+    # Última evaluación FINAL por proyecto (el orden del modelo es por fecha descendente)
+    finales = {}
+    for evaluacion in evaluaciones.select_related('evaluador').order_by('proyecto_id', '-fecha_evaluacion'):
+        finales.setdefault(evaluacion.proyecto_id, evaluacion)
+
+    participaciones = {}
+    for participacion in (
+        participaciones_qs.select_related('alumno').order_by('proyecto_id', '-es_representante', 'alumno_id')
+    ):
+        participaciones.setdefault(participacion.proyecto_id, []).append(participacion)
+    return proyectos, finales, participaciones
+
+
+def preparar(calendario, tipos=TIPOS, fecha=None, folios=None):
+    """
+    Arma el texto de los documentos del calendario (sin generar PDF), o solo
+    de los proyectos en `folios`. Sin `fecha` explícita se usa la de la
+    evaluación final, para que el texto (y su huella) no cambie de un día a otro.
+    """
+    calendario = calendario.upper()
+    proyectos, finales, participaciones = _datos(calendario, folios)
+
+    documentos = []
+    for folio, proyecto in proyectos.items():
+        integrantes = participaciones.get(folio, [])
+        contexto = {
+            'calendario': calendario,
+            'fecha': fecha,
+            'proyecto': proyecto,
+            'evaluacion': finales.get(folio),
+            'participaciones': integrantes,
+        }
+        if 'dictamen' in tipos:
+            documentos.append(Documento(
+                nombre=os.path.join(DIRECTORIOS['dictamen'], _nombre_archivo(folio)),
+                titulo=f"Dictamen {folio}",
+                texto=render_to_string('projects/documentos/dictamen.txt', contexto),
+            ))
+        if 'constancia' in tipos:
+            for participacion in integrantes:
+                documentos.append(Documento(
+                    nombre=os.path.join(DIRECTORIOS['constancia'], _nombre_archivo(folio, participacion.alumno_id)),
+                    titulo=f"Constancia {folio} {participacion.alumno_id}",
+                    texto=render_to_string(
+                        'projects/documentos/constancia.txt',
+                        {**contexto, 'participacion': participacion},
+                    ),
+                ))
+    return documentos
+
+
+# ====================================================================
+# Generación
+# ====================================================================
+
+def leer_manifiesto(destino):
+    ruta = os.path.join(destino, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f).get('documentos', {})
+
+
+def _manifiesto_por_folio(manifiesto):
+    """Agrupa las huellas del manifiesto por el folio (ya saneado) de su nombre de archivo."""
+    grupos = {}
+    for nombre, valor in manifiesto.items():
+        grupos.setdefault(os.path.basename(nombre).removesuffix('.pdf').split('_')[0], {})[nombre] = valor
+    return grupos
+
+
+def procesar_folios(calendario, folios, anterior, tipos, fecha, destino, forzar=False, replica=False):
+    """
+    Tarea del pool: arma y escribe los documentos de un lote de proyectos.
+    `anterior` son las huellas del manifiesto para los folios del lote. Solo
+    escribe los que cambiaron; devuelve ({nombre: huella} de todo el lote,
+    cuántos se escribieron).
+    """
+    with lectura_replica() if replica else nullcontext():
+        documentos = preparar(calendario, tipos, fecha, folios)
+    cambiados = [
+        (d.nombre, d.titulo, d.texto) for d in documentos
+        if forzar or anterior.get(d.nombre) != d.huella
+        or not os.path.exists(os.path.join(destino, d.nombre))
+    ]
+    escribir_lote(destino, cambiados)
+    return {d.nombre: d.huella for d in documentos}, len(cambiados)
+
+
+def generar(calendario, tipos=TIPOS, procesos=None, lote=200, forzar=False, fecha=None):
+    """
+    Genera los documentos del calendario. Devuelve (generados, sin_cambios).
+    `procesos=None` usa todos los núcleos; `procesos=1` genera en el proceso actual.
+    `lote` es la cantidad de proyectos por tarea del pool.
+    """
+    calendario = calendario.upper()
+    destino = ruta_documentos(calendario)
+    os.makedirs(destino, exist_ok=True)
+    anterior = leer_manifiesto(destino)
+
+    folios = list(
+        Proyecto.objects.filter(calendario_registro=calendario).order_by('folio').values_list('folio', flat=True)
+    )
+    lotes = [folios[i:i + lote] for i in range(0, len(folios), lote)]
+    # Cada lote recibe solo su parte del manifiesto, en lugar de releerlo entero
+    por_folio = _manifiesto_por_folio(anterior)
+    huellas_lotes = [
+        {n: h for folio in grupo for n, h in por_folio.get(_nombre_archivo(folio).removesuffix('.pdf'), {}).items()}
+        for grupo in lotes
+    ]
+    # Los procesos no heredan el contextvar de la réplica: se les indica explícitamente
+    argumentos = (tipos, fecha, destino, forzar, leyendo_de_replica())
+
+    if procesos == 1 or len(lotes) <= 1:
+        resultados = [
+            procesar_folios(calendario, grupo, huellas_lote, *argumentos)
+            for grupo, huellas_lote in zip(lotes, huellas_lotes)
+        ]
+    else:
+        # Las conexiones abiertas no deben compartirse con los procesos hijos (fork)
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=procesos, initializer=procesos_django.iniciar) as pool:
+            futuros = [
+                pool.submit(
+                    procesos_django.ejecutar, 'projects.documentos:procesar_folios',
+                    calendario, grupo, huellas_lote, *argumentos,
+                )
+                for grupo, huellas_lote in zip(lotes, huellas_lotes)
+            ]
+            resultados = [futuro.result() for futuro in futuros]
+
+    huellas = {}
+    generados = 0
+    for huellas_lote, escritos in resultados:
+        huellas.update(huellas_lote)
+        generados += escritos
+
+    # Se conservan las huellas de los tipos que no se generaron en esta corrida
+    directorios = {DIRECTORIOS[t] for t in tipos}
+    conservadas = {n: h for n, h in anterior.items() if n.split(os.sep)[0] not in directorios}
+    manifiesto = {
+        'version': VERSION_DOCUMENTOS,
+        'calendario': calendario,
+        'documentos': {**conservadas, **huellas},
+    }
+    temporal = os.path.join(destino, ARCHIVO_MANIFIESTO + '.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporal, os.path.join(destino, ARCHIVO_MANIFIESTO))
+    return generados, len(huellas) - generados
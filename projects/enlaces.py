@@ -0,0 +1,151 @@
+"""
+Revisor concurrente de las URLs de evidencia de los proyectos.
+
+Las peticiones se lanzan con asyncio con tres límites: concurrencia global,
+concurrencia por host y un intervalo mínimo entre peticiones al mismo host
+(casi todas las evidencias están en el mismo proveedor y no queremos que nos
+limite). Cada petición HTTP se hace con urllib en un hilo de un pool propio
+de `concurrencia` hilos para no agregar dependencias (el ejecutor por
+omisión de asyncio tiene min(32, cpu + 4) y recortaría la concurrencia).
+Solo se revisan las URLs cuya última revisión es más vieja que la vigencia
+indicada.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import urllib.error
+import urllib.request
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import Proyecto, EstadoEnlace
+
+AGENTE = 'SIGAP-revisor-enlaces/1.0'
+
+
+def sincronizar_urls(calendario=None):
+    """Registra en EstadoEnlace las URLs de proyectos que aún no se conocen."""
+    proyectos = Proyecto.objects.all()
+    if calendario:
+        proyectos = proyectos.filter(calendario_registro=calendario.upper())
+    urls = set()
+    for evidencia, protocolo in proyectos.values_list('evidencia_url', 'protocolo_dictamen_url').iterator(chunk_size=5000):
+        urls.update(u for u in (evidencia, protocolo) if u)
+    EstadoEnlace.objects.bulk_create([EstadoEnlace(url=u) for u in urls], ignore_conflicts=True, batch_size=1000)
+    # bulk_create no dispara señales
+    invalidar_modelo(EstadoEnlace)
+    return urls
+
+
+def pendientes(vigencia, urls=None):
+    limite = timezone.now() - vigencia
+    consulta = EstadoEnlace.objects.filter(Q(revisado__isnull=True) | Q(revisado__lt=limite))
+    if urls is not None:
+        consulta = consulta.filter(url__in=urls)
+    return list(consulta)
+
+
+def _peticion(url, metodo, timeout):
+    peticion = urllib.request.Request(url, method=metodo, headers={'User-Agent': AGENTE})
+    if metodo == 'GET':
+        # Solo interesa saber si existe: se pide un byte
+        peticion.add_header('Range', 'bytes=0-0')
+    try:
+        with urllib.request.urlopen(peticion, timeout=timeout) as respuesta:
+            return respuesta.status, respuesta.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers
+
+
+def _longitud(metodo, cabeceras):
+    rango = cabeceras.get('Content-Range') if cabeceras else None
+    if rango and '/' in rango and not rango.endswith('*'):
+        return int(rango.rsplit('/', 1)[1])
+    longitud = cabeceras.get('Content-Length') if cabeceras else None
+    if longitud and longitud.isdigit() and metodo == 'HEAD':
+        return int(longitud)
+    return None
+
+
+def revisar_url(url, timeout):
+    """Revisión síncrona de una URL: HEAD y, si el servidor no lo admite, GET de 1 byte."""
+    try:
+        codigo, cabeceras = _peticion(url, 'HEAD', timeout)
+        metodo = 'HEAD'
+        if codigo in (403, 405, 501):
+            codigo, cabeceras = _peticion(url, 'GET', timeout)
+            metodo = 'GET'
+        return {'codigo_http': codigo, 'longitud': _longitud(metodo, cabeceras), 'error': ''}
+    except ValueError:
+        return {'codigo_http': None, 'longitud': None, 'error': 'URL inválida'}
+    except Exception as e:
+        return {'codigo_http': None, 'longitud': None, 'error': str(getattr(e, 'reason', e))[:200]}
+
+
+class _LimiteHost:
+    def __init__(self, concurrencia, intervalo):
+        self.semaforo = asyncio.Semaphore(concurrencia)
+        self.candado = asyncio.Lock()
+        self.intervalo = intervalo
+        self.ultima = 0.0
+
+    async def esperar_turno(self):
+        async with self.candado:
+            espera = self.ultima + self.intervalo - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            self.ultima = time.monotonic()
+
+
+async def revisar_lote(urls, concurrencia=20, por_host=2, intervalo=0.2, timeout=10):
+    """Revisa las URLs respetando los límites; devuelve {url: resultado}."""
+    global_ = asyncio.Semaphore(concurrencia)
+    limites = {}
+    resultados = {}
+    bucle = asyncio.get_running_loop()
+
+    async def una(url, ejecutor):
+        host = urlsplit(url).netloc.lower()
+        limite = limites.setdefault(host, _LimiteHost(por_host, intervalo))
+        async with global_, limite.semaforo:
+            await limite.esperar_turno()
+            futuro = bucle.run_in_executor(ejecutor, revisar_url, url, timeout)
+            try:
+                # El timeout de urllib cubre conexión y lectura; este cubre el total
+                resultados[url] = await asyncio.wait_for(asyncio.shield(futuro), timeout * 3)
+            except asyncio.TimeoutError:
+                resultados[url] = {'codigo_http': None, 'longitud': None, 'error': 'Tiempo de espera agotado'}
+                # El hilo sigue hasta que urllib se rinde: el cupo se libera cuando de verdad termina
+                await asyncio.gather(futuro, return_exceptions=True)
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='enlaces') as ejecutor:
+        await asyncio.gather(*(una(url, ejecutor) for url in urls))
+    return resultados
+
+
+def revisar(vigencia=timedelta(hours=24), calendario=None, **limites):
+    """Sincroniza URLs, revisa las vencidas y guarda los resultados. Devuelve los estados revisados."""
+    urls = sincronizar_urls(calendario)
+    estados = pendientes(vigencia, urls if calendario else None)
+    if not estados:
+        return []
+
+    resultados = asyncio.run(revisar_lote([e.url for e in estados], **limites))
+    ahora = timezone.now()
+    for estado in estados:
+        resultado = resultados[estado.url]
+        estado.codigo_http = resultado['codigo_http']
+        estado.longitud = resultado['longitud']
+        estado.error = resultado['error']
+        estado.ok = resultado['codigo_http'] is not None and 200 <= resultado['codigo_http'] < 400
+        estado.revisado = ahora
+    EstadoEnlace.objects.bulk_update(
+        estados, ['ok', 'codigo_http', 'longitud', 'error', 'revisado'], batch_size=500
+    )
+    # bulk_update no dispara señales; el changelist de proyectos anota el estado
+    invalidar_modelo(EstadoEnlace)
+    return estados
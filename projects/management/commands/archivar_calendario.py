@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.importador import calcular_calendario
+from projects import archivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Archiva un calendario cerrado: guarda sus proyectos y dependientes en un snapshot "
+        "comprimido con checksum y los elimina de las tablas vivas por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendario', help="Calendario a archivar, p. ej. 2024A.")
+        parser.add_argument('--lote', type=int, default=2000, help="Tamaño de lote para leer y borrar.")
+        parser.add_argument('--sin-borrar', action='store_true', help="Solo genera el snapshot.")
+        parser.add_argument('--forzar', action='store_true', help="Permite archivar el calendario en curso.")
+
+    def handle(self, *args, **options):
+        calendario = options['calendario'].upper()
+        if calendario == calcular_calendario() and not options['forzar']:
+            raise CommandError(f"{calendario} es el calendario en curso; usa --forzar si realmente está cerrado.")
+
+        manifiesto = archivo.exportar(calendario, lote=options['lote'])
+        if not manifiesto['conteos'].get('projects.proyecto'):
+            raise CommandError(f"El calendario {calendario} no tiene proyectos en las tablas vivas.")
+
+        # Nunca se borra nada sin comprobar antes que el snapshot se lee completo
+        try:
+            archivo.verificar(calendario)
+        except archivo.ErrorArchivo as e:
+            raise CommandError(str(e))
+
+        for modelo, total in manifiesto['conteos'].items():
+            self.stdout.write(f"  {modelo:<28}{total:>8}")
+        self.stdout.write(f"Snapshot: {archivo.ruta_calendario(calendario)} (sha256 {manifiesto['sha256'][:12]}…)")
+
+        if options['sin_borrar']:
+            return
+        try:
+            eliminados = archivo.eliminar_vivos(calendario, lote=options['lote'])
+        except archivo.ErrorArchivo as e:
+            raise CommandError(str(e))
+        resumen = ', '.join(f"{modelo}={total}" for modelo, total in eliminados.items())
+        self.stdout.write(self.style.SUCCESS(f"Calendario {calendario} archivado. Eliminados: {resumen}"))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects import asignacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Asigna evaluador a todos los proyectos sin asignar de un calendario, balanceando "
+        "carga y especialización y evitando conflictos asesor/evaluador."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendario', help="Calendario a asignar, p. ej. 2025A.")
+        parser.add_argument('--dry-run', action='store_true', help="Muestra la propuesta sin escribir.")
+        parser.add_argument('--penalizacion', type=int, default=asignacion.PENALIZACION_ESPECIALIDAD,
+                            help="Proyectos de carga extra que se toleran para respetar la especialización.")
+        parser.add_argument('--maximo', type=int, help="Máximo de proyectos por evaluador en el calendario.")
+        parser.add_argument('--detalle', type=int, default=20, help="Asignaciones a listar en la vista previa.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        asignaciones, sin_asignar = asignacion.planear(
+            options['calendario'], penalizacion=options['penalizacion'], maximo=options['maximo']
+        )
+        duracion = time.perf_counter() - inicio
+
+        coinciden = sum(a.especialidad_coincide for a in asignaciones)
+        self.stdout.write(
+            f"{len(asignaciones)} asignaciones propuestas en {duracion:.2f} s "
+            f"({coinciden} con especialidad coincidente, {len(sin_asignar)} sin evaluador posible)."
+        )
+        for (codigo, nombre), total in sorted(asignacion.resumen_por_evaluador(asignaciones).items()):
+            self.stdout.write(f"  {codigo:<20}{nombre[:40]:<42}{total:>6}")
+
+        if options['dry_run']:
+            for a in asignaciones[:options['detalle']]:
+                marca = '' if a.especialidad_coincide else ' (fuera de especialidad)'
+                self.stdout.write(f"  {a.folio:<24}{a.modalidad:<26}-> {a.codigo_evaluador}{marca}")
+            if sin_asignar:
+                self.stdout.write(f"Sin asignar: {', '.join(sin_asignar[:options['detalle']])}")
+            self.stdout.write(self.style.WARNING("Vista previa: no se escribió ningún cambio."))
+            return
+
+        escritos = asignacion.aplicar(asignaciones)
+        self.stdout.write(self.style.SUCCESS(f"{escritos} proyectos actualizados en una sola operación."))
@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ProyectoSIGAP.routers import lectura_replica
+from projects import documentos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera en PDF los dictámenes (uno por proyecto) y las constancias de participación "
+        "de un calendario usando un pool de procesos. Solo regenera los documentos cuyo contenido cambió."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendario', help="Calendario a procesar, p. ej. 2024B.")
+        parser.add_argument('--tipo', choices=documentos.TIPOS, action='append', help="Generar solo este tipo (repetible).")
+        parser.add_argument('--procesos', type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos).")
+        parser.add_argument('--lote', type=int, default=200, help="Proyectos por tarea del pool.")
+        parser.add_argument('--fecha', help="Fecha a imprimir (AAAA-MM-DD); por defecto la de la evaluación final.")
+        parser.add_argument('--forzar', action='store_true', help="Regenerar aunque no haya cambios.")
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options['fecha']:
+            try:
+                fecha = datetime.strptime(options['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD.")
+
+        inicio = time.perf_counter()
+        with lectura_replica():
+            generados, sin_cambios = documentos.generar(
+                options['calendario'],
+                tipos=options['tipo'] or documentos.TIPOS,
+                procesos=options['procesos'],
+                lote=options['lote'],
+                forzar=options['forzar'],
+                fecha=fecha,
+            )
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{generados} documentos generados y {sin_cambios} sin cambios en {duracion:.1f} s "
+            f"({documentos.ruta_documentos(options['calendario'])})."
+        ))
@@ -0,0 +1,30 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from projects import similitud
+from projects.models import Formato1
+
+
+class Command(BaseCommand):
+    help = "Calcula las firmas MinHash/LSH de los Formato1 que no tienen firma o cuyo texto cambió."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendario', help="Limitar a los formatos de un calendario.")
+        parser.add_argument('--forzar', action='store_true', help="Recalcula aunque el texto no haya cambiado.")
+        parser.add_argument('--lote', type=int, default=500, help="Formatos por lote de escritura.")
+
+    def handle(self, *args, **options):
+        formatos = Formato1.objects.all()
+        if options['calendario']:
+            formatos = formatos.filter(proyecto__calendario_registro=options['calendario'].upper())
+
+        # indexar_lote: una consulta de huellas, un DELETE y un INSERT por lote
+        actualizados = 0
+        iterador = formatos.order_by('pk').iterator(chunk_size=options['lote'])
+        while True:
+            lote = list(islice(iterador, options['lote']))
+            if not lote:
+                break
+            actualizados += similitud.indexar_lote(lote, forzar=options['forzar'])
+        self.stdout.write(self.style.SUCCESS(f"{actualizados} formatos indexados."))
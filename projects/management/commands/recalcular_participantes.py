@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects import participantes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula num_participantes y representante de los proyectos a partir de "
+        "Participacion con una sola sentencia UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendario', help="Limitar a los proyectos de un calendario.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        actualizados = participantes.recalcular(calendario=options['calendario'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{actualizados} proyectos recalculados en {time.perf_counter() - inicio:.2f} s."
+        ))
@@ -0,0 +1,35 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from projects import similitud
+from ProyectoSIGAP.routers import lectura_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Reporte de propuestas casi duplicadas de un calendario frente a sí mismo y a los "
+        "calendarios anteriores (MinHash/LSH, ver projects/similitud.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendario', help="Calendario a revisar, p. ej. 2025A.")
+        parser.add_argument('--minimo', type=float, default=0.5, help="Similitud mínima estimada (0-1).")
+        parser.add_argument('--salida', help="Ruta de un CSV de salida (por defecto se imprime).")
+
+    def handle(self, *args, **options):
+        with lectura_replica():
+            pares = similitud.pares_calendario(options['calendario'].upper(), minimo=options['minimo'])
+
+        if options['salida']:
+            with open(options['salida'], 'w', newline='', encoding='utf-8') as f:
+                escritor = csv.writer(f)
+                escritor.writerow(['folio', 'folio_similar', 'similitud'])
+                for folio_a, folio_b, valor in pares:
+                    escritor.writerow([folio_a, folio_b, f"{valor:.3f}"])
+            self.stdout.write(self.style.SUCCESS(f"{len(pares)} pares escritos en {options['salida']}."))
+            return
+
+        for folio_a, folio_b, valor in pares:
+            self.stdout.write(f"{folio_a:<28}{folio_b:<28}{valor:.3f}")
+        self.stdout.write(self.style.SUCCESS(f"{len(pares)} pares con similitud ≥ {options['minimo']}."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects import archivo
+
+
+class Command(BaseCommand):
+    help = "Restaura en las tablas vivas un calendario archivado con archivar_calendario."
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendario', help="Calendario a restaurar, p. ej. 2024A.")
+        parser.add_argument('--lote', type=int, default=2000, help="Tamaño de lote para bulk_create.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            manifiesto, restaurados = archivo.restaurar(options['calendario'], lote=options['lote'])
+        except archivo.ErrorArchivo as e:
+            raise CommandError(str(e))
+
+        for modelo, total in restaurados.items():
+            self.stdout.write(f"  {modelo:<28}{total:>8}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Calendario {manifiesto['calendario']} restaurado en {time.perf_counter() - inicio:.1f} s."
+        ))
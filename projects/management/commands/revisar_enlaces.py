@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from projects import enlaces
+
+
+class Command(BaseCommand):
+    help = (
+        "Revisa de forma concurrente las URLs de evidencia y protocolo de los proyectos "
+        "y guarda su estado; solo vuelve a revisar las que superan la vigencia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendario', help="Limitar a los proyectos de un calendario.")
+        parser.add_argument('--vigencia-horas', type=float, default=24, help="Antigüedad a partir de la cual se revisa de nuevo.")
+        parser.add_argument('--concurrencia', type=int, default=20, help="Peticiones simultáneas en total.")
+        parser.add_argument('--por-host', type=int, default=2, help="Peticiones simultáneas por host.")
+        parser.add_argument('--intervalo', type=float, default=0.2, help="Segundos mínimos entre peticiones al mismo host.")
+        parser.add_argument('--timeout', type=float, default=10, help="Timeout por petición (s).")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        estados = enlaces.revisar(
+            vigencia=timedelta(hours=options['vigencia_horas']),
+            calendario=options['calendario'],
+            concurrencia=options['concurrencia'],
+            por_host=options['por_host'],
+            intervalo=options['intervalo'],
+            timeout=options['timeout'],
+        )
+        rotos = [e for e in estados if not e.ok]
+        for estado in rotos:
+            self.stdout.write(f"  {estado.codigo_http or '---'}  {estado.url}  {estado.error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(estados)} enlaces revisados en {time.perf_counter() - inicio:.1f} s; {len(rotos)} con problemas."
+        ))
@@ -0,0 +1,77 @@
+"""
+Cambios masivos sobre proyectos y prórrogas (acciones del admin).
+
+Cada operación es un solo UPDATE sobre la selección en lugar de un save()
+por objeto, así que la normalización a mayúsculas que hacen los save() de
+los modelos se aplica aquí a los valores antes de escribirlos. El dictamen
+masivo deja además una evaluación FINAL por proyecto en un solo INSERT.
+"""
+from django.db import transaction
+
+from evaluation.models import Evaluaciones
+from evaluation import cola
+from registration import cambios
+from ProyectoSIGAP.cache import invalidar_modelo
+from .models import Calendario, Proyecto, Prorroga
+
+RESOLUTIVOS = {valor for valor, _ in Evaluaciones.RESOLUTIVO_CHOICES}
+TAMANO_LOTE = 1000
+
+
+def normalizar_calendario(calendario):
+    calendario = (calendario or '').strip().upper()
+    if not Calendario.CLAVE_VALIDA.match(calendario):
+        raise ValueError(f"Calendario inválido: {calendario or '(vacío)'}. Usa el formato 2025A.")
+    return calendario
+
+
+@transaction.atomic
+def dictaminar(proyectos, resolutivo, observaciones=''):
+    """
+    Asigna `resolutivo` como dictamen de los proyectos del queryset y registra
+    una evaluación FINAL por proyecto (con su evaluador asignado).
+    Devuelve el número de proyectos actualizados.
+    """
+    resolutivo = (resolutivo or '').strip().upper()
+    if resolutivo not in RESOLUTIVOS:
+        raise ValueError(f"Resolutivo inválido: {resolutivo or '(vacío)'}.")
+    observaciones = (observaciones or '').strip().upper() or f"DICTAMEN {resolutivo} ASIGNADO EN LOTE."
+
+    # Se bloquean las filas para que la selección y el historial coincidan
+    seleccion = list(
+        Proyecto.objects.select_for_update()
+        .filter(pk__in=proyectos.values('pk'))
+        .values_list('folio', 'evaluador_id')
+    )
+    if not seleccion:
+        return 0
+
+    actualizados = Proyecto.objects.filter(pk__in=[folio for folio, _ in seleccion]).update(dictamen=resolutivo)
+    creadas = Evaluaciones.objects.bulk_create(
+        [
+            Evaluaciones(
+                proyecto_id=folio, evaluador_id=evaluador_id, tipo_revision='FINAL',
+                resolutivo=resolutivo, observaciones=observaciones,
+            )
+            for folio, evaluador_id in seleccion
+        ],
+        batch_size=TAMANO_LOTE,
+    )
+    invalidar_modelo(Proyecto)
+    invalidar_modelo(Evaluaciones)
+    cola.recalcular(folio for folio, _ in seleccion)
+    # update() y bulk_create() no disparan señales
+    cambios.registrar(Proyecto, [folio for folio, _ in seleccion])
+    cambios.registrar(Evaluaciones, [e.pk for e in creadas], cambios.Cambio.ALTA)
+    return actualizados
+
+
+@transaction.atomic
+def mover_prorrogas(prorrogas, calendario):
+    """Cambia el calendario de presentación de las prórrogas del queryset."""
+    calendario = normalizar_calendario(calendario)
+    claves = list(prorrogas.values_list('pk', flat=True))
+    actualizadas = Prorroga.objects.filter(pk__in=claves).update(calendario_presentacion=calendario)
+    invalidar_modelo(Prorroga)
+    cambios.registrar(Prorroga, claves)
+    return actualizadas
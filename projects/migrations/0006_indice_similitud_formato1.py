@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_alter_proyecto_modalidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FirmaFormato1',
+            fields=[
+                ('formato1', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='firma', serialize=False, to='projects.formato1')),
+                ('firma', models.BinaryField(verbose_name='FIRMA MINHASH')),
+                ('huella_texto', models.CharField(max_length=40, verbose_name='HUELLA DEL TEXTO')),
+                ('actualizado', models.DateTimeField(auto_now=True, verbose_name='ACTUALIZADO')),
+            ],
+            options={
+                'verbose_name': 'Firma de Similitud',
+                'verbose_name_plural': 'Firmas de Similitud',
+            },
+        ),
+        migrations.CreateModel(
+            name='BandaLSH',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('banda', models.PositiveSmallIntegerField(verbose_name='BANDA')),
+                ('hash_banda', models.BigIntegerField(verbose_name='HASH DE BANDA')),
+                ('formato1', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bandas_lsh', to='projects.formato1')),
+            ],
+            options={
+                'verbose_name': 'Banda LSH',
+                'verbose_name_plural': 'Bandas LSH',
+                'indexes': [models.Index(fields=['banda', 'hash_banda'], name='projects_banda_hash_idx')],
+            },
+        ),
+    ]
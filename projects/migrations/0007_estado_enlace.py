@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_indice_similitud_formato1'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoEnlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True, verbose_name='URL')),
+                ('ok', models.BooleanField(null=True, verbose_name='ENLACE VÁLIDO')),
+                ('codigo_http', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='CÓDIGO HTTP')),
+                ('longitud', models.BigIntegerField(blank=True, null=True, verbose_name='TAMAÑO (BYTES)')),
+                ('error', models.CharField(blank=True, default='', max_length=200, verbose_name='ERROR')),
+                ('revisado', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='ÚLTIMA REVISIÓN')),
+            ],
+            options={
+                'verbose_name': 'Estado de Enlace',
+                'verbose_name_plural': 'Estados de Enlaces',
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def dejar_un_representante(apps, schema_editor):
+    """
+    Antes de la restricción: en proyectos con varios representantes se conserva
+    el alumno cuyo código forma el folio (<código>-<calendario>) o, si ninguno,
+    el de código menor.
+    """
+    Participacion = apps.get_model('projects', 'Participacion')
+    repetidos = (
+        Participacion.objects.filter(es_representante=True)
+        .values('proyecto_id').annotate(total=Count('pk')).filter(total__gt=1)
+        .values_list('proyecto_id', flat=True)
+    )
+    for folio in list(repetidos):
+        representantes = list(
+            Participacion.objects.filter(proyecto_id=folio, es_representante=True).order_by('alumno_id')
+        )
+        codigo_folio = folio.rsplit('-', 1)[0]
+        conservar = next((p for p in representantes if p.alumno_id == codigo_folio), representantes[0])
+        Participacion.objects.filter(pk__in=[p.pk for p in representantes if p.pk != conservar.pk]).update(
+            es_representante=False
+        )
+
+
+def calcular_campos(apps, schema_editor):
+    # Misma sentencia que projects.participantes.recalcular()
+    Proyecto = apps.get_model('projects', 'Proyecto')
+    Participacion = apps.get_model('projects', 'Participacion')
+    conteo = (
+        Participacion.objects.filter(proyecto=OuterRef('pk'))
+        .order_by().values('proyecto').annotate(total=Count('pk')).values('total')
+    )
+    representante = (
+        Participacion.objects.filter(proyecto=OuterRef('pk'), es_representante=True)
+        .order_by('alumno_id').values('alumno_id')[:1]
+    )
+    Proyecto.objects.update(
+        num_participantes=Coalesce(Subquery(conteo), 0),
+        representante=Subquery(representante),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0001_initial'),
+        ('projects', '0007_estado_enlace'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='num_participantes',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, verbose_name='NÚM. PARTICIPANTES'),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='representante',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='proyectos_representados', to='people.alumno', verbose_name='REPRESENTANTE'),
+        ),
+        migrations.RunPython(dejar_un_representante, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='participacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('es_representante', True)), fields=('proyecto',), name='participacion_un_representante', violation_error_message='El proyecto ya tiene un representante.'),
+        ),
+        migrations.RunPython(calcular_campos, migrations.RunPython.noop),
+    ]
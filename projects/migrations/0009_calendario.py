@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:34
+
+import re
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_calendarios(apps, schema_editor):
+    """Un Calendario por cada valor distinto de Proyecto.calendario_registro, con sus fechas."""
+    Calendario = apps.get_model('projects', 'Calendario')
+    Proyecto = apps.get_model('projects', 'Proyecto')
+    claves = Proyecto.objects.order_by().values_list('calendario_registro', flat=True).distinct()
+    nuevos = []
+    for clave in claves:
+        inicio = fin = None
+        if re.match(r'^\d{4}[AB]$', clave):
+            anio = int(clave[:4])
+            inicio, fin = (date(anio, 1, 1), date(anio, 6, 30)) if clave[4] == 'A' else (date(anio, 7, 1), date(anio, 12, 31))
+        nuevos.append(Calendario(clave=clave, inicio=inicio, fin=fin))
+    Calendario.objects.bulk_create(nuevos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_participantes_desnormalizados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Calendario',
+            fields=[
+                ('clave', models.CharField(max_length=10, primary_key=True, serialize=False, verbose_name='CALENDARIO')),
+                ('inicio', models.DateField(blank=True, null=True, verbose_name='INICIO')),
+                ('fin', models.DateField(blank=True, null=True, verbose_name='FIN')),
+            ],
+            options={
+                'verbose_name': 'Calendario',
+                'verbose_name_plural': 'Calendarios',
+                'ordering': ['-clave'],
+            },
+        ),
+        # Antes de la llave foránea: cada valor existente necesita su fila
+        migrations.RunPython(poblar_calendarios, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='proyecto',
+            name='calendario_registro',
+            field=models.ForeignKey(db_column='calendario_registro', on_delete=django.db.models.deletion.PROTECT, to='projects.calendario', verbose_name='CALENDARIO'),
+        ),
+    ]
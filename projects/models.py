@@ -1,8 +1,73 @@
+import re
+from datetime import date
+
 from django.db import models
 # Importar modelos de la app 'people' para las FK
-from people.models import Alumno, Asesor, Evaluador 
+from people.models import Alumno, Asesor, Evaluador
 
 
+# ====================================================================
+# 0. Calendario (Catálogo)
+# ====================================================================
+
+class Calendario(models.Model):
+    """
+    Calendario escolar ('2025A' = enero-junio, '2025B' = julio-diciembre).
+    La clave es la misma cadena que se usaba en Proyecto.calendario_registro,
+    así que filtros, reportes y el registro de cambios siguen viendo '2025A'.
+    """
+    CLAVE_VALIDA = re.compile(r'^\d{4}[AB]$')
+
+    clave = models.CharField(max_length=10, primary_key=True, verbose_name="CALENDARIO")
+    inicio = models.DateField(null=True, blank=True, verbose_name="INICIO")
+    fin = models.DateField(null=True, blank=True, verbose_name="FIN")
+
+    class Meta:
+        ordering = ['-clave']
+        verbose_name = "Calendario"
+        verbose_name_plural = "Calendarios"
+
+    @staticmethod
+    def clave_de(fecha=None):
+        """Clave del calendario (p. ej. '2025A') que corresponde a una fecha."""
+        fecha = fecha or date.today()
+        return f"{fecha.year}{'A' if fecha.month < 7 else 'B'}"
+
+    @classmethod
+    def fechas_de(cls, clave):
+        """(inicio, fin) de una clave válida; (None, None) para claves heredadas sin ese formato."""
+        if not cls.CLAVE_VALIDA.match(clave):
+            return None, None
+        anio = int(clave[:4])
+        if clave[4] == 'A':
+            return date(anio, 1, 1), date(anio, 6, 30)
+        return date(anio, 7, 1), date(anio, 12, 31)
+
+    @classmethod
+    def asegurar(cls, claves):
+        """Crea los calendarios que falten (una sola consulta) antes de escribir proyectos."""
+        nuevos = []
+        for clave in {c.strip().upper() for c in claves if c}:
+            inicio, fin = cls.fechas_de(clave)
+            nuevos.append(cls(clave=clave, inicio=inicio, fin=fin))
+        cls.objects.bulk_create(nuevos, ignore_conflicts=True)
+
+    @classmethod
+    def actual(cls):
+        clave = cls.clave_de()
+        cls.asegurar([clave])
+        return cls.objects.get(pk=clave)
+
+    def save(self, *args, **kwargs):
+        if self.clave:
+            self.clave = self.clave.strip().upper()
+        if self.inicio is None and self.fin is None:
+            self.inicio, self.fin = self.fechas_de(self.clave)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.clave
+
 # ====================================================================
 # 1. Formato1 (Relación 1:1)
 # ====================================================================
@@ -86,11 +151,26 @@ class Proyecto(models.Model):
     variante = models.CharField(max_length=50, null=True, blank=True, verbose_name="VARIANTE DE MODALIDAD")
     nivel_competencia = models.CharField(max_length=30, null=True, blank=True, verbose_name="MÓDULOS REGISTRADOS")
     dictamen = models.CharField(max_length=50, default='PENDIENTE', verbose_name="DICTAMEN FINAL")
-    calendario_registro = models.CharField(max_length=10, verbose_name="CALENDARIO")
+    # db_column conserva la columna de texto: los valores siguen siendo '2025A'
+    calendario_registro = models.ForeignKey(
+        Calendario, on_delete=models.PROTECT, db_column='calendario_registro', verbose_name="CALENDARIO"
+    )
     evidencia_url = models.URLField(max_length=500, null=True, blank=True, verbose_name="URL EVIDENCIA PRINCIPAL")
     protocolo_dictamen_url = models.URLField(max_length=500, null=True, blank=True, verbose_name="URL PROTOCOLO DICTAMINADO")
     participantes = models.ManyToManyField(Alumno, through='Participacion', verbose_name="PARTICIPANTES")
 
+    # Desnormalizados desde Participacion (ver projects/participantes.py); no se editan a mano
+    num_participantes = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True, verbose_name="NÚM. PARTICIPANTES")
+    representante = models.ForeignKey(
+        Alumno,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='proyectos_representados',
+        verbose_name="REPRESENTANTE"
+    )
+
     class Meta:
         verbose_name = "Proyecto Modular"
         verbose_name_plural = "Proyectos Modulares"
@@ -106,8 +186,8 @@ class Proyecto(models.Model):
             self.nivel_competencia = self.nivel_competencia.upper()
         if self.dictamen:
             self.dictamen = self.dictamen.upper()
-        if self.calendario_registro:
-            self.calendario_registro = self.calendario_registro.upper()
+        if self.calendario_registro_id:
+            self.calendario_registro_id = self.calendario_registro_id.upper()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -125,9 +205,93 @@ class Participacion(models.Model):
 
     class Meta:
         unique_together = ('proyecto', 'alumno')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['proyecto'],
+                condition=models.Q(es_representante=True),
+                name='participacion_un_representante',
+                violation_error_message="El proyecto ya tiene un representante.",
+            ),
+        ]
         verbose_name = "Participación en Proyecto"
         verbose_name_plural = "Participaciones en Proyectos"
 
+    def save(self, *args, **kwargs):
+        # Un solo representante por proyecto: el nuevo desplaza al anterior. Las
+        # PK degradadas quedan en la instancia para el registro de cambios
+        self._degradadas = []
+        if self.es_representante:
+            self._degradadas = list(
+                Participacion.objects.filter(proyecto_id=self.proyecto_id, es_representante=True)
+                .exclude(pk=self.pk).values_list('pk', flat=True)
+            )
+            if self._degradadas:
+                Participacion.objects.filter(pk__in=self._degradadas).update(es_representante=False)
+        super().save(*args, **kwargs)
+
+    def get_constraints(self):
+        # save() ya resuelve el conflicto de representante; no validarlo en los
+        # formularios permite cambiar de representante en una sola edición.
+        return [
+            (modelo, [c for c in restricciones if c.name != 'participacion_un_representante'])
+            for modelo, restricciones in super().get_constraints()
+        ]
+
     def __str__(self):
         rol = "REPRESENTANTE" if self.es_representante else "PARTICIPANTE"
         return f"{self.proyecto.folio} - {self.alumno.codigo_estudiante} ({rol})"
+
+# ====================================================================
+# 5. Índice de similitud de Formato1 (MinHash + LSH)
+# ====================================================================
+
+class FirmaFormato1(models.Model):
+    """Firma MinHash del texto de un Formato1 (ver projects/similitud.py)."""
+    formato1 = models.OneToOneField(Formato1, on_delete=models.CASCADE, primary_key=True, related_name='firma')
+    firma = models.BinaryField(verbose_name="FIRMA MINHASH")
+    huella_texto = models.CharField(max_length=40, verbose_name="HUELLA DEL TEXTO")
+    actualizado = models.DateTimeField(auto_now=True, verbose_name="ACTUALIZADO")
+
+    class Meta:
+        verbose_name = "Firma de Similitud"
+        verbose_name_plural = "Firmas de Similitud"
+
+    def __str__(self):
+        return f"Firma de {self.formato1_id}"
+
+
+class BandaLSH(models.Model):
+    """Hash de una banda de la firma; dos formatos con una banda igual son candidatos."""
+    formato1 = models.ForeignKey(Formato1, on_delete=models.CASCADE, related_name='bandas_lsh')
+    banda = models.PositiveSmallIntegerField(verbose_name="BANDA")
+    hash_banda = models.BigIntegerField(verbose_name="HASH DE BANDA")
+
+    class Meta:
+        verbose_name = "Banda LSH"
+        verbose_name_plural = "Bandas LSH"
+        indexes = [
+            models.Index(fields=['banda', 'hash_banda'], name='projects_banda_hash_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.formato1_id} banda {self.banda}"
+
+# ====================================================================
+# 6. Estado de las URLs de evidencia (revisor de enlaces)
+# ====================================================================
+
+class EstadoEnlace(models.Model):
+    """Resultado de la última revisión de una URL de evidencia o protocolo."""
+    url = models.URLField(max_length=500, unique=True, verbose_name="URL")
+    ok = models.BooleanField(null=True, verbose_name="ENLACE VÁLIDO")
+    codigo_http = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="CÓDIGO HTTP")
+    longitud = models.BigIntegerField(null=True, blank=True, verbose_name="TAMAÑO (BYTES)")
+    error = models.CharField(max_length=200, blank=True, default='', verbose_name="ERROR")
+    revisado = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="ÚLTIMA REVISIÓN")
+
+    class Meta:
+        verbose_name = "Estado de Enlace"
+        verbose_name_plural = "Estados de Enlaces"
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,90 @@
+"""
+Campos desnormalizados de Proyecto a partir de Participacion:
+`num_participantes` y `representante`.
+
+Se recalculan con un UPDATE de subconsultas correlacionadas (una sola
+sentencia para cualquier cantidad de proyectos). Las señales de
+Participacion actualizan el proyecto afectado; las operaciones masivas
+(importación, fusión de duplicados, restauración de archivo) usan
+`diferido()` o llaman a `recalcular()` al terminar.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+
+from ProyectoSIGAP.cache import invalidar_modelo
+from registration import cambios
+from .models import Proyecto, Participacion
+
+# Folios pendientes de recalcular dentro de un bloque `diferido()`
+_pendientes = contextvars.ContextVar('participantes_pendientes', default=None)
+
+
+def _valores():
+    conteo = (
+        Participacion.objects.filter(proyecto=OuterRef('pk'))
+        .order_by().values('proyecto').annotate(total=Count('pk')).values('total')
+    )
+    representante = (
+        Participacion.objects.filter(proyecto=OuterRef('pk'), es_representante=True)
+        .order_by('alumno_id').values('alumno_id')[:1]
+    )
+    return {
+        'num_participantes': Coalesce(Subquery(conteo), 0),
+        'representante': Subquery(representante),
+    }
+
+
+def recalcular(folios=None, calendario=None):
+    """Recalcula los campos en un solo UPDATE. Sin filtros, para todos los proyectos."""
+    proyectos = Proyecto.objects.all()
+    if folios is not None:
+        folios = list(folios)
+        if not folios:
+            return 0
+        proyectos = proyectos.filter(pk__in=folios)
+    if calendario:
+        proyectos = proyectos.filter(calendario_registro=calendario.upper())
+    with transaction.atomic():
+        actualizados = proyectos.update(**_valores())
+        if folios is not None:
+            # Recálculo puntual tras cambiar participaciones; los recálculos completos
+            # (comando, restauración) no alteran datos que el consumidor no tenga ya
+            cambios.registrar(Proyecto, folios)
+    invalidar_modelo(Proyecto)
+    return actualizados
+
+
+@contextmanager
+def diferido():
+    """Acumula los proyectos tocados en el bloque y los recalcula una vez al final."""
+    if _pendientes.get() is not None:
+        # Ya dentro de otro bloque: ese recalculará al terminar
+        yield
+        return
+    folios = set()
+    token = _pendientes.set(folios)
+    try:
+        yield
+    finally:
+        _pendientes.reset(token)
+    recalcular(folios)
+
+
+def _al_cambiar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pendientes = _pendientes.get()
+    if pendientes is not None:
+        pendientes.add(instance.proyecto_id)
+    else:
+        recalcular([instance.proyecto_id])
+
+
+def conectar():
+    post_save.connect(_al_cambiar, sender=Participacion, dispatch_uid='participantes_al_guardar')
+    post_delete.connect(_al_cambiar, sender=Participacion, dispatch_uid='participantes_al_borrar')
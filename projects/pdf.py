@@ -0,0 +1,113 @@
+"""
+Escritor mínimo de PDF de solo texto (sin dependencias externas).
+
+Suficiente para dictámenes y constancias: tamaño carta, Helvetica con
+codificación WinAnsi (acentos y ñ), ajuste de línea y varias páginas.
+Las líneas que empiezan con '# ' se escriben como título en negritas.
+"""
+import os
+import textwrap
+
+ANCHO_PAGINA, ALTO_PAGINA = 612, 792  # carta, en puntos
+MARGEN = 72
+TAMANO_TEXTO, INTERLINEA = 11, 15
+TAMANO_TITULO, INTERLINEA_TITULO = 14, 22
+# Caracteres por línea para texto mayormente en mayúsculas a 11 pt
+CARACTERES_POR_LINEA = 72
+CARACTERES_POR_TITULO = 55
+
+
+def _escapar(texto):
+    datos = texto.encode('cp1252', errors='replace')
+    return datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _lineas(texto):
+    """(es_titulo, línea) ya ajustadas al ancho de la página."""
+    for parrafo in texto.splitlines():
+        titulo = parrafo.startswith('# ')
+        if titulo:
+            parrafo = parrafo[2:]
+        ancho = CARACTERES_POR_TITULO if titulo else CARACTERES_POR_LINEA
+        partes = textwrap.wrap(parrafo, ancho) or ['']
+        for parte in partes:
+            yield titulo, parte
+
+
+def _paginas(texto):
+    paginas, actual = [], []
+    y = ALTO_PAGINA - MARGEN
+    for titulo, linea in _lineas(texto):
+        alto = INTERLINEA_TITULO if titulo else INTERLINEA
+        if y - alto < MARGEN and actual:
+            paginas.append(actual)
+            actual, y = [], ALTO_PAGINA - MARGEN
+        y -= alto
+        actual.append((titulo, y, linea))
+    paginas.append(actual)
+    return paginas
+
+
+def _contenido(lineas):
+    partes = [b'BT']
+    for titulo, y, linea in lineas:
+        fuente = b'/F2 %d Tf' % TAMANO_TITULO if titulo else b'/F1 %d Tf' % TAMANO_TEXTO
+        partes.append(fuente + b' 1 0 0 1 %d %d Tm (' % (MARGEN, y) + _escapar(linea) + b') Tj')
+    partes.append(b'ET')
+    return b'\n'.join(partes)
+
+
+def generar_pdf(texto, titulo=''):
+    """Devuelve los bytes de un PDF con `texto` (las líneas se ajustan solas)."""
+    objetos = []
+
+    def agregar(cuerpo):
+        objetos.append(cuerpo)
+        return len(objetos)
+
+    catalogo = agregar(None)
+    raiz_paginas = agregar(None)
+    fuente = agregar(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    fuente_negrita = agregar(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    recursos = b'<< /Font << /F1 %d 0 R /F2 %d 0 R >> >>' % (fuente, fuente_negrita)
+
+    hojas = []
+    for lineas in _paginas(texto):
+        contenido = _contenido(lineas)
+        flujo = agregar(b'<< /Length %d >>\nstream\n' % len(contenido) + contenido + b'\nendstream')
+        hojas.append(agregar(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>'
+            % (raiz_paginas, ANCHO_PAGINA, ALTO_PAGINA, recursos, flujo)
+        ))
+    objetos[raiz_paginas - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % h for h in hojas), len(hojas))
+    objetos[catalogo - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % raiz_paginas
+    informacion = agregar(b'<< /Title (' + _escapar(titulo) + b') /Producer (SIGAP) >>')
+
+    salida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    posiciones = []
+    for numero, cuerpo in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += b'%d 0 obj\n' % numero + cuerpo + b'\nendobj\n'
+    inicio_xref = len(salida)
+    salida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+    for posicion in posiciones:
+        salida += b'%010d 00000 n \n' % posicion
+    salida += b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objetos) + 1, catalogo, informacion, inicio_xref)
+    return bytes(salida)
+
+
+def escribir_lote(destino, lote):
+    """
+    Genera y escribe en `destino` cada (nombre, titulo, texto) del lote.
+    Pensada para ejecutarse en un proceso del pool de projects/documentos.py.
+    """
+    for nombre, titulo, texto in lote:
+        ruta = os.path.join(destino, nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            f.write(generar_pdf(texto, titulo))
+        os.replace(temporal, ruta)
+    return len(lote)
@@ -0,0 +1,257 @@
+"""
+Detección de propuestas casi duplicadas en Formato1 con MinHash + LSH.
+
+Cada Formato1 se reduce a un conjunto de "shingles" (trigramas de palabras
+de introducción, justificación, objetivo y resumen) y a una firma MinHash
+de NUM_PERMUTACIONES enteros. La fracción de posiciones iguales entre dos
+firmas estima la similitud de Jaccard de sus textos.
+
+Para no comparar todos contra todos, la firma se parte en NUM_BANDAS
+bandas de FILAS_POR_BANDA valores; cada banda se guarda hasheada en
+BandaLSH. Solo los formatos que comparten al menos una banda se comparan
+(umbral aproximado (1/b)^(1/r) ≈ 0.42 con 32 bandas de 4 filas).
+
+NumPy se importa dentro de las funciones (ver registration/importador.py).
+"""
+import hashlib
+import re
+import zlib
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import post_save
+
+from .models import Formato1, FirmaFormato1, BandaLSH
+
+NUM_PERMUTACIONES = 128
+NUM_BANDAS = 32
+FILAS_POR_BANDA = NUM_PERMUTACIONES // NUM_BANDAS
+TAMANO_SHINGLE = 3
+PRIMO = 4294967311  # primo > 2^32 para el hash universal (a*x + b) mod p
+SEMILLA = 20240101  # fija: cambiarla invalida todas las firmas guardadas
+
+CAMPOS_TEXTO = ('introduccion', 'justificacion', 'objetivo', 'resumen')
+
+_PALABRA = re.compile(r'\w+')
+_coeficientes = None
+
+
+def _permutaciones():
+    global _coeficientes
+    if _coeficientes is None:
+        import numpy as np
+        generador = np.random.default_rng(SEMILLA)
+        a = generador.integers(1, 2 ** 32, size=NUM_PERMUTACIONES, dtype=np.uint64)
+        b = generador.integers(0, 2 ** 32, size=NUM_PERMUTACIONES, dtype=np.uint64)
+        _coeficientes = (a, b)
+    return _coeficientes
+
+
+def texto_formato(formato1):
+    return ' '.join(getattr(formato1, campo) or '' for campo in CAMPOS_TEXTO).upper()
+
+
+def huella(texto):
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def shingles(texto):
+    palabras = _PALABRA.findall(texto)
+    if len(palabras) < TAMANO_SHINGLE:
+        return {zlib.crc32(' '.join(palabras).encode('utf-8'))} if palabras else set()
+    return {
+        zlib.crc32(' '.join(palabras[i:i + TAMANO_SHINGLE]).encode('utf-8'))
+        for i in range(len(palabras) - TAMANO_SHINGLE + 1)
+    }
+
+
+def calcular_firma(texto):
+    """Devuelve la firma MinHash como arreglo uint32 (None si el texto está vacío)."""
+    import numpy as np
+
+    conjunto = shingles(texto)
+    if not conjunto:
+        return None
+    a, b = _permutaciones()
+    valores = np.fromiter(conjunto, dtype=np.uint64, count=len(conjunto))
+    # matriz permutaciones x shingles; a*x < 2^64 porque ambos son < 2^32
+    hashes = (np.outer(a, valores) + b[:, None]) % PRIMO
+    return (hashes.min(axis=1) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def firma_desde_bytes(datos):
+    import numpy as np
+    return np.frombuffer(bytes(datos), dtype=np.uint32)
+
+
+def hashes_bandas(firma):
+    """Hash de 63 bits (con signo, para BigIntegerField) de cada banda de la firma."""
+    resultado = []
+    for banda in range(NUM_BANDAS):
+        trozo = firma[banda * FILAS_POR_BANDA:(banda + 1) * FILAS_POR_BANDA].tobytes()
+        digest = hashlib.blake2b(trozo, digest_size=8, person=banda.to_bytes(2, 'big')).digest()
+        resultado.append(int.from_bytes(digest, 'big', signed=True))
+    return resultado
+
+
+def similitud_estimada(firma_a, firma_b):
+    return float((firma_a == firma_b).mean())
+
+
+# ====================================================================
+# Mantenimiento del índice
+# ====================================================================
+
+def indexar(formato1, forzar=False):
+    """Calcula y guarda firma y bandas de un Formato1 si su texto cambió."""
+    texto = texto_formato(formato1)
+    nueva_huella = huella(texto)
+    if not forzar and FirmaFormato1.objects.filter(formato1=formato1, huella_texto=nueva_huella).exists():
+        return False
+
+    firma = calcular_firma(texto)
+    with transaction.atomic():
+        BandaLSH.objects.filter(formato1=formato1).delete()
+        if firma is None:
+            FirmaFormato1.objects.filter(formato1=formato1).delete()
+            return True
+        FirmaFormato1.objects.update_or_create(
+            formato1=formato1,
+            defaults={'firma': firma.tobytes(), 'huella_texto': nueva_huella},
+        )
+        BandaLSH.objects.bulk_create([
+            BandaLSH(formato1=formato1, banda=banda, hash_banda=valor)
+            for banda, valor in enumerate(hashes_bandas(firma))
+        ])
+    return True
+
+
+def indexar_lote(formatos, forzar=False, lote=2000):
+    """
+    indexar() por conjuntos para cargas masivas: una consulta para saber qué
+    textos cambiaron, un DELETE de sus bandas y un INSERT de firmas y bandas.
+    Devuelve cuántos formatos se indexaron.
+    """
+    textos = {f.pk: texto_formato(f) for f in formatos}
+    huellas = {folio: huella(texto) for folio, texto in textos.items()}
+    if not forzar:
+        for folio, guardada in FirmaFormato1.objects.filter(formato1_id__in=huellas).values_list('formato1_id', 'huella_texto'):
+            if huellas[folio] == guardada:
+                del huellas[folio]
+    if not huellas:
+        return 0
+
+    firmas, bandas, vacios = [], [], []
+    for folio, nueva_huella in huellas.items():
+        firma = calcular_firma(textos[folio])
+        if firma is None:
+            vacios.append(folio)
+            continue
+        firmas.append(FirmaFormato1(formato1_id=folio, firma=firma.tobytes(), huella_texto=nueva_huella))
+        bandas.extend(
+            BandaLSH(formato1_id=folio, banda=banda, hash_banda=valor)
+            for banda, valor in enumerate(hashes_bandas(firma))
+        )
+    with transaction.atomic():
+        BandaLSH.objects.filter(formato1_id__in=huellas).delete()
+        FirmaFormato1.objects.filter(formato1_id__in=vacios).delete()
+        FirmaFormato1.objects.bulk_create(
+            firmas, batch_size=lote, update_conflicts=True,
+            unique_fields=['formato1'], update_fields=['firma', 'huella_texto', 'actualizado'],
+        )
+        BandaLSH.objects.bulk_create(bandas, batch_size=lote)
+    return len(huellas)
+
+
+def _indexar_al_guardar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexar(instance)
+
+
+def conectar():
+    post_save.connect(_indexar_al_guardar, sender=Formato1, dispatch_uid='similitud_indexar_formato1')
+
+
+# ====================================================================
+# Consultas
+# ====================================================================
+
+def similares(formato1, limite=10, minimo=0.3, solo_anteriores=True):
+    """
+    Formatos más parecidos a `formato1`: lista de (Formato1, similitud) ordenada.
+    Con `solo_anteriores` se excluyen calendarios posteriores al del proyecto.
+    """
+    try:
+        propia = firma_desde_bytes(formato1.firma.firma)
+    except FirmaFormato1.DoesNotExist:
+        return []
+
+    filtro = Q()
+    for banda, valor in enumerate(hashes_bandas(propia)):
+        filtro |= Q(banda=banda, hash_banda=valor)
+    candidatos = (
+        BandaLSH.objects.filter(filtro)
+        .exclude(formato1_id=formato1.pk)
+        .values_list('formato1_id', flat=True)
+    )
+    if solo_anteriores and hasattr(formato1, 'proyecto'):
+        candidatos = candidatos.filter(
+            formato1__proyecto__calendario_registro__lte=formato1.proyecto.calendario_registro_id
+        )
+    # Los que comparten más bandas primero; se verifican con la firma completa
+    folios = [folio for folio, _ in Counter(candidatos).most_common(limite * 5)]
+
+    resultado = []
+    for firma in FirmaFormato1.objects.filter(formato1_id__in=folios).select_related('formato1__proyecto'):
+        valor = similitud_estimada(propia, firma_desde_bytes(firma.firma))
+        if valor >= minimo:
+            resultado.append((firma.formato1, valor))
+    resultado.sort(key=lambda x: -x[1])
+    return resultado[:limite]
+
+
+def pares_calendario(calendario, minimo=0.5):
+    """
+    Pares (folio_a, folio_b, similitud) donde folio_a es del calendario y folio_b
+    es cualquier formato (del mismo calendario o de uno anterior) que colisiona
+    en alguna banda. Solo lee las bandas que colisionan con las del calendario.
+    """
+    del_calendario = BandaLSH.objects.filter(
+        formato1__proyecto__calendario_registro=calendario,
+        banda=OuterRef('banda'), hash_banda=OuterRef('hash_banda'),
+    )
+    cubetas = defaultdict(set)
+    for folio, banda, valor in (
+        BandaLSH.objects.filter(Exists(del_calendario))
+        .values_list('formato1_id', 'banda', 'hash_banda').iterator(chunk_size=5000)
+    ):
+        cubetas[(banda, valor)].add(folio)
+
+    propios = set(
+        Formato1.objects.filter(proyecto__calendario_registro=calendario).values_list('folio', flat=True)
+    )
+    candidatos = set()
+    for folios in cubetas.values():
+        for folio_a in folios & propios:
+            for folio_b in folios:
+                if folio_a != folio_b and not (folio_b in propios and folio_b < folio_a):
+                    candidatos.add((folio_a, folio_b))
+
+    involucrados = {f for par in candidatos for f in par}
+    firmas, calendarios = {}, {}
+    for folio, datos, calendario_folio in (
+        FirmaFormato1.objects.filter(formato1_id__in=involucrados)
+        .values_list('formato1_id', 'firma', 'formato1__proyecto__calendario_registro')
+    ):
+        firmas[folio] = firma_desde_bytes(datos)
+        calendarios[folio] = calendario_folio or ''
+
+    pares = []
+    for folio_a, folio_b in candidatos:
+        if folio_a in firmas and folio_b in firmas and calendarios[folio_b] <= calendario:
+            valor = similitud_estimada(firmas[folio_a], firmas[folio_b])
+            if valor >= minimo:
+                pares.append((folio_a, folio_b, valor))
+    pares.sort(key=lambda x: -x[2])
+    return pares
@@ -1,3 +1,599 @@
-from django.test import TestCase
+import asyncio
+import io
+import importlib.util
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock, skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from evaluation.models import Evaluaciones
+from people.models import Alumno, Asesor, Evaluador
+from ProyectoSIGAP.pruebas import AJUSTES_PRUEBAS, PruebaMigracion
+from registration import cambios
+from registration.models import Cambio
+from . import archivo, asignacion, documentos, enlaces, masivo, similitud
+from .admin import LARGO_RESUMEN_TEXTO, TAMANO_PAGINA_HISTORIAL
+from .models import BandaLSH, Calendario, FirmaFormato1, Formato1, Participacion, Prorroga, Proyecto
+
+
+def _proyecto(folio, calendario='2023A', alumno=None):
+    formato = Formato1.objects.create(folio=folio, introduccion='I', justificacion='J', objetivo='O', resumen='R')
+    proyecto = Proyecto.objects.create(
+        folio=folio, titulo=f'Titulo {folio}', modalidad='PROTOTIPO',
+        calendario_registro_id=calendario, formato1=formato,
+    )
+    if alumno is not None:
+        Participacion.objects.create(proyecto=proyecto, alumno=alumno, es_representante=True)
+    return proyecto
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class ArchivoTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(RUTA_ARCHIVO=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        Calendario.asegurar(['2023A', '2024A'])
+        self.alumno = Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Alumno Uno')
+        Asesor.objects.create(codigo_asesor='A1', nombre_completo='Asesor', correo_electronico='a@example.com')
+        for numero in range(3):
+            _proyecto(f'P{numero}-2023A', alumno=self.alumno)
+        _proyecto('P0-2024A', calendario='2024A', alumno=self.alumno)
+
+    def test_elimina_solo_lo_archivado(self):
+        archivo.exportar('2023A', lote=2)
+        eliminados = archivo.eliminar_vivos('2023A', lote=2)
+
+        self.assertEqual(eliminados['projects.proyecto'], 3)
+        self.assertEqual(eliminados['projects.formato1'], 3)
+        self.assertEqual(eliminados['projects.participacion'], 3)
+        self.assertFalse(Proyecto.objects.filter(calendario_registro='2023A').exists())
+        self.assertTrue(Proyecto.objects.filter(pk='P0-2024A').exists())
+        self.assertTrue(Alumno.objects.filter(pk=self.alumno.pk).exists())
+
+        archivo.restaurar('2023A')
+        self.assertEqual(Participacion.objects.filter(proyecto__calendario_registro='2023A').count(), 3)
+
+    @override_settings(CAMBIOS_ACTIVOS=True)
+    def test_cambios_se_escriben_una_vez_por_lote(self):
+        archivo.exportar('2023A', lote=2)
+        primer_lote = Participacion.objects.filter(proyecto_id__in=['P0-2023A', 'P1-2023A'])
+        esperadas = {('projects.proyecto', 'P0-2023A'), ('projects.proyecto', 'P1-2023A')}
+        esperadas |= {('projects.participacion', str(pk)) for pk in primer_lote.values_list('pk', flat=True)}
+
+        with mock.patch.object(cambios, '_escribir', wraps=cambios._escribir) as escribir:
+            archivo.eliminar_vivos('2023A', lote=2)
+        # Una escritura con las bajas de cada lote de proyectos (2 + 1)
+        bajas = [
+            {llave for llave, operacion in llamada.args[0].items() if operacion == Cambio.BAJA}
+            for llamada in escribir.call_args_list
+        ]
+        bajas = [b for b in bajas if b]
+        self.assertEqual(len(bajas), 2)
+        self.assertEqual(bajas[0], esperadas)
+
+    def test_aborta_si_hay_filas_nuevas_despues_de_exportar(self):
+        archivo.exportar('2023A')
+        Evaluaciones.objects.create(proyecto_id='P1-2023A', resolutivo='APROBADO', observaciones='Nueva')
+
+        with self.assertRaisesMessage(archivo.ErrorArchivo, 'cambió desde la exportación'):
+            archivo.eliminar_vivos('2023A')
+        self.assertEqual(Proyecto.objects.filter(calendario_registro='2023A').count(), 3)
+        self.assertEqual(Evaluaciones.objects.count(), 1)
+
+    def test_aborta_si_falta_algo_archivado(self):
+        archivo.exportar('2023A')
+        _proyecto('P9-2023A')
+
+        with self.assertRaises(archivo.ErrorArchivo):
+            archivo.eliminar_vivos('2023A')
+        self.assertEqual(Proyecto.objects.filter(calendario_registro='2023A').count(), 4)
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class DocumentosTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(RUTA_PROCESADOS=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        Calendario.asegurar(['2023A'])
+        alumno = Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Alumno Uno')
+        for numero in range(5):
+            proyecto = _proyecto(f'P{numero}-2023A', alumno=alumno)
+            Evaluaciones.objects.create(proyecto=proyecto, resolutivo='APROBADO', tipo_revision='FINAL', observaciones='')
+
+    def test_lotes_por_folio_cubren_el_calendario(self):
+        generados, sin_cambios = documentos.generar('2023A', procesos=1, lote=2)
+        manifiesto = documentos.leer_manifiesto(documentos.ruta_documentos('2023A'))
+        esperados = {d.nombre: d.huella for d in documentos.preparar('2023A')}
+
+        self.assertEqual((generados, sin_cambios), (len(esperados), 0))
+        self.assertEqual(manifiesto, esperados)
+        self.assertEqual(documentos.generar('2023A', procesos=1, lote=3), (0, len(esperados)))
+
+    def test_manifiesto_se_lee_una_vez_y_se_reparte_por_lote(self):
+        documentos.generar('2023A', procesos=1, lote=2)
+        with mock.patch.object(documentos, 'leer_manifiesto', wraps=documentos.leer_manifiesto) as leer, \
+                mock.patch.object(documentos, 'procesar_folios', wraps=documentos.procesar_folios) as procesar:
+            self.assertEqual(documentos.generar('2023A', procesos=1, lote=2), (0, 10))
+
+        self.assertEqual(leer.call_count, 1)
+        for llamada in procesar.call_args_list:
+            folios, anterior = llamada.args[1], llamada.args[2]
+            self.assertEqual(
+                sorted(anterior),
+                sorted(d.nombre for d in documentos.preparar('2023A', folios=folios)),
+            )
+
+    def test_consultas_constantes(self):
+        # Proyectos (con asesor, evaluador y calendario), evaluaciones finales y participaciones
+        with self.assertNumQueries(3):
+            documentos.preparar('2023A')
+
+
+class _Servidor(ThreadingHTTPServer):
+    # Cola de conexiones suficiente para la prueba de concurrencia
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    """
+    /ok 200, /falta 404, /redirige 302 -> /ok, /lento tarda más que el timeout,
+    /espera/<n> tarda 0.5 s; las rutas en `caidas` responden 404.
+    """
+    caidas = set()
+
+    def _responder(self, cuerpo=True):
+        if self.path == '/falta' or self.path in self.caidas:
+            self.send_response(404)
+        elif self.path == '/redirige':
+            self.send_response(302)
+            self.send_header('Location', '/ok')
+        else:
+            if self.path == '/lento':
+                time.sleep(2)
+            elif self.path.startswith('/espera/'):
+                time.sleep(0.5)
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+        self.end_headers()
+        if cuerpo and self.path != '/redirige':
+            self.wfile.write(b'ok')
+
+    def do_HEAD(self):
+        self._responder(cuerpo=False)
+
+    def do_GET(self):
+        self._responder()
+
+    def log_message(self, *args):
+        pass
+
+
+class _ConServidor:
+    """Levanta el servidor HTTP de prueba (_Manejador) para toda la clase."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = _Servidor(('127.0.0.1', 0), _Manejador)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+
+class RevisorEnlacesTests(_ConServidor, SimpleTestCase):
+
+    def test_codigos(self):
+        urls = {nombre: f'{self.base}/{nombre}' for nombre in ('ok', 'falta', 'redirige', 'lento')}
+        resultados = asyncio.run(enlaces.revisar_lote(list(urls.values()), por_host=4, intervalo=0, timeout=0.5))
+
+        self.assertEqual(resultados[urls['ok']], {'codigo_http': 200, 'longitud': 2, 'error': ''})
+        self.assertEqual(resultados[urls['falta']]['codigo_http'], 404)
+        self.assertEqual(resultados[urls['redirige']]['codigo_http'], 200)
+        self.assertIsNone(resultados[urls['lento']]['codigo_http'])
+        self.assertIn('timed out', resultados[urls['lento']]['error'])
+
+    def test_concurrencia_mayor_que_el_ejecutor_por_omision(self):
+        # 64 peticiones de 0.5 s con concurrencia 64 terminan en una sola tanda
+        urls = [f'{self.base}/espera/{n}' for n in range(64)]
+        inicio = time.perf_counter()
+        resultados = asyncio.run(enlaces.revisar_lote(urls, concurrencia=64, por_host=64, intervalo=0, timeout=5))
+        self.assertTrue(all(r['codigo_http'] == 200 for r in resultados.values()))
+        self.assertLess(time.perf_counter() - inicio, 0.95)
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class EstadoEnlacesChangelistTests(_ConServidor, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(_Manejador.caidas.clear)
+        Calendario.asegurar(['2023A'])
+        # Más de una página: con una sola el changelist no pasa por el paginador
+        folios = [f'P{numero:03d}-2023A' for numero in range(120)]
+        Formato1.objects.bulk_create(
+            Formato1(folio=f, introduccion='I', justificacion='J', objetivo='O', resumen='R') for f in folios
+        )
+        Proyecto.objects.bulk_create(
+            Proyecto(folio=f, titulo=f, modalidad='PROTOTIPO', calendario_registro_id='2023A', formato1_id=f)
+            for f in folios
+        )
+        # Primera fila del listado (orden por folio descendente)
+        Proyecto.objects.filter(folio='P119-2023A').update(evidencia_url=f'{self.base}/evidencia')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def _estado(self):
+        contenido = self.client.get('/admin/projects/proyecto/').content.decode()
+        return re.search(r'title="Evidencia / Protocolo">(\S+) /', contenido).group(1)
+
+    def test_revisar_invalida_el_listado_cacheado(self):
+        enlaces.revisar(timedelta(0), intervalo=0, timeout=2)
+        self.assertEqual(self._estado(), '✅')
+        self.assertEqual(self._estado(), '✅')  # Ya desde la caché
+
+        _Manejador.caidas.add('/evidencia')
+        enlaces.revisar(timedelta(0), intervalo=0, timeout=2)
+        self.assertEqual(self._estado(), '❌')
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class AsignacionTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A'])
+        self.asesor = Asesor.objects.create(codigo_asesor='A1', nombre_completo='Ana Pérez', correo_electronico='ana@example.com')
+        self.alumno = Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Beto Ruiz')
+        Evaluador.objects.create(codigo_evaluador='E1', nombre_completo='Ana Perez', correo_evaluador='e1@example.com', especializacion='Prototipo')
+        Evaluador.objects.create(codigo_evaluador='E2', nombre_completo='Carla Díaz', correo_evaluador='beto@example.com', especializacion='Prototipo')
+        Evaluador.objects.create(codigo_evaluador='E3', nombre_completo='Dora Gil', correo_evaluador='e3@example.com', especializacion='Software')
+
+    def _evaluadores(self):
+        return dict(Proyecto.objects.filter(calendario_registro='2023A').values_list('folio', 'evaluador_id'))
+
+    def test_excluye_al_asesor_y_a_los_participantes(self):
+        self.alumno.correo_electronico = 'beto@example.com'
+        self.alumno.save()
+        proyecto = _proyecto('P1-2023A', alumno=self.alumno)
+        proyecto.asesor = self.asesor
+        proyecto.save()
+
+        asignaciones, sin_asignar = asignacion.planear('2023a')
+        # E1 es la asesora (mismo nombre sin acentos), E2 comparte correo con el alumno
+        self.assertEqual([(a.folio, a.codigo_evaluador) for a in asignaciones], [('P1-2023A', 'E3')])
+        self.assertFalse(asignaciones[0].especialidad_coincide)
+        self.assertEqual(sin_asignar, [])
+
+    def test_respeta_el_maximo_y_reporta_los_sin_asignar(self):
+        for numero in range(5):
+            _proyecto(f'P{numero}-2023A')
+        ya_asignado = _proyecto('P9-2023A')
+        ya_asignado.evaluador_id = 'E1'
+        ya_asignado.save()
+
+        asignaciones, sin_asignar = asignacion.planear('2023A', maximo=2)
+        carga = Counter(a.codigo_evaluador for a in asignaciones)
+        # E1 ya tenía uno: solo admite uno más
+        self.assertEqual(carga, {'E1': 1, 'E2': 2, 'E3': 2})
+        self.assertEqual(len(sin_asignar), 0)
+
+        asignaciones, sin_asignar = asignacion.planear('2023A', maximo=1)
+        self.assertEqual(Counter(a.codigo_evaluador for a in asignaciones), {'E2': 1, 'E3': 1})
+        self.assertEqual(len(sin_asignar), 3)
+        self.assertEqual(self._evaluadores()['P0-2023A'], None)  # planear no escribe
+
+    def test_aplicar_escribe_en_un_solo_update_y_respeta_asignaciones_manuales(self):
+        for numero in range(4):
+            _proyecto(f'P{numero}-2023A')
+        asignaciones, _ = asignacion.planear('2023A')
+        # Alguien asigna a mano entre el plan y la escritura
+        Proyecto.objects.filter(pk='P0-2023A').update(evaluador_id='E3')
+
+        with mock.patch.object(Proyecto.objects, 'bulk_update', wraps=Proyecto.objects.bulk_update) as bulk:
+            escritos = asignacion.aplicar(asignaciones)
+
+        self.assertEqual(bulk.call_count, 1)
+        self.assertEqual(escritos, 3)
+        esperado = {a.folio: a.codigo_evaluador for a in asignaciones}
+        esperado['P0-2023A'] = 'E3'
+        self.assertEqual(self._evaluadores(), esperado)
+        self.assertEqual(
+            set(Cambio.objects.filter(modelo='projects.proyecto', operacion=Cambio.MODIFICACION)
+                .values_list('clave', flat=True)),
+            {'P1-2023A', 'P2-2023A', 'P3-2023A'},
+        )
+
+
+def _texto(inicio, sustituidas=()):
+    """Sesenta palabras consecutivas; las posiciones `sustituidas` llevan otra palabra."""
+    palabras = [f'termino{numero}' for numero in range(inicio, inicio + 60)]
+    for posicion in sustituidas:
+        palabras[posicion] = f'distinto{posicion}'
+    return ' '.join(palabras)
+
+
+@skipUnless(importlib.util.find_spec('numpy'), "numpy no está instalado")
+@override_settings(**AJUSTES_PRUEBAS)
+class SimilitudTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A', '2024A'])
+        self._formato('BASE-2023A', '2023A', _texto(0))
+        self._formato('CASI-2023A', '2023A', _texto(0, sustituidas=(30,)))
+        self._formato('OTRO-2023A', '2023A', _texto(1000))
+        self._formato('COPIA-2024A', '2024A', _texto(0))
+
+    def _formato(self, folio, calendario, texto):
+        formato = Formato1.objects.create(folio=folio, introduccion=texto, justificacion='', objetivo='', resumen='')
+        Proyecto.objects.create(
+            folio=folio, titulo=folio, modalidad='PROTOTIPO', calendario_registro_id=calendario, formato1=formato,
+        )
+        return formato
+
+    def _bandas(self, folio):
+        return set(BandaLSH.objects.filter(formato1_id=folio).values_list('banda', 'hash_banda'))
+
+    def test_firma_estable(self):
+        firma = similitud.calcular_firma(_texto(0))
+        self.assertEqual((firma.dtype.name, len(firma)), ('uint32', similitud.NUM_PERMUTACIONES))
+
+        # Las permutaciones salen de la semilla fija: recalcularlas da la misma firma
+        with mock.patch.object(similitud, '_coeficientes', None):
+            self.assertEqual(similitud.calcular_firma(_texto(0)).tobytes(), firma.tobytes())
+        guardada = FirmaFormato1.objects.select_related('formato1').get(pk='BASE-2023A')
+        self.assertEqual(
+            bytes(guardada.firma), similitud.calcular_firma(similitud.texto_formato(guardada.formato1)).tobytes()
+        )
+        self.assertEqual(len(similitud.hashes_bandas(firma)), similitud.NUM_BANDAS)
+        self.assertIsNone(similitud.calcular_firma('   '))
+
+    def test_candidatos_por_banda(self):
+        base = self._bandas('BASE-2023A')
+        self.assertEqual(len(base), similitud.NUM_BANDAS)
+        self.assertEqual(self._bandas('COPIA-2024A'), base)
+        self.assertTrue(self._bandas('CASI-2023A') & base)
+        self.assertFalse(self._bandas('OTRO-2023A') & base)
+
+    def test_similares_respeta_umbral_y_calendario(self):
+        base = Formato1.objects.select_related('proyecto').get(pk='BASE-2023A')
+
+        resultado = {f.folio: valor for f, valor in similitud.similares(base, minimo=0.5)}
+        # COPIA es de un calendario posterior; OTRO no comparte bandas
+        self.assertEqual(set(resultado), {'CASI-2023A'})
+        self.assertGreater(resultado['CASI-2023A'], 0.8)
+
+        todos = {f.folio for f, _ in similitud.similares(base, minimo=0.5, solo_anteriores=False)}
+        self.assertEqual(todos, {'CASI-2023A', 'COPIA-2024A'})
+        self.assertEqual(similitud.similares(base, minimo=1.0), [])
+
+    def test_pares_calendario(self):
+        pares = similitud.pares_calendario('2023A', minimo=0.5)
+        self.assertEqual([(a, b) for a, b, _ in pares], [('BASE-2023A', 'CASI-2023A')])
+
+        # Del calendario posterior se compara contra los anteriores, una vez por par
+        pares = {(a, b): valor for a, b, valor in similitud.pares_calendario('2024A', minimo=0.5)}
+        self.assertEqual(set(pares), {('COPIA-2024A', 'BASE-2023A'), ('COPIA-2024A', 'CASI-2023A')})
+        self.assertEqual(pares[('COPIA-2024A', 'BASE-2023A')], 1.0)
+        self.assertEqual(similitud.pares_calendario('2024A', minimo=1.01), [])
+
+    def test_comando_indexa_por_lotes(self):
+        FirmaFormato1.objects.all().delete()
+        BandaLSH.objects.all().delete()
+        salida = io.StringIO()
+        with mock.patch.object(similitud, 'indexar_lote', wraps=similitud.indexar_lote) as lote, \
+                mock.patch.object(similitud, 'indexar') as individual:
+            call_command('indexar_formatos', lote=3, stdout=salida)
+            call_command('indexar_formatos', lote=3, stdout=salida)
+
+        self.assertEqual(lote.call_count, 4)
+        individual.assert_not_called()
+        self.assertEqual(salida.getvalue().split('\n')[:2], ['4 formatos indexados.', '0 formatos indexados.'])
+        self.assertEqual(BandaLSH.objects.count(), 4 * similitud.NUM_BANDAS)
+
+    def test_vista_de_similares_exige_permiso(self):
+        url = '/admin/projects/formato1/BASE-2023A/similares/'
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'CASI-2023A')
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class ParticipantesTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A'])
+        self.alumnos = [
+            Alumno.objects.create(codigo_estudiante=f'00000000{n}', nombre_completo=f'Alumno {n}') for n in range(1, 4)
+        ]
+        self.proyecto = _proyecto('P1-2023A', alumno=self.alumnos[0])
+
+    def test_un_solo_representante_por_proyecto(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Participacion.objects.bulk_create([
+                Participacion(proyecto=self.proyecto, alumno=self.alumnos[1], es_representante=True),
+            ])
+        # Las participaciones sin representación no chocan con la restricción
+        Participacion.objects.bulk_create([
+            Participacion(proyecto=self.proyecto, alumno=alumno) for alumno in self.alumnos[1:]
+        ])
+
+    def test_save_cambia_el_representante_y_los_campos_desnormalizados(self):
+        Participacion.objects.create(proyecto=self.proyecto, alumno=self.alumnos[1])
+        self.proyecto.refresh_from_db()
+        self.assertEqual((self.proyecto.num_participantes, self.proyecto.representante_id), (2, '000000001'))
+
+        Participacion.objects.create(proyecto=self.proyecto, alumno=self.alumnos[2], es_representante=True)
+        self.assertEqual(
+            list(Participacion.objects.filter(proyecto=self.proyecto, es_representante=True).values_list('alumno_id', flat=True)),
+            ['000000003'],
+        )
+        self.proyecto.refresh_from_db()
+        self.assertEqual((self.proyecto.num_participantes, self.proyecto.representante_id), (3, '000000003'))
+
+
+class MigracionRepresentanteTests(PruebaMigracion):
+    desde = [('projects', '0007_estado_enlace')]
+
+    def test_deja_un_representante_y_calcula_los_campos(self):
+        Alumno = self.apps.get_model('people', 'Alumno')
+        Proyecto = self.apps.get_model('projects', 'Proyecto')
+        Participacion = self.apps.get_model('projects', 'Participacion')
+        for codigo in ('000000001', '000000002', '000000003'):
+            Alumno.objects.create(codigo_estudiante=codigo, nombre_completo=codigo)
+        for folio in ('000000002-2023A', 'OTRO-2023A'):
+            proyecto = Proyecto.objects.create(folio=folio, titulo=folio, modalidad='PROTOTIPO', calendario_registro='2023A')
+            Participacion.objects.bulk_create(
+                Participacion(proyecto=proyecto, alumno_id=codigo, es_representante=True)
+                for codigo in ('000000003', '000000002', '000000001')
+            )
+
+        apps = self.migrar([('projects', '0008_participantes_desnormalizados')])
+        Proyecto = apps.get_model('projects', 'Proyecto')
+        Participacion = apps.get_model('projects', 'Participacion')
+        representantes = dict(
+            Participacion.objects.filter(es_representante=True).values_list('proyecto_id', 'alumno_id')
+        )
+        # Se conserva el alumno del folio o, si no está, el de código menor
+        self.assertEqual(representantes, {'000000002-2023A': '000000002', 'OTRO-2023A': '000000001'})
+        self.assertEqual(Participacion.objects.count(), 6)
+        self.assertEqual(
+            set(Proyecto.objects.values_list('folio', 'num_participantes', 'representante_id')),
+            {('000000002-2023A', 3, '000000002'), ('OTRO-2023A', 3, '000000001')},
+        )
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class HistorialAdminTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A'])
+        self.proyecto = _proyecto('P1-2023A')
+        self.largo = 'X' * (LARGO_RESUMEN_TEXTO + 50)
+        Prorroga.objects.bulk_create(
+            Prorroga(proyecto=self.proyecto, justificacion=self.largo if n == 0 else f'J{n}', calendario_presentacion='2023B')
+            for n in range(25)
+        )
+        Evaluaciones.objects.bulk_create([
+            Evaluaciones(proyecto=self.proyecto, tipo_revision='FORMA', resolutivo='PENDIENTE', observaciones='corto'),
+            Evaluaciones(proyecto=self.proyecto, tipo_revision='FONDO', resolutivo='APROBADO', observaciones=self.largo),
+        ])
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def _historial(self, tipo, desde=None):
+        datos = {'desde': desde} if desde is not None else {}
+        return self.client.get(f'/admin/projects/proyecto/P1-2023A/historial/{tipo}/', datos)
+
+    def test_paginas_de_prorrogas(self):
+        pagina = self._historial('prorrogas').json()
+        # La primera página ya va en el formulario: el endpoint empieza en la segunda
+        self.assertEqual(len(pagina['filas']), TAMANO_PAGINA_HISTORIAL)
+        self.assertEqual(pagina['siguiente'], 2 * TAMANO_PAGINA_HISTORIAL)
+
+        pagina = self._historial('prorrogas', desde=pagina['siguiente']).json()
+        self.assertEqual(len(pagina['filas']), 25 - 2 * TAMANO_PAGINA_HISTORIAL)
+        self.assertIsNone(pagina['siguiente'])
+        ultima = pagina['filas'][-1]
+        self.assertEqual(len(ultima['texto']), LARGO_RESUMEN_TEXTO)
+        self.assertEqual(self.client.get(ultima['url_completo']).json(), {'texto': self.largo})
+        self.assertIsNone(pagina['filas'][0]['url_completo'])
+
+        self.assertEqual(self._historial('prorrogas', desde='x').json()['siguiente'], 2 * TAMANO_PAGINA_HISTORIAL)
+
+    def test_evaluaciones_con_etiquetas_y_texto_completo(self):
+        filas = self._historial('evaluaciones', desde=0).json()['filas']
+        self.assertEqual([f['celdas'][2:] for f in filas], [
+            ['Revisión de Fondo', 'Aprobado'], ['Revisión de Forma', 'Pendiente de Correcciones'],
+        ])
+        self.assertEqual([f['texto'] for f in filas], [self.largo[:LARGO_RESUMEN_TEXTO], 'corto'])
+        self.assertEqual(self.client.get(filas[0]['url_completo']).json(), {'texto': self.largo})
+
+    def test_tipo_desconocido_y_permisos(self):
+        self.assertEqual(self._historial('otro').status_code, 404)
+        otra = Evaluaciones.objects.create(proyecto=_proyecto('P2-2023A'), resolutivo='APROBADO', observaciones='ajena')
+        url = f'/admin/projects/proyecto/P1-2023A/historial/evaluaciones/{otra.pk}/texto/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.assertEqual(self._historial('prorrogas').status_code, 403)
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class AccionesMasivasTests(TestCase):
+
+    def setUp(self):
+        Calendario.asegurar(['2023A'])
+        Evaluador.objects.create(codigo_evaluador='E1', nombre_completo='Eva', correo_evaluador='e1@example.com', especializacion='General')
+        self.proyectos = [_proyecto(f'P{numero}-2023A') for numero in range(3)]
+        Proyecto.objects.filter(pk='P0-2023A').update(evaluador_id='E1')
+        self.prorrogas = Prorroga.objects.bulk_create(
+            Prorroga(proyecto=p, justificacion='J', calendario_presentacion='2023B') for p in self.proyectos
+        )
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def _accion(self, url, accion, seleccion, **datos):
+        return self.client.post(url, {'action': accion, '_selected_action': seleccion, **datos}, follow=True)
+
+    def test_asignar_dictamen_inserta_una_evaluacion_final_por_proyecto(self):
+        respuesta = self._accion(
+            '/admin/projects/proyecto/', 'asignar_dictamen', ['P0-2023A', 'P1-2023A'],
+            resolutivo='APROBADO', observaciones='  sin observaciones  ',
+        )
+        self.assertContains(respuesta, 'Dictamen asignado a 2 proyecto(s).')
+        self.assertEqual(
+            dict(Proyecto.objects.values_list('folio', 'dictamen')),
+            {'P0-2023A': 'APROBADO', 'P1-2023A': 'APROBADO', 'P2-2023A': 'PENDIENTE'},
+        )
+        self.assertEqual(
+            set(Evaluaciones.objects.values_list('proyecto_id', 'evaluador_id', 'tipo_revision', 'resolutivo', 'observaciones')),
+            {('P0-2023A', 'E1', 'FINAL', 'APROBADO', 'SIN OBSERVACIONES'),
+             ('P1-2023A', None, 'FINAL', 'APROBADO', 'SIN OBSERVACIONES')},
+        )
+
+    def test_dictaminar_normaliza_y_rechaza_resolutivos_invalidos(self):
+        self.assertEqual(masivo.dictaminar(Proyecto.objects.filter(pk='P2-2023A'), ' rechazado '), 1)
+        self.assertEqual(
+            list(Evaluaciones.objects.values_list('resolutivo', 'observaciones')),
+            [('RECHAZADO', 'DICTAMEN RECHAZADO ASIGNADO EN LOTE.')],
+        )
+        with self.assertRaisesMessage(ValueError, 'Resolutivo inválido: (vacío).'):
+            masivo.dictaminar(Proyecto.objects.all(), '  ')
+        self.assertEqual(Evaluaciones.objects.count(), 1)
+
+    def test_mover_calendario_normaliza_la_clave(self):
+        seleccion = [str(p.pk) for p in self.prorrogas[:2]]
+        respuesta = self._accion('/admin/projects/prorroga/', 'mover_calendario', seleccion, calendario=' 2024a ')
+        self.assertContains(respuesta, '2 prórroga(s) movidas a 2024A.')
+        self.assertEqual(
+            sorted(Prorroga.objects.values_list('calendario_presentacion', flat=True)), ['2023B', '2024A', '2024A'],
+        )
+
+        respuesta = self._accion('/admin/projects/prorroga/', 'mover_calendario', seleccion, calendario='24A')
+        self.assertContains(respuesta, 'Calendario inválido: 24A.')
+        self.assertEqual(Prorroga.objects.filter(calendario_presentacion='2024A').count(), 2)
@@ -1,2 +1,89 @@
 from django.contrib import admin
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 
+from .models import InformePerfil
+
+
+@admin.register(InformePerfil)
+class InformePerfilAdmin(admin.ModelAdmin):
+    """Solo lectura: los informes los crea ProyectoSIGAP/perfilado.py."""
+    list_display = ('creado', 'tipo', 'nombre', 'usuario', 'duracion_ms', 'consultas', 'consultas_ms')
+    list_filter = ('tipo',)
+    search_fields = ('nombre', 'usuario')
+    fieldsets = (
+        (None, {'fields': ('creado', 'tipo', 'nombre', 'usuario', 'duracion_ms', 'consultas', 'consultas_ms', 'descarga')}),
+        ("Consultas SQL (agrupadas, las más costosas primero)", {'fields': ('tabla_sql',)}),
+        ("Python", {'fields': ('texto_acumulado', 'texto_funciones', 'texto_llamadas')}),
+    )
+    readonly_fields = (
+        'creado', 'tipo', 'nombre', 'usuario', 'duracion_ms', 'consultas', 'consultas_ms', 'descarga',
+        'tabla_sql', 'texto_acumulado', 'texto_funciones', 'texto_llamadas',
+    )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # El listado no necesita los textos ni el volcado de pstats
+            queryset = queryset.defer('funciones', 'acumulado', 'llamadas', 'sql', 'datos')
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/pstats/', self.admin_site.admin_view(self.pstats_view), name='informeperfil_pstats'),
+        ] + super().get_urls()
+
+    def pstats_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise Http404
+        informe = get_object_or_404(InformePerfil, pk=pk)
+        if not informe.datos:
+            raise Http404
+        response = HttpResponse(bytes(informe.datos), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="perfil-{informe.pk}.prof"'
+        return response
+
+    def descarga(self, obj):
+        if not obj.datos:
+            return "—"
+        return format_html(
+            '<a href="{}">perfil-{}.prof</a> (pstats; se abre con snakeviz o python -m pstats)',
+            reverse('admin:informeperfil_pstats', args=[obj.pk]), obj.pk,
+        )
+    descarga.short_description = "Descarga"
+
+    def tabla_sql(self, obj):
+        if not obj.sql:
+            return "—"
+        filas = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            ((c['veces'], c['ms'], c['max_ms'], c['alias'], c['sql']) for c in obj.sql),
+        )
+        return format_html(
+            '<table><thead><tr><th>Veces</th><th>Total ms</th><th>Máx. ms</th><th>Alias</th><th>SQL</th></tr></thead>'
+            '<tbody>{}</tbody></table>', filas,
+        )
+    tabla_sql.short_description = "Consultas"
+
+    def _pre(self, texto):
+        return format_html('<pre style="white-space:pre; overflow:auto; max-height:40em">{}</pre>', texto or "—")
+
+    def texto_acumulado(self, obj):
+        return self._pre(obj.acumulado)
+    texto_acumulado.short_description = "Por tiempo acumulado"
+
+    def texto_funciones(self, obj):
+        return self._pre(obj.funciones)
+    texto_funciones.short_description = "Por tiempo propio"
+
+    def texto_llamadas(self, obj):
+        return self._pre(obj.llamadas)
+    texto_llamadas.short_description = "Llamadas de las más costosas"
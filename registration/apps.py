@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class RegistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'registration'
+
+    def ready(self):
+        # Registro de cambios de los modelos sincronizables
+        from . import cambios
+        cambios.conectar()
+        # Invalidación del usuario y permisos cacheados (ProyectoSIGAP/autenticacion.py)
+        from ProyectoSIGAP import autenticacion
+        autenticacion.conectar()
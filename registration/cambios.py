@@ -0,0 +1,223 @@
+"""
+Registro de cambios para la sincronización incremental de otros sistemas
+(BD de reportes del departamento, portales de alumnos).
+
+Cada alta, cambio o baja de los MODELOS deja una entrada Cambio con un
+número de secuencia creciente; el consumidor pide "lo posterior a `seq`" y
+recibe el estado actual de cada registro (o su baja), de modo que la
+sincronización cuesta O(cambios) y no O(tabla).
+
+- Las señales post_save/post_delete cubren save(), update_or_create() y
+  los delete() de querysets; los caminos masivos sin señales (update,
+  bulk_create, bulk_update) llaman a `registrar()` o `registrar_consulta()`.
+- Las entradas se escriben en la misma transacción que los datos: un
+  rollback no deja cambios fantasma y un commit no puede perderlas. Dentro
+  de `diferido()` se acumulan (una por registro) y se escriben en un solo
+  INSERT al salir del bloque, así que una importación de miles de filas no
+  agrega una escritura por fila; el bloque debe ir dentro de la transacción
+  de los datos.
+- Antes de insertar, el escritor bloquea la fila de CandadoCambios hasta
+  su commit. Así ninguna transacción toma números de `seq` mientras otra
+  que ya los tomó sigue abierta, y lo visible para `leer()` es siempre un
+  prefijo de la secuencia: un consumidor no se salta una entrada que se
+  confirme después de su lectura.
+- `compactar()` deja solo la última entrada por registro entre las
+  anteriores a CAMBIOS_COMPACTAR_HORAS (el consumidor recibe el estado
+  actual de todas formas) y `purgar()` borra las anteriores a
+  CAMBIOS_RETENCION_DIAS; quien lea desde antes de una purga debe
+  resincronizar completo.
+"""
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import router, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from evaluation.models import Evaluaciones
+from people.models import Alumno
+from projects.models import Proyecto, Participacion, Prorroga
+from .models import Cambio, CandadoCambios, PurgaCambios
+
+MODELOS = (Proyecto, Participacion, Alumno, Prorroga, Evaluaciones)
+POR_ETIQUETA = {m._meta.label_lower: m for m in MODELOS}
+LIMITE_MAXIMO = 5000
+
+_diferidos = contextvars.ContextVar('cambios_diferidos', default=None)
+
+
+# ====================================================================
+# Escritura
+# ====================================================================
+
+def _combinar(anterior, nueva):
+    """Operación resultante de dos cambios del mismo registro en una transacción."""
+    if anterior == Cambio.ALTA:
+        # Alta y baja en la misma transacción: el consumidor nunca lo vio
+        return None if nueva == Cambio.BAJA else Cambio.ALTA
+    if anterior == Cambio.BAJA and nueva == Cambio.ALTA:
+        return Cambio.MODIFICACION
+    return nueva
+
+
+class _Pendientes:
+    def __init__(self):
+        self.entradas = {}  # alias -> {(etiqueta, clave): operacion}
+
+    def agregar(self, alias, etiqueta, clave, operacion):
+        entradas = self.entradas.setdefault(alias, {})
+        llave = (etiqueta, str(clave))
+        if llave in entradas:
+            operacion = _combinar(entradas[llave], operacion)
+            if operacion is None:
+                del entradas[llave]
+                return
+        entradas[llave] = operacion
+
+
+def _escribir(entradas, alias):
+    if not entradas:
+        return
+    with transaction.atomic(using=alias):
+        # Hasta el commit de la transacción exterior ningún otro escritor toma números de seq
+        CandadoCambios.objects.using(alias).select_for_update().get_or_create(pk=1)
+        ahora = timezone.now()
+        Cambio.objects.using(alias).bulk_create(
+            [Cambio(modelo=m, clave=c, operacion=op, registrado=ahora) for (m, c), op in entradas.items()],
+            batch_size=2000,
+        )
+
+
+@contextmanager
+def diferido():
+    """
+    Acumula las entradas del bloque (una por registro) y las escribe juntas al
+    final. Debe usarse dentro de la transacción de los datos; si el bloque
+    termina con una excepción no se escribe nada.
+    """
+    if _diferidos.get() is not None:
+        yield
+        return
+    pendientes = _Pendientes()
+    token = _diferidos.set(pendientes)
+    try:
+        yield
+    finally:
+        _diferidos.reset(token)
+    for alias, entradas in pendientes.entradas.items():
+        _escribir(entradas, alias)
+
+
+def registrar(modelo, claves, operacion=Cambio.MODIFICACION):
+    """Anota `operacion` para las claves primarias dadas de `modelo`."""
+    if not settings.CAMBIOS_ACTIVOS:
+        return
+    etiqueta = modelo._meta.label_lower
+    alias = router.db_for_write(Cambio)
+    pendientes = _diferidos.get()
+    if pendientes is None:
+        _escribir({(etiqueta, str(c)): operacion for c in claves}, alias)
+        return
+    for clave in claves:
+        pendientes.agregar(alias, etiqueta, clave, operacion)
+
+
+def registrar_consulta(queryset, operacion=Cambio.MODIFICACION):
+    """Anota los registros de un queryset (leer sus claves antes de un update/delete masivo)."""
+    if settings.CAMBIOS_ACTIVOS:
+        registrar(queryset.model, queryset.values_list('pk', flat=True), operacion)
+
+
+def _al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    registrar(sender, [instance.pk], Cambio.ALTA if created else Cambio.MODIFICACION)
+    if sender is Participacion and getattr(instance, '_degradadas', None):
+        # save() degradó con un update() al representante anterior del proyecto
+        registrar(Participacion, instance._degradadas)
+
+
+def _al_borrar(sender, instance, **kwargs):
+    registrar(sender, [instance.pk], Cambio.BAJA)
+
+
+def conectar():
+    for modelo in MODELOS:
+        uid = f"cambios_{modelo._meta.label_lower}"
+        post_save.connect(_al_guardar, sender=modelo, dispatch_uid=uid + '_save')
+        post_delete.connect(_al_borrar, sender=modelo, dispatch_uid=uid + '_delete')
+
+
+# ====================================================================
+# Lectura
+# ====================================================================
+
+def ultima_purga():
+    return PurgaCambios.objects.aggregate(hasta=Max('hasta_seq'))['hasta'] or 0
+
+
+def leer(desde=0, limite=500, modelos=None):
+    """
+    Cambios con seq > `desde`, como mucho `limite`, con el estado actual de cada
+    registro en `datos` (None si ya no existe). `siguiente` es el `desde` de la
+    próxima llamada.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    resultado = {'desde': desde, 'requiere_resincronizar': desde < ultima_purga()}
+    consulta = Cambio.objects.filter(seq__gt=desde).order_by('seq')
+    if modelos:
+        consulta = consulta.filter(modelo__in=modelos)
+    cambios = list(consulta.values('seq', 'modelo', 'clave', 'operacion', 'registrado')[:limite + 1])
+    resultado['hay_mas'] = len(cambios) > limite
+    cambios = cambios[:limite]
+
+    # Estado actual: una consulta por modelo presente en el lote
+    claves = {}
+    for cambio in cambios:
+        if cambio['operacion'] != Cambio.BAJA:
+            claves.setdefault(cambio['modelo'], set()).add(cambio['clave'])
+    estados = {}
+    for etiqueta, grupo in claves.items():
+        modelo = POR_ETIQUETA.get(etiqueta)
+        if modelo is None:
+            continue
+        for registro in serializers.serialize('python', modelo.objects.filter(pk__in=grupo)):
+            estados[(etiqueta, str(registro['pk']))] = registro['fields']
+
+    for cambio in cambios:
+        cambio['datos'] = estados.get((cambio['modelo'], cambio['clave']))
+        if cambio['datos'] is None:
+            cambio['operacion'] = Cambio.BAJA
+    resultado['cambios'] = cambios
+    resultado['siguiente'] = cambios[-1]['seq'] if cambios else desde
+    return resultado
+
+
+# ====================================================================
+# Compactación y retención
+# ====================================================================
+
+def compactar(horas=None):
+    """Borra las entradas anteriores al horizonte que tienen otra posterior del mismo registro."""
+    horas = settings.CAMBIOS_COMPACTAR_HORAS if horas is None else horas
+    horizonte = timezone.now() - timedelta(hours=horas)
+    posteriores = Cambio.objects.filter(modelo=OuterRef('modelo'), clave=OuterRef('clave'), seq__gt=OuterRef('seq'))
+    eliminados, _ = Cambio.objects.filter(registrado__lt=horizonte).filter(Exists(posteriores)).delete()
+    return eliminados
+
+
+def purgar(dias=None):
+    """Borra las entradas más viejas que la retención y deja constancia del corte."""
+    dias = settings.CAMBIOS_RETENCION_DIAS if dias is None else dias
+    viejas = Cambio.objects.filter(registrado__lt=timezone.now() - timedelta(days=dias))
+    with transaction.atomic():
+        hasta = viejas.aggregate(hasta=Max('seq'))['hasta']
+        if hasta is None:
+            return 0
+        eliminados, _ = Cambio.objects.filter(seq__lte=hasta).delete()
+        PurgaCambios.objects.create(hasta_seq=hasta, eliminados=eliminados)
+    return eliminados
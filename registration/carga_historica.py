@@ -0,0 +1,224 @@
+"""
+Carga histórica: importa de una vez las hojas de todos los calendarios de
+RUTA_PROCESADOS (<calendario>/1-Procesados/*.xlsx).
+
+- La lectura y limpieza de cada hoja (pandas + limpiar_fila, lo más
+  costoso) corre en un pool de procesos (hoja.parsear, sin Django).
+- Solo el proceso principal escribe, una hoja tras otra en orden de
+  calendario, con un upsert por tabla (Asesor, Formato1, Proyecto, Alumno,
+  Participacion) en una transacción por hoja. Así no hay escritores
+  compitiendo por las mismas filas de Alumno/Asesor, y el calendario más
+  reciente prevalece como en importaciones sucesivas. Si el upsert de una
+  hoja falla se reintenta fila por fila con importador.guardar_registro
+  para aislar las filas defectuosas.
+- Cada hoja terminada se anota en el índice de vigilancia.Indice
+  (INDICE_IMPORTACIONES): al reanudar tras un fallo se saltan las que ya
+  entraron, y vigilar_procesados tampoco las vuelve a importar.
+"""
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from evaluation import cola
+from people.models import Alumno, Asesor
+from projects import participantes, similitud
+from projects.models import Calendario, Proyecto, Formato1, Participacion
+from ProyectoSIGAP import metricas, perfilado
+from ProyectoSIGAP.cache import invalidar_modelo
+from . import cambios, hoja, importador, vigilancia
+from .models import InformePerfil
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 1000
+
+# bulk_create no pasa por save(): mismos campos que cada save() convierte a mayúsculas
+MAYUSCULAS = {
+    Asesor: ('codigo_asesor', 'nombre_completo', 'correo_electronico'),
+    Formato1: ('folio', 'introduccion', 'justificacion', 'objetivo', 'resumen'),
+    Proyecto: ('folio', 'titulo', 'variante', 'nivel_competencia', 'dictamen', 'calendario_registro_id'),
+    Alumno: ('codigo_estudiante', 'nombre_completo', 'correo_electronico'),
+}
+# Campos de Proyecto que trae la hoja; evaluador y dictamen no se tocan (igual que update_or_create)
+CAMPOS_PROYECTO = ['titulo', 'modalidad', 'nivel_competencia', 'variante', 'calendario_registro',
+                   'evidencia_url', 'protocolo_dictamen_url']
+
+
+def _instancia(modelo, **valores):
+    for campo in MAYUSCULAS[modelo]:
+        if valores.get(campo):
+            valores[campo] = valores[campo].upper()
+    return modelo(**valores)
+
+
+# ====================================================================
+# Escritura (solo el proceso principal)
+# ====================================================================
+
+def _upsert(modelo, objetos, unicos, actualizar):
+    # Orden estable por clave: los bloqueos de filas se toman siempre en el mismo orden
+    objetos = sorted(objetos, key=lambda o: tuple(str(o.serializable_value(c)) for c in unicos))
+    modelo.objects.bulk_create(
+        objetos, batch_size=TAMANO_LOTE,
+        update_conflicts=True, unique_fields=unicos, update_fields=actualizar,
+    )
+
+
+def guardar_lote(registros):
+    """
+    Equivalente por conjuntos de guardar_registro para todos los registros de
+    una hoja (folios ya únicos). Devuelve los folios escritos.
+    """
+    asesores, alumnos, participaciones = {}, {}, {}
+    formatos, proyectos = [], []
+    for registro in registros:
+        asesor = _instancia(Asesor, **registro['asesor'])
+        asesores[asesor.pk] = asesor
+        formato1 = _instancia(Formato1, folio=registro['folio'], **registro['formato1'])
+        formatos.append(formato1)
+        proyectos.append(_instancia(
+            Proyecto, folio=registro['folio'], asesor_id=asesor.pk, formato1_id=formato1.pk, **registro['proyecto']
+        ))
+        for data in registro['integrantes']:
+            alumno = _instancia(
+                Alumno, codigo_estudiante=data['codigo'], nombre_completo=data['nombre'],
+                correo_electronico=data['correo'],
+            )
+            alumnos[alumno.pk] = alumno
+            participaciones[(formato1.pk, alumno.pk)] = Participacion(
+                proyecto_id=formato1.pk, alumno_id=alumno.pk, es_representante=data['es_representante'],
+            )
+    folios = [p.pk for p in proyectos]
+
+    _upsert(Asesor, asesores.values(), ['codigo_asesor'], ['nombre_completo', 'correo_electronico'])
+    _upsert(Formato1, formatos, ['folio'], ['introduccion', 'justificacion', 'objetivo', 'resumen'])
+    _upsert(Proyecto, proyectos, ['folio'], [*CAMPOS_PROYECTO, 'asesor', 'formato1'])
+    _upsert(Alumno, alumnos.values(), ['codigo_estudiante'], ['nombre_completo', 'correo_electronico'])
+    # Un solo representante por proyecto: el nuevo desplaza al anterior (como Participacion.save())
+    con_representante = {p.proyecto_id for p in participaciones.values() if p.es_representante}
+    Participacion.objects.filter(proyecto_id__in=con_representante, es_representante=True).update(es_representante=False)
+    _upsert(Participacion, participaciones.values(), ['proyecto', 'alumno'], ['es_representante'])
+
+    # Los upserts no disparan señales
+    cambios.registrar(Proyecto, folios)
+    cambios.registrar(Alumno, alumnos)
+    cambios.registrar_consulta(Participacion.objects.filter(proyecto_id__in=folios))
+    return folios
+
+
+def _guardar_por_fila(registros):
+    """Camino lento, como importar_archivo: cada fila en su savepoint para aislar las defectuosas."""
+    folios, fallidos = [], []
+    for registro in registros:
+        try:
+            with transaction.atomic():
+                folios.append(importador.guardar_registro(registro).pk)
+        except Exception as e:
+            fallidos.append((None, registro['folio'], f"Fallo al guardar. Error: {e}"))
+    return folios, fallidos
+
+
+def escribir_hoja(registros):
+    """Escribe los registros de una hoja. Devuelve (folios, fallidos_al_guardar)."""
+    try:
+        with transaction.atomic():
+            folios, fallidos = guardar_lote(registros), []
+    except Exception as e:
+        logger.warning(f"El upsert por conjuntos falló ({e}); se reintenta fila por fila.")
+        with participantes.diferido(), cola.diferido(), transaction.atomic(), cambios.diferido():
+            folios, fallidos = _guardar_por_fila(registros)
+
+    # bulk_create no dispara señales: campos derivados, colas, cachés e índice de similitud
+    participantes.recalcular(folios)
+    cola.recalcular(folios)
+    for modelo in (Asesor, Formato1, Proyecto, Alumno, Participacion):
+        invalidar_modelo(modelo)
+    similitud.indexar_lote(Formato1.objects.filter(pk__in=folios).only('folio', *similitud.CAMPOS_TEXTO))
+    return folios, fallidos
+
+
+# ====================================================================
+# Orquestación
+# ====================================================================
+
+def pendientes(indice, calendarios=None, reiniciar=False):
+    """[(calendario, ruta)] por importar, en orden de calendario y de nombre de archivo."""
+    archivos = []
+    for ruta in vigilancia.archivos_vigilados():
+        calendario = vigilancia.calendario_de(ruta)
+        if calendarios and calendario not in calendarios:
+            continue
+        if not reiniciar and not indice.entradas.get(indice.clave(ruta), {}).get('error'):
+            firma = vigilancia._firma_stat(ruta)
+            if indice.sin_cambios(ruta, firma):
+                continue
+            sha256 = vigilancia._sha256(ruta)
+            if indice.mismo_contenido(ruta, sha256):
+                # Solo cambió la fecha del archivo
+                indice.registrar(ruta, firma, sha256)
+                continue
+        archivos.append((calendario, ruta))
+    return sorted(archivos)
+
+
+def _anotar_fallidos(calendario, fallidos):
+    for fila, folio, mensaje in fallidos:
+        fila = f"Fila {fila}" if fila else "Registro"
+        folio = f" (Folio: {folio})" if folio else ""
+        logger.warning(f"[{calendario}] {fila}{folio}: {mensaje}")
+
+
+def ejecutar(indice, archivos, procesos=None, al_terminar=None):
+    """
+    Lee las hojas en paralelo y las escribe en orden. `al_terminar(ruta,
+    calendario, resultado)` se llama tras cada hoja, con el mismo resultado
+    que guarda vigilar_procesados. Devuelve la lista de resultados.
+    """
+    resultados = []
+    procesos = procesos or os.cpu_count() or 1
+    Calendario.asegurar({calendario for calendario, _ in archivos})
+    # Los hijos no usan la base; que no hereden sockets abiertos
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Ventana acotada: a lo más dos hojas leídas por proceso esperando al escritor
+        ventana = 2 * procesos
+        cola_archivos, en_curso = deque(archivos), deque()
+        while cola_archivos or en_curso:
+            while cola_archivos and len(en_curso) < ventana:
+                calendario, ruta = cola_archivos.popleft()
+                firma = vigilancia._firma_stat(ruta)
+                en_curso.append((calendario, ruta, firma, pool.submit(hoja.parsear, ruta, calendario)))
+            calendario, ruta, firma, futuro = en_curso.popleft()
+
+            inicio = time.perf_counter()
+            try:
+                registros, fallidos, filas = futuro.result()
+                metricas.incrementar('sigap_importacion_filas_total', filas, etapa='lectura', resultado='leida')
+                with perfilado.perfilar(
+                    f"cargar_historico {os.path.basename(ruta)} ({calendario})", InformePerfil.IMPORTACION,
+                    activo=settings.PERFIL_IMPORTACIONES,
+                ):
+                    folios, fallidos_guardado = escribir_hoja(registros)
+                fallidos += fallidos_guardado
+                _anotar_fallidos(calendario, fallidos)
+                metricas.incrementar('sigap_importacion_filas_total', len(folios), etapa='guardado', resultado='exitosa')
+                metricas.incrementar('sigap_importacion_filas_total', len(fallidos), etapa='guardado', resultado='fallida')
+                resultado = {'exitosos': len(folios), 'fallidos': len(fallidos), 'error': None}
+            except Exception as e:
+                # Queda anotado con error: la siguiente ejecución lo reintenta
+                logger.exception(f"Falló la carga de {ruta}.")
+                resultado = {'exitosos': 0, 'fallidos': 0, 'error': str(e)}
+            resultado['duracion_s'] = round(time.perf_counter() - inicio, 2)
+            indice.registrar(
+                ruta, firma, vigilancia._sha256(ruta), importado=timezone.now().isoformat(timespec='seconds'), **resultado
+            )
+            resultados.append((ruta, calendario, resultado))
+            if al_terminar:
+                al_terminar(ruta, calendario, resultado)
+    return resultados
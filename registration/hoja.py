@@ -0,0 +1,171 @@
+"""
+Lectura y limpieza de la hoja de respuestas del formulario.
+
+Sin Django a propósito: la carga histórica (carga_historica.py) ejecuta
+estas funciones en procesos hijos, que con spawn/forkserver arrancan sin
+settings configurados. pandas se importa dentro de las funciones, igual
+que en importador.py.
+"""
+
+
+class FilaInvalida(Exception):
+    """La fila no tiene los datos mínimos para importarse."""
+
+    def __init__(self, mensaje, folio=None):
+        super().__init__(mensaje)
+        self.folio = folio
+
+
+# --- Lectura y limpieza ---
+def leer_hoja(ruta):
+    """Lee el Excel y normaliza los nombres de columna."""
+    import pandas as pd
+
+    df = pd.read_excel(ruta)
+
+    # NORMALIZACIÓN
+    df.columns = (
+        df.columns.str.strip().str.lower()
+        .str.replace('(', '', regex=False).str.replace(')', '', regex=False) # Eliminar paréntesis
+        .str.replace('á', 'a').str.replace('é', 'e').str.replace('í', 'i').str.replace('ó', 'o').str.replace('ú', 'u')
+        .str.replace('ñ', 'n')
+        .str.replace(' ', '_') # Reemplazar espacios por guiones bajos (ÚLTIMO PASO)
+    )
+    return df
+
+def get_clean_value(row, key):
+    """
+    Obtiene un valor, asegura que es una cadena y maneja valores nulos/NaN de Pandas
+    sin ambigüedad de Series.
+    """
+    import pandas as pd
+
+    value = row.get(key)
+
+    # 1. Manejo de ambigüedad (si el valor es un array/Series) y de nulos
+    if isinstance(value, pd.Series):
+        # Si es una Serie (claves duplicadas), buscar el primer valor NO NULO
+        found_value = None
+        for v in value:
+            # strip() para manejar strings con solo espacios en blanco
+            if pd.notna(v) and (not isinstance(v, str) or v.strip() != ""):
+                found_value = v
+                break # Tomar el primer valor no nulo
+
+        value = found_value # Ahora 'value' es un valor simple (o None)
+
+    if pd.isna(value) or value is None:
+        return None
+
+    try:
+        # Intenta convertir a entero para eliminar decimales (si es código/float) y luego a string
+        if isinstance(value, (int, float)):
+            if value == 0 or value == 0.0:
+                return None
+            return str(int(value))
+        return str(value).strip()
+    except Exception:
+        return str(value).strip() if value is not None else None
+
+def claves_variante(df):
+    """Columnas 'variante', 'variante.1', ... 'variante.N' que existen en la hoja."""
+    # Lista de claves de columna ÚNICAS, manteniendo el orden.
+    unique_keys = list(dict.fromkeys(df.columns))
+    return [key for key in unique_keys if key.startswith('variante')]
+
+def limpiar_fila(row, calendario, dynamic_variante_keys):
+    """
+    Convierte una fila de la hoja en un registro listo para guardar.
+    Lanza FilaInvalida si faltan las claves obligatorias.
+    """
+    # 1. IDENTIFICACIÓN CLAVE (REPRESENTANTE)
+    codigo_representante = get_clean_value(row, 'codigo_de_integrante_1representante')
+    if not codigo_representante:
+        raise FilaInvalida("Código de representante vacío.")
+
+    folio_proyecto = f"{codigo_representante}-{calendario}"
+
+    # 2. ASESOR: el código del Excel es la clave única y NO puede estar vacío
+    codigo_asesor_excel = get_clean_value(row, 'codigo_del_asesor')
+    if not codigo_asesor_excel:
+        raise FilaInvalida("'Codigo del asesor' está vacío. No se puede procesar.", folio=folio_proyecto)
+
+    # 3. VARIANTE (EN MÚLTIPLES COLUMNAS)
+    valor_variante_encontrado = None
+    for col_name in dynamic_variante_keys:
+        valor = get_clean_value(row, col_name)
+        if valor:
+            valor_variante_encontrado = valor
+            break
+
+    # 4. INTEGRANTES
+    integrantes = []
+    for i in range(1, 4):
+        if i == 1:
+            # Integrante 1 (Representante) - Claves limpias
+            codigo_key = 'codigo_de_integrante_1representante'
+            nombre_key = 'nombre_de_integrante_1representante'
+            correo = get_clean_value(row, 'direccion_de_correo_electronico')
+        else:
+            # Integrantes 2 y 3 - Claves genéricas
+            codigo_key = f'codigo_de_integrante_{i}'
+            nombre_key = f'nombre_de_integrante_{i}'
+            correo = None
+
+        codigo = get_clean_value(row, codigo_key)
+        nombre = get_clean_value(row, nombre_key)
+        if codigo and nombre:
+            integrantes.append({
+                'codigo': codigo,
+                'nombre': nombre,
+                'es_representante': (i == 1),
+                'correo': correo
+            })
+
+    return {
+        'folio': folio_proyecto,
+        'asesor': {
+            'codigo_asesor': codigo_asesor_excel,
+            'nombre_completo': get_clean_value(row, 'nombre_del_asesor'),
+            'correo_electronico': get_clean_value(row, 'correo_institucional_del_asesora'),
+        },
+        'formato1': {
+            'introduccion': get_clean_value(row, 'introduccion'),
+            'justificacion': get_clean_value(row, 'justificacion'),
+            'objetivo': get_clean_value(row, 'objetivo'),
+            'resumen': get_clean_value(row, 'resumen'),
+        },
+        'proyecto': {
+            'titulo': get_clean_value(row, 'titulo_del_proyecto'),
+            'modalidad': get_clean_value(row, 'modalidad'),
+            'nivel_competencia': get_clean_value(row, 'nivel_de_competencias'), # Módulos Registrados
+            'variante': valor_variante_encontrado,
+            'calendario_registro_id': calendario,
+            'evidencia_url': get_clean_value(row, 'sube_tu_evidencia'),
+            'protocolo_dictamen_url': get_clean_value(row, 'sube_tu_formato'),
+        },
+        'integrantes': integrantes,
+    }
+
+
+# --- Hoja completa (procesos de la carga histórica) ---
+def parsear(ruta, calendario):
+    """
+    Lee y limpia una hoja completa sin tocar la base.
+    Devuelve (registros, fallidos, filas): un registro por folio (si se
+    repite, gana la última fila, como en importaciones fila por fila) y
+    los fallidos como (fila, folio, mensaje).
+    """
+    df = leer_hoja(ruta)
+    dynamic_variante_keys = claves_variante(df)
+    registros, fallidos = {}, []
+    for index, row in df.iterrows():
+        try:
+            registro = limpiar_fila(row, calendario, dynamic_variante_keys)
+        except FilaInvalida as e:
+            fallidos.append((index + 2, e.folio, str(e)))
+            continue
+        folio = registro['folio'].upper()
+        registros.pop(folio, None)
+        registros[folio] = registro
+    return list(registros.values()), fallidos, len(df)
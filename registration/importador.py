@@ -0,0 +1,138 @@
+"""
+Pipeline de importación de proyectos desde la hoja de respuestas del formulario.
+
+pandas (y con él NumPy/openpyxl) se importa dentro de las funciones que lo
+usan: este módulo se carga junto con el URLconf, y no queremos que cada
+arranque de worker o cada comando de manage.py pague ese costo.
+"""
+import os
+import time
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+# Importar Modelos
+from projects.models import Calendario, Proyecto, Formato1, Participacion
+from projects import participantes
+from evaluation import cola
+from people.models import Alumno, Asesor
+from ProyectoSIGAP import metricas, perfilado
+from . import cambios
+from .models import InformePerfil
+# Lectura y limpieza (sin Django, ver hoja.py); se reexportan para validacion.py y otros
+from .hoja import FilaInvalida, leer_hoja, get_clean_value, claves_variante, limpiar_fila  # noqa: F401
+
+
+logger = logging.getLogger(__name__)
+
+
+# --- Calendario y rutas ---
+def calcular_calendario(fecha=None):
+    """Devuelve el calendario (p. ej. '2025A') correspondiente a una fecha."""
+    return Calendario.clave_de(fecha)
+
+def ruta_archivo_calendario(calendario):
+    """Ruta del archivo procesado que corresponde a un calendario."""
+    nombre_archivo_final = settings.NOMBRE_ARCHIVO_BASE.replace('- ', f'-{calendario} ')
+    return os.path.join(
+        settings.RUTA_PROCESADOS,
+        calendario,
+        '1-Procesados',
+        nombre_archivo_final
+    )
+
+
+# --- Escritura ---
+def guardar_registro(registro):
+    """Crea/actualiza Asesor, Formato1, Proyecto, Alumnos y Participaciones de un registro."""
+    datos_asesor = dict(registro['asesor'])
+    asesor_obj, _ = Asesor.objects.update_or_create(
+        codigo_asesor=datos_asesor.pop('codigo_asesor'),
+        defaults=datos_asesor
+    )
+
+    formato1_obj, _ = Formato1.objects.update_or_create(
+        folio=registro['folio'],
+        defaults=registro['formato1']
+    )
+
+    proyecto_obj, _ = Proyecto.objects.update_or_create(
+        folio=registro['folio'],
+        defaults={
+            **registro['proyecto'],
+            'asesor': asesor_obj,
+            'formato1': formato1_obj,
+        }
+    )
+
+    for data in registro['integrantes']:
+        alumno_obj, _ = Alumno.objects.update_or_create(
+            codigo_estudiante=data['codigo'],
+            defaults={
+                'nombre_completo': data['nombre'],
+                'correo_electronico': data['correo']
+            }
+        )
+        # Crear la relación de participación (si es representante, save() degrada al anterior)
+        Participacion.objects.update_or_create(
+            proyecto=proyecto_obj,
+            alumno=alumno_obj,
+            defaults={'es_representante': data['es_representante']}
+        )
+    return proyecto_obj
+
+def importar_archivo(ruta, calendario):
+    """
+    Importa todas las filas del archivo en una sola transacción.
+    Devuelve (registros_exitosos, registros_fallidos).
+    """
+    # Con PERFIL_IMPORTACIONES queda un InformePerfil de cada importación
+    with perfilado.perfilar(
+        f"importar_archivo {os.path.basename(ruta)} ({calendario})", InformePerfil.IMPORTACION,
+        activo=settings.PERFIL_IMPORTACIONES,
+    ):
+        return _importar_archivo(ruta, calendario)
+
+
+def _importar_archivo(ruta, calendario):
+    with metricas.medir('sigap_importacion_etapa_segundos', etapa='lectura'):
+        df = leer_hoja(ruta)
+    metricas.incrementar('sigap_importacion_filas_total', len(df), etapa='lectura', resultado='leida')
+    dynamic_variante_keys = claves_variante(df)
+    Calendario.asegurar([calendario])
+    registros_exitosos = 0
+    registros_fallidos = 0
+    # Tiempo acumulado por etapa (se intercalan fila por fila)
+    tiempo_limpieza = tiempo_guardado = 0.0
+
+    # Conteo, representante y cola de evaluación de los proyectos se recalculan una vez al final;
+    # el registro de cambios se escribe en un solo INSERT antes del commit
+    with participantes.diferido(), cola.diferido(), transaction.atomic(), cambios.diferido():
+        for index, row in df.iterrows():
+            inicio = time.perf_counter()
+            try:
+                registro = limpiar_fila(row, calendario, dynamic_variante_keys)
+            except FilaInvalida as e:
+                folio = f" (Folio: {e.folio})" if e.folio else ""
+                logger.warning(f"Fila {index + 2}{folio}: Salto - {e}")
+                registros_fallidos += 1
+                continue
+            finally:
+                tiempo_limpieza += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            try:
+                guardar_registro(registro)
+                registros_exitosos += 1
+            except Exception as e:
+                registros_fallidos += 1
+                logger.error(f"Fila {index + 2} (Folio: {registro['folio']}): Fallo al guardar. Error: {e}")
+            finally:
+                tiempo_guardado += time.perf_counter() - inicio
+
+    metricas.observar('sigap_importacion_etapa_segundos', tiempo_limpieza, etapa='limpieza')
+    metricas.observar('sigap_importacion_etapa_segundos', tiempo_guardado, etapa='guardado')
+    metricas.incrementar('sigap_importacion_filas_total', registros_exitosos, etapa='guardado', resultado='exitosa')
+    metricas.incrementar('sigap_importacion_filas_total', registros_fallidos, etapa='guardado', resultado='fallida')
+    return registros_exitosos, registros_fallidos
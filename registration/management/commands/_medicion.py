@@ -0,0 +1,149 @@
+"""Utilidades compartidas por los comandos de medición de rendimiento."""
+import http.cookiejar
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolación lineal sobre una lista de números."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+
+
+def resumen_latencias(latencias_ms, duracion_s):
+    """Resumen estándar: peticiones, throughput y p50/p95/p99 en milisegundos."""
+    return {
+        'peticiones': len(latencias_ms),
+        'por_segundo': round(len(latencias_ms) / duracion_s, 1) if duracion_s else None,
+        'p50_ms': round(percentil(latencias_ms, 50) or 0, 2),
+        'p95_ms': round(percentil(latencias_ms, 95) or 0, 2),
+        'p99_ms': round(percentil(latencias_ms, 99) or 0, 2),
+    }
+
+
+def host_permitido(allowed_hosts):
+    """Primer host válido de ALLOWED_HOSTS para usar con el cliente de pruebas."""
+    for host in allowed_hosts:
+        host = host.strip().lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+# ====================================================================
+# Servidor real para las mediciones
+# ====================================================================
+# django.test.Client desconecta close_old_connections de request_started y
+# request_finished, así que con él cada hilo conserva su conexión sin importar
+# CONN_MAX_AGE o el pool, y no pasa por el servidor WSGI ni por la red. Las
+# mediciones de latencia se hacen contra un servidor en marcha.
+
+def cookie_sesion(usuario):
+    """Crea una sesión autenticada para `usuario` con el SESSION_ENGINE vigente y devuelve su clave."""
+    sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+    sesion[SESSION_KEY] = usuario._meta.pk.value_to_string(usuario)
+    sesion[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    sesion[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+    sesion.save()
+    return sesion.session_key
+
+
+class ClienteHTTP:
+    """
+    Sesión del admin contra un servidor en marcha. Con `sesion` usa esa cookie
+    de sesión; con `usuario` y `contrasena` inicia sesión por el formulario.
+    """
+
+    def __init__(self, base, host=None, sesion=None, usuario=None, contrasena=None):
+        self.base = base.rstrip('/')
+        self.cabeceras = {'Host': host} if host else {}
+        self.abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        if sesion is not None:
+            self.cabeceras['Cookie'] = f'{settings.SESSION_COOKIE_NAME}={sesion}'
+            return
+
+        pagina = self._abrir('/admin/login/').read().decode('utf-8', 'replace')
+        token = _CSRF.search(pagina)
+        datos = urllib.parse.urlencode({
+            'username': usuario, 'password': contrasena, 'next': '/admin/',
+            'csrfmiddlewaretoken': token.group(1) if token else '',
+        }).encode()
+        respuesta = self._abrir('/admin/login/', datos, {'Referer': self.base + '/admin/login/'})
+        if '/admin/login/' in respuesta.geturl():
+            raise ValueError("No se pudo iniciar sesión en el servidor con esas credenciales.")
+
+    def _abrir(self, url, datos=None, cabeceras=None):
+        peticion = urllib.request.Request(self.base + url, data=datos, headers={**self.cabeceras, **(cabeceras or {})})
+        return self.abridor.open(peticion, timeout=60)
+
+    def get(self, url):
+        try:
+            with self._abrir(url) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+@contextmanager
+def servidor_local(entorno=None, espera=60):
+    """
+    Levanta `manage.py runserver` (con hilos, sin autorecarga) en un puerto libre
+    con las variables de entorno extra de `entorno` y entrega su URL base.
+    Si no llega a responder lanza RuntimeError con la última línea de su salida.
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        puerto = s.getsockname()[1]
+    base = f'http://127.0.0.1:{puerto}'
+
+    # La salida va a un archivo: el registro de cada petición llenaría un PIPE
+    with tempfile.TemporaryFile(mode='w+') as salida:
+        proceso = subprocess.Popen(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'runserver',
+             '--noreload', '--skip-checks', f'127.0.0.1:{puerto}'],
+            env=dict(os.environ, **(entorno or {})), cwd=settings.BASE_DIR,
+            stdout=salida, stderr=subprocess.STDOUT,
+        )
+        try:
+            limite = time.monotonic() + espera
+            while True:
+                if proceso.poll() is not None or time.monotonic() > limite:
+                    salida.seek(0)
+                    lineas = salida.read().strip().splitlines() or ['el servidor no respondió']
+                    raise RuntimeError(lineas[-1])
+                try:
+                    urllib.request.urlopen(base + '/admin/login/', timeout=2).close()
+                    break
+                except urllib.error.HTTPError:
+                    break  # Responde, aunque sea con un error (p. ej. Host no permitido)
+                except OSError:
+                    time.sleep(0.2)
+            yield base
+        finally:
+            proceso.terminate()
+            try:
+                proceso.wait(10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from registration import carga_historica, vigilancia
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga histórica de todos los calendarios de RUTA_PROCESADOS: lee las hojas en paralelo "
+        "(un pool de procesos) y las escribe en orden de calendario con upserts por tabla. "
+        "Se puede reanudar: las hojas ya importadas (índice de vigilar_procesados) se saltan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendarios', help="Calendarios separados por coma (por defecto todos los encontrados).")
+        parser.add_argument('--procesos', type=int, help="Procesos de lectura (por defecto, uno por CPU).")
+        parser.add_argument('--reiniciar', action='store_true', help="Importar todo aunque el índice diga que ya entró.")
+        parser.add_argument('--indice', default=settings.INDICE_IMPORTACIONES, help="Ruta del índice de archivos importados.")
+
+    def handle(self, *args, **options):
+        calendarios = None
+        if options['calendarios']:
+            calendarios = {c.strip().upper() for c in options['calendarios'].split(',') if c.strip()}
+        indice = vigilancia.Indice(options['indice'])
+        archivos = carga_historica.pendientes(indice, calendarios, reiniciar=options['reiniciar'])
+        if not archivos:
+            self.stdout.write("No hay hojas pendientes de importar.")
+            return
+
+        self.stdout.write(
+            f"{len(archivos)} hojas de {len({c for c, _ in archivos})} calendarios por importar."
+        )
+        inicio = time.perf_counter()
+        resultados = carga_historica.ejecutar(
+            indice, archivos, procesos=options['procesos'], al_terminar=self._informar
+        )
+        errores = sum(1 for _, _, r in resultados if r['error'])
+        resumen = (
+            f"{sum(r['exitosos'] for _, _, r in resultados)} exitosos, "
+            f"{sum(r['fallidos'] for _, _, r in resultados)} fallidos en {time.perf_counter() - inicio:.1f} s."
+        )
+        if errores:
+            self.stderr.write(f"{resumen} {errores} hojas con error; vuelve a ejecutar para reintentarlas.")
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
+
+    def _informar(self, ruta, calendario, resultado):
+        if resultado['error']:
+            self.stderr.write(f"[{calendario}] {ruta}: error - {resultado['error']}")
+        else:
+            self.stdout.write(
+                f"[{calendario}] {ruta}: {resultado['exitosos']} exitosos, "
+                f"{resultado['fallidos']} fallidos ({resultado['duracion_s']} s)."
+            )
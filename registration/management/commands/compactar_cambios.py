@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from registration import cambios
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento del registro de cambios: deja solo la última entrada por registro entre "
+        "las anteriores a --horas y borra las anteriores a --dias (retención)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, help="Horizonte de compactación (por defecto CAMBIOS_COMPACTAR_HORAS).")
+        parser.add_argument('--dias', type=int, help="Retención (por defecto CAMBIOS_RETENCION_DIAS).")
+
+    def handle(self, *args, **options):
+        compactados = cambios.compactar(options['horas'])
+        purgados = cambios.purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{compactados} entradas compactadas y {purgados} purgadas por retención "
+            f"(corte vigente: seq {cambios.ultima_purga()})."
+        ))
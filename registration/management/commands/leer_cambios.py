@@ -0,0 +1,46 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from registration import cambios
+
+
+class Command(BaseCommand):
+    help = (
+        "Escribe como JSON por línea los cambios posteriores a --desde (mismo contenido que "
+        "/registro/cambios/), recorriendo todos los lotes. El último `seq` se informa al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=int, default=0, help="Último seq ya sincronizado.")
+        parser.add_argument('--limite', type=int, default=1000, help="Tamaño de cada lote.")
+        parser.add_argument('--modelos', help="Etiquetas separadas por coma: " + ', '.join(cambios.POR_ETIQUETA))
+        parser.add_argument('--salida', help="Archivo de salida (por defecto la salida estándar).")
+
+    def handle(self, *args, **options):
+        modelos = [m.strip().lower() for m in (options['modelos'] or '').split(',') if m.strip()]
+        desconocidos = [m for m in modelos if m not in cambios.POR_ETIQUETA]
+        if desconocidos:
+            raise CommandError(f"Modelos desconocidos: {', '.join(desconocidos)}")
+
+        desde, total = options['desde'], 0
+        salida = open(options['salida'], 'w', encoding='utf-8') if options['salida'] else sys.stdout
+        try:
+            while True:
+                lote = cambios.leer(desde, options['limite'], modelos or None)
+                if lote['requiere_resincronizar'] and total == 0:
+                    raise CommandError(
+                        f"Las entradas posteriores a {desde} ya se purgaron; se requiere una sincronización completa."
+                    )
+                for cambio in lote['cambios']:
+                    salida.write(json.dumps(cambio, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+                total += len(lote['cambios'])
+                desde = lote['siguiente']
+                if not lote['hay_mas']:
+                    break
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        self.stderr.write(f"{total} cambios; siguiente --desde {desde}")
@@ -0,0 +1,87 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Módulos pesados que no deben cargarse al arrancar (solo al importar un archivo)
+MODULOS_PESADOS = ('pandas', 'numpy', 'openpyxl')
+
+SCRIPT_ARRANQUE = (
+    "import django; django.setup(); "
+    "from django.urls import resolve, reverse; "
+    "resolve(reverse('importar_proyectos')); resolve('/admin/')"
+)
+
+PRESUPUESTO_MS = 500.0
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def medir_importaciones(script=SCRIPT_ARRANQUE):
+    """
+    Ejecuta `script` con `python -X importtime` en un proceso nuevo.
+    Devuelve (microsegundos propios sumados, {módulo de primer nivel: acumulado}, módulos pesados cargados).
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'ProyectoSIGAP.settings'))
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if resultado.returncode != 0:
+        raise CommandError(f"El arranque falló:\n{resultado.stderr[-2000:]}")
+
+    modulos = {}
+    pesados = set()
+    total_us = 0
+    for linea in resultado.stderr.splitlines():
+        m = LINEA_IMPORTTIME.match(linea)
+        if not m:
+            continue
+        propio, acumulado, sangria, nombre = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        total_us += propio
+        if nombre.split('.')[0] in MODULOS_PESADOS:
+            pesados.add(nombre.split('.')[0])
+        # Solo interesa el acumulado de los imports de primer nivel
+        if len(sangria) <= 1:
+            modulos[nombre] = modulos.get(nombre, 0) + acumulado
+    return total_us, modulos, pesados
+
+
+def mejor_medicion(repeticiones=3, script=SCRIPT_ARRANQUE):
+    """La medición más rápida de N (reduce el ruido de disco y CPU)."""
+    return min((medir_importaciones(script) for _ in range(max(1, repeticiones))), key=lambda m: m[0])
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide con `python -X importtime` el costo de django.setup() más la resolución "
+        "de URLs y falla si supera el presupuesto o si se cargan módulos pesados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS,
+                            help="Tiempo máximo de importación permitido (ms).")
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help="Se toma la mejor de N ejecuciones para reducir ruido.")
+        parser.add_argument('--top', type=int, default=15,
+                            help="Cantidad de módulos más costosos a mostrar.")
+
+    def handle(self, *args, **options):
+        total_us, modulos, pesados = mejor_medicion(options['repeticiones'])
+        total_ms = total_us / 1000
+
+        self.stdout.write(f"Tiempo de importación (django.setup + URLconf): {total_ms:.1f} ms")
+        for nombre, acumulado in sorted(modulos.items(), key=lambda x: -x[1])[:options['top']]:
+            self.stdout.write(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+        if pesados:
+            raise CommandError(f"Se cargaron módulos pesados durante el arranque: {', '.join(sorted(pesados))}")
+        if total_ms > options['presupuesto_ms']:
+            raise CommandError(
+                f"El arranque ({total_ms:.1f} ms) supera el presupuesto de {options['presupuesto_ms']:.0f} ms."
+            )
+        self.stdout.write(self.style.SUCCESS("Arranque dentro del presupuesto."))
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ._medicion import ClienteHTTP, cookie_sesion, host_permitido, resumen_latencias, servidor_local
+
+# Modo -> variables de entorno con las que se levanta el servidor
+MODOS = {
+    'sin_persistencia': {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'False', 'DB_POOL': 'False'},
+    'persistente': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': 'True', 'DB_POOL': 'False'},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de conexiones a la base de datos: levanta runserver con cada modo, "
+        "lanza peticiones HTTP concurrentes contra una URL del admin y reporta p50/p99 "
+        "con y sin conexiones persistentes/pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/admin/projects/proyecto/')
+        parser.add_argument('--peticiones', type=int, default=300)
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--usuario', help="Usuario staff para autenticar (por defecto el primer superusuario).")
+        parser.add_argument('--modos', default='sin_persistencia,persistente,pool',
+                            help="Modos a comparar, separados por coma: " + ', '.join(MODOS))
+
+    def _usuario(self, username):
+        User = get_user_model()
+        usuarios = User.objects.filter(is_staff=True, is_active=True)
+        usuario = usuarios.filter(username=username).first() if username else usuarios.filter(is_superuser=True).first()
+        if usuario is None:
+            raise CommandError("No hay un usuario staff para autenticar las peticiones (usa --usuario).")
+        return usuario
+
+    def _medir(self, base, sesion, options):
+        host = host_permitido(settings.ALLOWED_HOSTS)
+        por_hilo = max(1, options['peticiones'] // options['hilos'])
+        latencias = []
+        errores = []
+        candado = threading.Lock()
+
+        def trabajador():
+            cliente = ClienteHTTP(base, host=host, sesion=sesion)
+            propias = []
+            for _ in range(por_hilo):
+                inicio = time.perf_counter()
+                estado = cliente.get(options['url'])
+                propias.append((time.perf_counter() - inicio) * 1000)
+                if estado != 200:
+                    errores.append(estado)
+            with candado:
+                latencias.extend(propias)
+
+        hilos = [threading.Thread(target=trabajador) for _ in range(options['hilos'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        resultado = resumen_latencias(latencias, time.perf_counter() - inicio)
+        resultado['errores'] = len(errores)
+        return resultado
+
+    def handle(self, *args, **options):
+        sesion = cookie_sesion(self._usuario(options['usuario']))
+
+        self.stdout.write(f"{'modo':<18}{'peticiones':>11}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errores':>9}")
+        for modo in options['modos'].split(','):
+            modo = modo.strip()
+            if modo not in MODOS:
+                raise CommandError(f"Modo desconocido: {modo}")
+            try:
+                with servidor_local(MODOS[modo]) as base:
+                    r = self._medir(base, sesion, options)
+            except RuntimeError as e:
+                self.stdout.write(f"{modo:<18}no disponible: {e}")
+                continue
+            self.stdout.write(
+                f"{modo:<18}{r['peticiones']:>11}{r['por_segundo']:>9}{r['p50_ms']:>9}{r['p99_ms']:>9}{r['errores']:>9}"
+            )
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from ._medicion import host_permitido
+
+# Modo -> variables de entorno con las que se relanza el comando
+MODOS = {
+    'base': {'SESION_MODO': 'db', 'AUTH_CACHEADA': 'False'},
+    'sesion_cacheada': {'SESION_MODO': 'cached_db', 'AUTH_CACHEADA': 'False'},
+    'cacheado': {'SESION_MODO': 'cached_db', 'AUTH_CACHEADA': 'True'},
+}
+
+# Consultas que no dependen de la vista: se reconocen por la tabla principal
+# (no por los JOIN: el historial del admin une django_admin_log con auth_user)
+TABLAS_FIJAS = (('sesion', 'django_session'), ('auth', 'auth_'))
+TABLA_PRINCIPAL = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+["`]?(\w+)', re.IGNORECASE)
+
+
+def _clasificar(sql):
+    encontrada = TABLA_PRINCIPAL.search(sql)
+    tabla = encontrada.group(1) if encontrada else ''
+    for nombre, prefijo in TABLAS_FIJAS:
+        if tabla.startswith(prefijo):
+            return nombre
+    return 'vista'
+
+
+class Command(BaseCommand):
+    help = (
+        "Cuenta las consultas por petición del admin (sesión, usuario y permisos, y las "
+        "de la vista) con cada modo de sesión y con o sin el usuario cacheado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--urls', default='/admin/,/admin/projects/proyecto/',
+                            help="URLs a medir, separadas por coma.")
+        parser.add_argument('--peticiones', type=int, default=20, help="Peticiones medidas por URL.")
+        parser.add_argument('--usuario', help=(
+            "Usuario staff para autenticar (por defecto uno staff que no sea superusuario, "
+            "porque solo a esos se les consultan permisos)."
+        ))
+        parser.add_argument('--modos', default=','.join(MODOS),
+                            help="Modos a comparar, separados por coma: " + ', '.join(MODOS))
+        parser.add_argument('--interno', action='store_true', help="Ejecuta un solo modo con la configuración actual.")
+
+    def _usuario(self, username):
+        User = get_user_model()
+        usuarios = User.objects.filter(is_staff=True, is_active=True).order_by('pk')
+        if username:
+            usuario = usuarios.filter(username=username).first()
+        else:
+            usuario = usuarios.filter(is_superuser=False).first() or usuarios.first()
+        if usuario is None:
+            raise CommandError("No hay un usuario staff para autenticar las peticiones (usa --usuario).")
+        return usuario
+
+    def _medir(self, options):
+        cliente = Client(HTTP_HOST=host_permitido(settings.ALLOWED_HOSTS))
+        cliente.force_login(self._usuario(options['usuario']))
+        resultado = {}
+        for url in options['urls'].split(','):
+            url = url.strip()
+            # Calienta las cachés de la vista para que solo varíe lo fijo de cada petición
+            for _ in range(2):
+                cliente.get(url)
+            conteo = {'sesion': 0, 'auth': 0, 'vista': 0}
+            estados = set()
+            for _ in range(options['peticiones']):
+                with ExitStack() as pila:
+                    capturas = [pila.enter_context(CaptureQueriesContext(c)) for c in connections.all()]
+                    estados.add(cliente.get(url).status_code)
+                for captura in capturas:
+                    for consulta in captura.captured_queries:
+                        conteo[_clasificar(consulta['sql'])] += 1
+            resultado[url] = {
+                clave: round(valor / options['peticiones'], 2) for clave, valor in conteo.items()
+            }
+            resultado[url]['estados'] = sorted(estados)
+        return resultado
+
+    def handle(self, *args, **options):
+        if options['interno']:
+            self.stdout.write(json.dumps(self._medir(options)))
+            return
+
+        argumentos = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'medir_consultas', '--interno',
+            '--urls', options['urls'], '--peticiones', str(options['peticiones']),
+        ]
+        if options['usuario']:
+            argumentos += ['--usuario', options['usuario']]
+
+        self.stdout.write(f"{'modo':<17}{'url':<32}{'sesión':>8}{'auth':>7}{'vista':>7}{'total':>7}  estados")
+        for modo in options['modos'].split(','):
+            modo = modo.strip()
+            if modo not in MODOS:
+                raise CommandError(f"Modo desconocido: {modo}")
+            proceso = subprocess.run(
+                argumentos, env=dict(os.environ, **MODOS[modo]),
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+            )
+            if proceso.returncode != 0:
+                ultima = (proceso.stderr.strip().splitlines() or ['error desconocido'])[-1]
+                self.stdout.write(f"{modo:<17}no disponible: {ultima}")
+                continue
+            for url, r in json.loads(proceso.stdout.strip().splitlines()[-1]).items():
+                total = round(r['sesion'] + r['auth'] + r['vista'], 2)
+                self.stdout.write(
+                    f"{modo:<17}{url:<32}{r['sesion']:>8}{r['auth']:>7}{r['vista']:>7}{total:>7}  "
+                    f"{','.join(map(str, r['estados']))}"
+                )
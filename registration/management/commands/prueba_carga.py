@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from people.models import Alumno, Asesor, Evaluador
+from projects.models import Proyecto
+from ._medicion import ClienteHTTP, cookie_sesion, host_permitido, resumen_latencias, servidor_local
+
+
+# --- Flujos: cada uno arma una URL a partir de una muestra de datos reales ---
+def _termino(rng, nombres):
+    return rng.choice(nombres).split()[0][:4] if nombres else 'A'
+
+
+FLUJOS = {
+    'proyectos_listado': lambda rng, m: '/admin/projects/proyecto/',
+    'proyectos_filtro': lambda rng, m: (
+        f"/admin/projects/proyecto/?calendario_registro={rng.choice(m['calendarios'])}"
+        f"&modalidad={urllib.parse.quote(rng.choice(m['modalidades']))}"
+    ),
+    'proyectos_busqueda': lambda rng, m: f"/admin/projects/proyecto/?q={_termino(rng, m['alumnos'])}",
+    'proyectos_pagina': lambda rng, m: f"/admin/projects/proyecto/?p={rng.randint(1, m['paginas'])}",
+    'proyecto_detalle': lambda rng, m: f"/admin/projects/proyecto/{urllib.parse.quote(rng.choice(m['folios']))}/change/",
+    'evaluaciones_listado': lambda rng, m: '/admin/evaluation/evaluaciones/',
+    'evaluaciones_filtro': lambda rng, m: (
+        f"/admin/evaluation/evaluaciones/?tipo_revision={rng.choice(('FORMA', 'FONDO', 'FINAL'))}"
+    ),
+    'autocompletar_asesor': lambda rng, m: (
+        "/admin/autocomplete/?app_label=projects&model_name=proyecto&field_name=asesor"
+        f"&term={_termino(rng, m['asesores'])}"
+    ),
+    'autocompletar_alumno': lambda rng, m: (
+        "/admin/autocomplete/?app_label=projects&model_name=participacion&field_name=alumno"
+        f"&term={_termino(rng, m['alumnos'])}"
+    ),
+    'autocompletar_evaluador': lambda rng, m: (
+        "/admin/autocomplete/?app_label=projects&model_name=proyecto&field_name=evaluador"
+        f"&term={_termino(rng, m['evaluadores'])}"
+    ),
+    'importar_formulario': lambda rng, m: '/registro/importar/',
+    'cola_evaluador': lambda rng, m: f"/evaluacion/?evaluador={rng.choice(m['codigos_evaluador'])}",
+}
+
+
+def _muestra(tamano=500):
+    """Folios, nombres y códigos reales para variar las peticiones (una sola vez al inicio)."""
+    folios = list(Proyecto.objects.order_by('?').values_list('folio', flat=True)[:tamano])
+    if not folios:
+        raise CommandError("No hay proyectos; siembra la base primero (sembrar_datos).")
+    return {
+        'folios': folios,
+        'calendarios': list(Proyecto.objects.order_by().values_list('calendario_registro', flat=True).distinct()),
+        'modalidades': [valor for valor, _ in Proyecto.MODALIDAD_CHOICES],
+        'alumnos': list(Alumno.objects.order_by('?').values_list('nombre_completo', flat=True)[:tamano]),
+        'asesores': list(Asesor.objects.order_by('?').values_list('nombre_completo', flat=True)[:tamano]),
+        'evaluadores': list(Evaluador.objects.order_by('?').values_list('nombre_completo', flat=True)[:tamano]),
+        'codigos_evaluador': list(Evaluador.objects.order_by('?').values_list('pk', flat=True)[:tamano]) or ['-'],
+        'paginas': max(1, Proyecto.objects.count() // 100),
+    }
+
+
+class _ClienteLocal:
+    """
+    Cliente de pruebas de Django en el mismo proceso (--en-proceso). Solo sirve
+    como prueba de humo de los flujos: no pasa por WSGI ni por la red y cada
+    hilo conserva su conexión a la base (ver _medicion.py), así que sus
+    latencias no representan las de producción.
+    """
+
+    def __init__(self, usuario):
+        self.cliente = Client(HTTP_HOST=host_permitido(settings.ALLOWED_HOSTS))
+        self.cliente.force_login(usuario)
+
+    def get(self, url):
+        return self.cliente.get(url).status_code
+
+
+class Command(BaseCommand):
+    help = (
+        "Generador de carga: recorre flujos autenticados del admin (listados, filtros, búsquedas, "
+        "detalle, autocompletado, importación, portal de evaluadores) con varios hilos y reporta "
+        "throughput y p50/p95/p99 por flujo. Mide contra --servidor o, sin él, contra un runserver "
+        "que levanta en un puerto libre."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=600, help="Total de peticiones.")
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--flujos', help="Flujos separados por coma (por defecto todos): " + ', '.join(FLUJOS))
+        parser.add_argument('--usuario', help="Usuario staff (por defecto el primer superusuario).")
+        parser.add_argument('--servidor', help="URL base de un servidor en marcha, p. ej. http://127.0.0.1:8000. "
+                                               "Sin ella se levanta runserver en un puerto libre.")
+        parser.add_argument('--contrasena', help="Contraseña del usuario (obligatoria con --servidor).")
+        parser.add_argument('--en-proceso', action='store_true',
+                            help="Prueba de humo: peticiones con el cliente de pruebas en este proceso, sin "
+                                 "servidor. Las latencias no son comparables con las de un servidor.")
+        parser.add_argument('--calentamiento', type=int, default=1,
+                            help="Peticiones por flujo antes de medir (llenan cachés y conexiones).")
+        parser.add_argument('--semilla', type=int, default=2025)
+
+    def _usuario(self, username):
+        User = get_user_model()
+        usuarios = User.objects.filter(is_staff=True, is_active=True)
+        usuario = usuarios.filter(username=username).first() if username else usuarios.filter(is_superuser=True).first()
+        if usuario is None:
+            raise CommandError("No hay un usuario staff para autenticar las peticiones (usa --usuario).")
+        return usuario
+
+    def _fabrica_clientes(self, usuario, options, pila):
+        """Función que crea un cliente autenticado por hilo, según el modo elegido."""
+        if options['en_proceso']:
+            self.stderr.write("Modo --en-proceso: prueba de humo, las latencias no representan a un servidor.")
+            return lambda: _ClienteLocal(usuario)
+        if options['servidor']:
+            def crear():
+                try:
+                    return ClienteHTTP(options['servidor'], usuario=usuario.get_username(),
+                                       contrasena=options['contrasena'])
+                except ValueError as e:
+                    raise CommandError(str(e))
+            return crear
+        try:
+            base = pila.enter_context(servidor_local())
+        except RuntimeError as e:
+            raise CommandError(f"No se pudo levantar el servidor: {e}")
+        host, sesion = host_permitido(settings.ALLOWED_HOSTS), cookie_sesion(usuario)
+        self.stdout.write(f"Servidor local en {base}")
+        return lambda: ClienteHTTP(base, host=host, sesion=sesion)
+
+    def handle(self, *args, **options):
+        with ExitStack() as pila:
+            self._ejecutar(pila, options)
+
+    def _ejecutar(self, pila, options):
+        flujos = [f.strip() for f in (options['flujos'] or ','.join(FLUJOS)).split(',') if f.strip()]
+        desconocidos = [f for f in flujos if f not in FLUJOS]
+        if desconocidos:
+            raise CommandError(f"Flujos desconocidos: {', '.join(desconocidos)}")
+        if options['servidor'] and options['en_proceso']:
+            raise CommandError("--servidor y --en-proceso son excluyentes.")
+        if options['servidor'] and not options['contrasena']:
+            raise CommandError("Con --servidor se necesita --contrasena.")
+
+        usuario = self._usuario(options['usuario'])
+        muestra = _muestra()
+        crear_cliente = self._fabrica_clientes(usuario, options, pila)
+        por_hilo = max(1, options['peticiones'] // options['hilos'])
+        latencias = defaultdict(list)
+        errores = defaultdict(int)
+        candado = threading.Lock()
+
+        calentador = crear_cliente()
+        rng = random.Random(options['semilla'])
+        for flujo in flujos:
+            for _ in range(options['calentamiento']):
+                calentador.get(FLUJOS[flujo](rng, muestra))
+
+        def trabajador(numero):
+            cliente = crear_cliente()
+            rng = random.Random(options['semilla'] + numero)
+            propias, fallidas = defaultdict(list), defaultdict(int)
+            for i in range(por_hilo):
+                # Reparto parejo de flujos entre hilos, en orden distinto en cada uno
+                flujo = flujos[(i + numero) % len(flujos)]
+                url = FLUJOS[flujo](rng, muestra)
+                inicio = time.perf_counter()
+                estado = cliente.get(url)
+                propias[flujo].append((time.perf_counter() - inicio) * 1000)
+                if estado != 200:
+                    fallidas[flujo] += 1
+            with candado:
+                for flujo, valores in propias.items():
+                    latencias[flujo].extend(valores)
+                for flujo, total in fallidas.items():
+                    errores[flujo] += total
+
+        hilos = [threading.Thread(target=trabajador, args=(n,)) for n in range(options['hilos'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f"{'flujo':<26}{'peticiones':>11}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}"
+        )
+        for flujo in flujos:
+            r = resumen_latencias(latencias[flujo], duracion)
+            self.stdout.write(
+                f"{flujo:<26}{r['peticiones']:>11}{r['por_segundo']:>9}{r['p50_ms']:>10}"
+                f"{r['p95_ms']:>10}{r['p99_ms']:>10}{errores[flujo]:>9}"
+            )
+        total = resumen_latencias([v for valores in latencias.values() for v in valores], duracion)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'total':<26}{total['peticiones']:>11}{total['por_segundo']:>9}{total['p50_ms']:>10}"
+            f"{total['p95_ms']:>10}{total['p99_ms']:>10}{sum(errores.values()):>9}"
+        ))
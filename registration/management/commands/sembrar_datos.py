@@ -0,0 +1,187 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from people.models import Alumno, Asesor, Evaluador
+from projects.models import Calendario, Proyecto, Formato1, Participacion, Prorroga
+from projects import participantes
+from evaluation.models import Evaluaciones
+from evaluation import cola
+from ProyectoSIGAP.cache import invalidar_modelo
+from registration.importador import calcular_calendario
+
+# Los códigos sembrados llevan prefijo propio para no chocar con datos reales
+PREFIJO_ALUMNO = '9'
+PREFIJO_ASESOR = 'SA'
+PREFIJO_EVALUADOR = 'SE'
+
+NOMBRES = (
+    'JUAN', 'MARIA', 'JOSE', 'GUADALUPE', 'LUIS', 'ANA', 'CARLOS', 'SOFIA', 'JORGE', 'FERNANDA',
+    'MIGUEL', 'DANIELA', 'ALEJANDRO', 'VALERIA', 'RICARDO', 'PAOLA', 'EDUARDO', 'ANDREA', 'RAUL', 'KARLA',
+)
+APELLIDOS = (
+    'HERNANDEZ', 'GARCIA', 'MARTINEZ', 'LOPEZ', 'GONZALEZ', 'RODRIGUEZ', 'PEREZ', 'SANCHEZ', 'RAMIREZ',
+    'CRUZ', 'FLORES', 'GOMEZ', 'MORALES', 'VAZQUEZ', 'JIMENEZ', 'REYES', 'DIAZ', 'TORRES', 'GUTIERREZ', 'RUIZ',
+)
+PALABRAS = (
+    'ANALISIS', 'DETERMINACION', 'CUANTIFICACION', 'ACTIVIDAD', 'ANTIMICROBIANA', 'EXTRACTO', 'PLANTA',
+    'MEDICINAL', 'VALIDACION', 'METODO', 'CROMATOGRAFICO', 'ESTABILIDAD', 'FORMULACION', 'TABLETAS',
+    'EVALUACION', 'TOXICIDAD', 'AGUA', 'POTABLE', 'MUNICIPIO', 'CONTROL', 'CALIDAD', 'MICROBIOLOGICO',
+    'SINTESIS', 'COMPUESTOS', 'BIOACTIVOS', 'PREVALENCIA', 'PARASITOSIS', 'ESCOLARES', 'GUADALAJARA',
+)
+ESPECIALIZACIONES = ('GENERAL', 'PROTOTIPO', 'TRABAJO DE INVESTIGACION', 'MATERIALES EDUCATIVOS', 'REPORTE',
+                     'VINCULACION SOCIAL')
+
+
+def calendarios_anteriores(cantidad):
+    """Los `cantidad` calendarios previos al vigente, del más antiguo al más reciente."""
+    actual = calcular_calendario()
+    anio, letra = int(actual[:4]), actual[4]
+    resultado = []
+    for _ in range(cantidad):
+        anio, letra = (anio, 'A') if letra == 'B' else (anio - 1, 'B')
+        resultado.append(f"{anio}{letra}")
+    return resultado[::-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra una base de datos de volumen realista para pruebas de carga: alumnos, asesores, "
+        "evaluadores y varios calendarios de proyectos con participaciones, prórrogas y "
+        "evaluaciones. Todo con bulk_create y en mayúsculas como lo dejarían los save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alumnos', type=int, default=100_000)
+        parser.add_argument('--asesores', type=int, default=3_000)
+        parser.add_argument('--evaluadores', type=int, default=1_000)
+        parser.add_argument('--calendarios', help="Calendarios separados por coma (por defecto los 4 anteriores al vigente).")
+        parser.add_argument('--proyectos', type=int, default=8_000, help="Proyectos por calendario.")
+        parser.add_argument('--semilla', type=int, default=2025)
+        parser.add_argument('--lote', type=int, default=5_000, help="Tamaño de lote de bulk_create.")
+
+    def _personas(self, rng, options):
+        nombre = lambda: f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        alumnos = [
+            Alumno(codigo_estudiante=f"{PREFIJO_ALUMNO}{i:08d}", nombre_completo=nombre(),
+                   correo_electronico=f"ALUMNO{i}@ALUMNOS.UDG.MX")
+            for i in range(options['alumnos'])
+        ]
+        asesores = [
+            Asesor(codigo_asesor=f"{PREFIJO_ASESOR}{i:05d}", nombre_completo=nombre(),
+                   correo_electronico=f"ASESOR{i}@ACADEMICOS.UDG.MX")
+            for i in range(options['asesores'])
+        ]
+        evaluadores = [
+            Evaluador(codigo_evaluador=f"{PREFIJO_EVALUADOR}{i:05d}", nombre_completo=nombre(),
+                      correo_evaluador=f"EVALUADOR{i}@ACADEMICOS.UDG.MX",
+                      especializacion=rng.choice(ESPECIALIZACIONES))
+            for i in range(options['evaluadores'])
+        ]
+        with transaction.atomic():
+            for modelo, objetos in ((Alumno, alumnos), (Asesor, asesores), (Evaluador, evaluadores)):
+                # Volver a sembrar no duplica personas
+                modelo.objects.bulk_create(objetos, batch_size=options['lote'], ignore_conflicts=True)
+                invalidar_modelo(modelo)
+        return [a.pk for a in alumnos], [a.pk for a in asesores], [e.pk for e in evaluadores]
+
+    def _calendario(self, rng, calendario, alumnos, asesores, evaluadores, options):
+        modalidades = [valor for valor, _ in Proyecto.MODALIDAD_CHOICES]
+        revisiones = [valor for valor, _ in Evaluaciones.REVISION_CHOICES]
+        texto = lambda n: ' '.join(rng.choice(PALABRAS) for _ in range(n))
+
+        # Cada alumno participa a lo más en un proyecto por calendario
+        integrantes = rng.sample(alumnos, min(len(alumnos), options['proyectos'] * 3))
+        formatos, proyectos, participaciones, prorrogas, evaluaciones = [], [], [], [], []
+        posicion = 0
+        for _ in range(options['proyectos']):
+            tamano = rng.choices((1, 2, 3), weights=(3, 4, 3))[0]
+            grupo = integrantes[posicion:posicion + tamano]
+            posicion += tamano
+            if not grupo:
+                break
+            folio = f"{grupo[0]}-{calendario}"
+            evaluador = rng.choice(evaluadores) if evaluadores and rng.random() < 0.85 else None
+            formatos.append(Formato1(
+                folio=folio, introduccion=texto(60), justificacion=texto(40), objetivo=texto(20), resumen=texto(50),
+            ))
+            proyectos.append(Proyecto(
+                folio=folio, titulo=texto(rng.randint(5, 12)), asesor_id=rng.choice(asesores), evaluador_id=evaluador,
+                formato1_id=folio, modalidad=rng.choice(modalidades), nivel_competencia=rng.choice(('MODULO 1', 'MODULO 2', 'MODULO 3')),
+                calendario_registro_id=calendario, evidencia_url=f"https://drive.google.com/file/d/{folio}/view",
+            ))
+            participaciones.extend(
+                Participacion(proyecto_id=folio, alumno_id=codigo, es_representante=(i == 0))
+                for i, codigo in enumerate(grupo)
+            )
+            if rng.random() < 0.05:
+                prorrogas.append(Prorroga(proyecto_id=folio, justificacion=texto(30), calendario_presentacion=calendario))
+            # Historial: avanza FORMA -> FONDO -> FINAL con algunas correcciones de por medio
+            if evaluador:
+                etapa = 0
+                for _ in range(rng.randint(0, 5)):
+                    if etapa >= len(revisiones):
+                        break
+                    resolutivo = rng.choices(('APROBADO', 'PENDIENTE', 'RECHAZADO'), weights=(6, 3, 1))[0]
+                    evaluaciones.append(Evaluaciones(
+                        proyecto_id=folio, evaluador_id=evaluador, tipo_revision=revisiones[etapa],
+                        resolutivo=resolutivo, observaciones=texto(rng.randint(10, 120)),
+                    ))
+                    if resolutivo == 'APROBADO':
+                        etapa += 1
+                    elif resolutivo == 'RECHAZADO' and etapa == len(revisiones) - 1:
+                        break
+                if etapa == len(revisiones):
+                    proyectos[-1].dictamen = 'APROBADO'
+
+        lote = options['lote']
+        with transaction.atomic():
+            Formato1.objects.bulk_create(formatos, batch_size=lote)
+            Proyecto.objects.bulk_create(proyectos, batch_size=lote)
+            Participacion.objects.bulk_create(participaciones, batch_size=lote)
+            Prorroga.objects.bulk_create(prorrogas, batch_size=lote)
+            Evaluaciones.objects.bulk_create(evaluaciones, batch_size=lote)
+        for modelo in (Formato1, Proyecto, Participacion, Prorroga, Evaluaciones):
+            invalidar_modelo(modelo)
+
+        # bulk_create no dispara señales: campos derivados y colas de evaluación
+        participantes.recalcular(calendario=calendario)
+        cola.recalcular(calendario=calendario)
+        return len(proyectos), len(participaciones), len(prorrogas), len(evaluaciones)
+
+    def handle(self, *args, **options):
+        if options['calendarios']:
+            calendarios = [c.strip().upper() for c in options['calendarios'].split(',') if c.strip()]
+        else:
+            calendarios = calendarios_anteriores(4)
+        ocupados = sorted(set(
+            Proyecto.objects.filter(calendario_registro__in=calendarios).values_list('calendario_registro', flat=True)
+        ))
+        if ocupados:
+            raise CommandError(f"Los calendarios {', '.join(ocupados)} ya tienen proyectos; elige otros con --calendarios.")
+        if options['alumnos'] < 1 or options['asesores'] < 1:
+            raise CommandError("Se necesita al menos un alumno y un asesor.")
+
+        rng = random.Random(options['semilla'])
+        inicio = time.perf_counter()
+        Calendario.asegurar(calendarios)
+        alumnos, asesores, evaluadores = self._personas(rng, options)
+        self.stdout.write(
+            f"Personas: {len(alumnos)} alumnos, {len(asesores)} asesores, {len(evaluadores)} evaluadores "
+            f"({time.perf_counter() - inicio:.1f} s)."
+        )
+        for calendario in calendarios:
+            parcial = time.perf_counter()
+            proyectos, participaciones, prorrogas, evaluaciones = self._calendario(
+                rng, calendario, alumnos, asesores, evaluadores, options
+            )
+            self.stdout.write(
+                f"{calendario}: {proyectos} proyectos, {participaciones} participaciones, {prorrogas} prórrogas, "
+                f"{evaluaciones} evaluaciones ({time.perf_counter() - parcial:.1f} s)."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Siembra completa en {time.perf_counter() - inicio:.1f} s. "
+            f"Ejecuta `indexar_formatos` si se usará la búsqueda de propuestas similares."
+        ))
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from registration import vigilancia
+
+
+class Command(BaseCommand):
+    help = (
+        "Vigila RUTA_PROCESADOS e importa automáticamente las hojas de calendario nuevas "
+        "o cuyo contenido cambió (inotify, o sondeo si no está disponible)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--espera', type=float, default=10, help="Segundos sin cambios antes de importar un archivo.")
+        parser.add_argument('--sondeo', action='store_true', help="Usar sondeo aunque inotify esté disponible.")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos entre revisiones en modo sondeo.")
+        parser.add_argument('--reescaneo', type=float, default=600, help="Segundos entre revisiones completas del árbol.")
+        parser.add_argument('--indice', default=settings.INDICE_IMPORTACIONES, help="Ruta del índice de archivos importados.")
+        parser.add_argument('--una-vez', action='store_true', help="Importar lo pendiente y terminar (útil en cron).")
+
+    def handle(self, *args, **options):
+        vigilante = vigilancia.Vigilante(
+            vigilancia.Indice(options['indice']),
+            espera=options['espera'],
+            sondeo=options['sondeo'],
+            intervalo=options['intervalo'],
+        )
+        if options['una_vez']:
+            for resultado in vigilante.ejecutar(una_vez=True):
+                self._informar(*resultado)
+            return
+
+        self.stdout.write(f"Vigilando {settings.RUTA_PROCESADOS} (Ctrl+C para terminar)...")
+        try:
+            vigilante.ejecutar(reescaneo=options['reescaneo'], al_importar=self._informar)
+        except KeyboardInterrupt:
+            self.stdout.write("Vigilancia detenida.")
+
+    def _informar(self, ruta, calendario, resultado):
+        if resultado['error']:
+            self.stderr.write(f"[{calendario}] {ruta}: error - {resultado['error']}")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"[{calendario}] {ruta}: {resultado['exitosos']} exitosos, "
+                f"{resultado['fallidos']} fallidos ({resultado['duracion_s']} s)."
+            ))
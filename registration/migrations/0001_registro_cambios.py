@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgaCambios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hasta_seq', models.BigIntegerField(verbose_name='HASTA SECUENCIA')),
+                ('eliminados', models.PositiveIntegerField(default=0, verbose_name='ELIMINADOS')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='FECHA')),
+            ],
+            options={
+                'verbose_name': 'Purga de Cambios',
+                'verbose_name_plural': 'Purgas de Cambios',
+            },
+        ),
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False, verbose_name='SECUENCIA')),
+                ('modelo', models.CharField(max_length=50, verbose_name='MODELO')),
+                ('clave', models.CharField(max_length=100, verbose_name='CLAVE')),
+                ('operacion', models.CharField(choices=[('I', 'Alta'), ('U', 'Modificación'), ('D', 'Baja')], max_length=1, verbose_name='OPERACIÓN')),
+                ('registrado', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='REGISTRADO')),
+            ],
+            options={
+                'verbose_name': 'Cambio',
+                'verbose_name_plural': 'Cambios',
+                'indexes': [models.Index(fields=['modelo', 'clave', 'seq'], name='cambio_registro_seq')],
+            },
+        ),
+    ]
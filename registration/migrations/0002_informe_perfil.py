@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0001_registro_cambios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InformePerfil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='CREADO')),
+                ('tipo', models.CharField(choices=[('PETICION', 'Petición'), ('IMPORTACION', 'Importación')], max_length=12, verbose_name='TIPO')),
+                ('nombre', models.CharField(max_length=255, verbose_name='PETICIÓN / ARCHIVO')),
+                ('usuario', models.CharField(blank=True, max_length=150, verbose_name='USUARIO')),
+                ('duracion_ms', models.FloatField(verbose_name='DURACIÓN (MS)')),
+                ('consultas', models.PositiveIntegerField(default=0, verbose_name='CONSULTAS SQL')),
+                ('consultas_ms', models.FloatField(default=0, verbose_name='TIEMPO SQL (MS)')),
+                ('funciones', models.TextField(blank=True, verbose_name='FUNCIONES POR TIEMPO PROPIO')),
+                ('acumulado', models.TextField(blank=True, verbose_name='FUNCIONES POR TIEMPO ACUMULADO')),
+                ('llamadas', models.TextField(blank=True, verbose_name='LLAMADAS DE LAS MÁS COSTOSAS')),
+                ('sql', models.JSONField(default=list, verbose_name='CONSULTAS AGRUPADAS')),
+                ('datos', models.BinaryField(blank=True, null=True, verbose_name='DATOS PSTATS')),
+            ],
+            options={
+                'verbose_name': 'Informe de Perfilado',
+                'verbose_name_plural': 'Informes de Perfilado',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0002_informe_perfil'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandadoCambios',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'Candado de Cambios',
+                'verbose_name_plural': 'Candado de Cambios',
+            },
+        ),
+    ]
@@ -1,3 +1,98 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+# ====================================================================
+# Registro de cambios (solo se agrega; ver registration/cambios.py)
+# ====================================================================
+class Cambio(models.Model):
+    """Un alta, cambio o baja de un registro sincronizable, en orden de `seq`."""
+    ALTA = 'I'
+    MODIFICACION = 'U'
+    BAJA = 'D'
+    OPERACION_CHOICES = [
+        (ALTA, 'Alta'),
+        (MODIFICACION, 'Modificación'),
+        (BAJA, 'Baja'),
+    ]
+
+    seq = models.BigAutoField(primary_key=True, verbose_name="SECUENCIA")
+    modelo = models.CharField(max_length=50, verbose_name="MODELO")
+    clave = models.CharField(max_length=100, verbose_name="CLAVE")
+    operacion = models.CharField(max_length=1, choices=OPERACION_CHOICES, verbose_name="OPERACIÓN")
+    registrado = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="REGISTRADO")
+
+    class Meta:
+        verbose_name = "Cambio"
+        verbose_name_plural = "Cambios"
+        indexes = [
+            # Compactación: entradas posteriores del mismo registro
+            models.Index(fields=['modelo', 'clave', 'seq'], name='cambio_registro_seq'),
+        ]
+
+    def __str__(self):
+        return f"{self.seq} {self.operacion} {self.modelo}:{self.clave}"
+
+
+class CandadoCambios(models.Model):
+    """Fila única que se bloquea al escribir cambios: ordena `seq` según el commit."""
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+
+    class Meta:
+        verbose_name = "Candado de Cambios"
+        verbose_name_plural = "Candado de Cambios"
+
+
+class PurgaCambios(models.Model):
+    """Cada purga por retención; quien lea desde antes de `hasta_seq` debe resincronizar completo."""
+    hasta_seq = models.BigIntegerField(verbose_name="HASTA SECUENCIA")
+    eliminados = models.PositiveIntegerField(default=0, verbose_name="ELIMINADOS")
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="FECHA")
+
+    class Meta:
+        verbose_name = "Purga de Cambios"
+        verbose_name_plural = "Purgas de Cambios"
+
+    def __str__(self):
+        return f"Purga hasta {self.hasta_seq} ({self.fecha:%Y-%m-%d})"
+
+
+# ====================================================================
+# Informes de perfilado (ver ProyectoSIGAP/perfilado.py)
+# ====================================================================
+class InformePerfil(models.Model):
+    """Resultado de perfilar una petición o una importación; se conservan solo los más recientes."""
+    PETICION = 'PETICION'
+    IMPORTACION = 'IMPORTACION'
+    TIPO_CHOICES = [
+        (PETICION, 'Petición'),
+        (IMPORTACION, 'Importación'),
+    ]
+
+    creado = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="CREADO")
+    tipo = models.CharField(max_length=12, choices=TIPO_CHOICES, verbose_name="TIPO")
+    nombre = models.CharField(max_length=255, verbose_name="PETICIÓN / ARCHIVO")
+    usuario = models.CharField(max_length=150, blank=True, verbose_name="USUARIO")
+    duracion_ms = models.FloatField(verbose_name="DURACIÓN (MS)")
+    consultas = models.PositiveIntegerField(default=0, verbose_name="CONSULTAS SQL")
+    consultas_ms = models.FloatField(default=0, verbose_name="TIEMPO SQL (MS)")
+    funciones = models.TextField(blank=True, verbose_name="FUNCIONES POR TIEMPO PROPIO")
+    acumulado = models.TextField(blank=True, verbose_name="FUNCIONES POR TIEMPO ACUMULADO")
+    llamadas = models.TextField(blank=True, verbose_name="LLAMADAS DE LAS MÁS COSTOSAS")
+    sql = models.JSONField(default=list, verbose_name="CONSULTAS AGRUPADAS")
+    datos = models.BinaryField(null=True, blank=True, verbose_name="DATOS PSTATS")
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = "Informe de Perfilado"
+        verbose_name_plural = "Informes de Perfilado"
+
+    @classmethod
+    def recortar(cls, maximo):
+        """Borra los informes más viejos que los `maximo` más recientes."""
+        sobrantes = list(cls.objects.order_by('-creado', '-pk').values_list('pk', flat=True)[maximo:])
+        if sobrantes:
+            cls.objects.filter(pk__in=sobrantes).delete()
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.nombre} ({self.duracion_ms:.0f} ms)"
@@ -0,0 +1,55 @@
+"""
+Manejador de subida para las hojas de calendario.
+
+Escribe el archivo a un temporal por bloques (nunca completo en memoria),
+calcula su SHA-256 mientras llega y corta la subida en cuanto supera
+IMPORTACION_TAMANO_MAXIMO_MB. Debe instalarse antes de que se lea
+request.POST (ver registration/views.py).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+
+EXTENSIONES_PERMITIDAS = ('.xlsx',)
+
+
+def tamano_maximo():
+    return settings.IMPORTACION_TAMANO_MAXIMO_MB * 1024 * 1024
+
+
+class SubidaHojaHandler(TemporaryFileUploadHandler):
+    """Deja en el archivo subido los atributos `sha256` y `tamano_subido`."""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Si el cliente ya declara un cuerpo demasiado grande no se escribe nada a disco
+        # (StopUpload solo se puede lanzar una vez iniciado el análisis, en new_file)
+        self.excedido = bool(content_length and content_length > tamano_maximo() + 64 * 1024)
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def new_file(self, *args, **kwargs):
+        if self.excedido:
+            self._rechazar()
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.recibidos = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.recibidos += len(raw_data)
+        if self.recibidos > tamano_maximo():
+            self._rechazar()
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        archivo = super().file_complete(file_size)
+        archivo.sha256 = self.digest.hexdigest()
+        archivo.tamano_subido = self.recibidos
+        return archivo
+
+    def _rechazar(self):
+        self.request.error_subida = (
+            f"El archivo supera el máximo permitido de {settings.IMPORTACION_TAMANO_MAXIMO_MB} MB."
+        )
+        # Se descarta el resto del cuerpo sin guardarlo para poder responder con el error
+        raise StopUpload(connection_reset=False)
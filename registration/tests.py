@@ -1,3 +1,301 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DataError, IntegrityError, OperationalError, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from people.models import Alumno
+from projects.models import Calendario, Formato1, Participacion, Proyecto
+from ProyectoSIGAP.pruebas import AJUSTES_PRUEBAS
+from . import cambios, carga_historica, hoja, validacion, views, vigilancia
+from .models import Cambio
+from .management.commands.medir_arranque import PRESUPUESTO_MS, medir_importaciones, mejor_medicion
+
+SCRIPT_URLCONF = "import django; django.setup(); import ProyectoSIGAP.urls"
+
+
+class ArranqueTests(SimpleTestCase):
+    """El arranque no debe volver a cargar pandas/numpy/openpyxl (ver registration/importador.py)."""
+
+    def test_arranque_sin_modulos_pesados(self):
+        _, _, pesados = medir_importaciones(SCRIPT_URLCONF)
+        self.assertEqual(pesados, set(), f"Módulos pesados cargados al arrancar: {sorted(pesados)}")
+
+    def test_arranque_dentro_del_presupuesto(self):
+        total_us, _, _ = mejor_medicion(3, SCRIPT_URLCONF)
+        self.assertLessEqual(total_us / 1000, PRESUPUESTO_MS)
+
+    @skipUnless(importlib.util.find_spec('pandas'), "pandas no está instalado")
+    def test_detecta_modulos_pesados(self):
+        _, _, pesados = medir_importaciones(SCRIPT_URLCONF + "; import pandas")
+        self.assertIn('pandas', pesados)
+
+
+class VigilanteTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(RUTA_PROCESADOS=directorio.name, NOMBRE_ARCHIVO_BASE='Formulario - Respuestas.xlsx')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        carpeta = os.path.join(directorio.name, '2025A', vigilancia.SUBDIRECTORIO)
+        os.makedirs(carpeta)
+        self.ruta = os.path.join(carpeta, 'Formulario -2025A Respuestas.xlsx')
+        for nombre in (self.ruta, os.path.join(carpeta, 'Copia.xlsx')):
+            with open(nombre, 'wb') as f:
+                f.write(b'contenido')
+        self.indice = vigilancia.Indice(os.path.join(directorio.name, 'indice.json'))
+        self.llamadas = []
+
+    def _vigilante(self, *errores):
+        errores = list(errores)
+
+        def importar(ruta, calendario):
+            self.llamadas.append((ruta, calendario))
+            if errores:
+                raise errores.pop(0)
+            return 3, 0
+        return vigilancia.Vigilante(self.indice, espera=0, importar=importar)
+
+    def test_solo_el_archivo_del_calendario(self):
+        self.assertEqual(vigilancia.archivos_vigilados(), [self.ruta])
+
+    def test_error_transitorio_se_reintenta(self):
+        with self.assertLogs(vigilancia.logger, 'ERROR'):
+            [(_, _, resultado)] = self._vigilante(OperationalError('base no disponible')).ejecutar(una_vez=True)
+        self.assertIn('base no disponible', resultado['error'])
+        self.assertNotIn(self.indice.clave(self.ruta), self.indice.entradas)
+
+        [(_, _, resultado)] = self._vigilante().ejecutar(una_vez=True)
+        self.assertEqual(resultado['exitosos'], 3)
+        self.assertEqual(len(self.llamadas), 2)
+
+    def test_error_de_datos_no_se_reintenta(self):
+        for error in (ValueError('columna faltante'), IntegrityError('folio repetido'), DataError('valor muy largo')):
+            with self.subTest(error=type(error).__name__):
+                self.indice.entradas.clear()
+                with self.assertLogs(vigilancia.logger, 'ERROR'):
+                    vigilante = self._vigilante(error)
+                    vigilante.ejecutar(una_vez=True)
+                self.assertEqual(self.indice.entradas[self.indice.clave(self.ruta)]['error'], str(error))
+                self.assertEqual(vigilante.pendientes, {})
+        self.llamadas.clear()
+
+        # Solo cambió la fecha: mismo contenido, no se vuelve a importar
+        os.utime(self.ruta, ns=(0, 0))
+        self.assertEqual(self._vigilante().ejecutar(una_vez=True), [])
+        self.assertEqual(self.llamadas, [])
+
+    def test_archivo_borrado_al_calcular_el_hash(self):
+        vigilante = self._vigilante()
+        firma = vigilancia._firma_stat(self.ruta)
+        with mock.patch.object(vigilancia, '_sha256', side_effect=FileNotFoundError(self.ruta)), \
+                self.assertLogs(vigilancia.logger, 'ERROR'):
+            _, _, resultado = vigilante._importar(self.ruta, firma)
+        self.assertTrue(resultado['error'])
+        self.assertEqual(self.llamadas, [])
+        self.assertNotIn(self.indice.clave(self.ruta), self.indice.entradas)
+
+
+@skipUnless(importlib.util.find_spec('pandas'), "pandas no está instalado")
+class ValidacionTests(SimpleTestCase):
+
+    def _hoja(self, **cambios):
+        import pandas as pd
+
+        fila = {
+            'codigo_de_integrante_1representante': '000000001', 'nombre_de_integrante_1representante': 'Alumno',
+            'codigo_del_asesor': 'A1', 'nombre_del_asesor': 'Asesor', 'correo_institucional_del_asesora': 'a@example.com',
+            'titulo_del_proyecto': 'Titulo', 'modalidad': 'PROTOTIPO',
+            'introduccion': 'I', 'justificacion': 'J', 'objetivo': 'O', 'resumen': 'R',
+        }
+        return pd.DataFrame([fila, {**fila, 'codigo_de_integrante_1representante': '000000002', **cambios}])
+
+    def _problemas(self, df):
+        return {(columna, nivel) for columna, _, nivel, _ in validacion.validar_hoja(df, '2025A').por_columna}
+
+    def test_hoja_valida(self):
+        reporte = validacion.validar_hoja(self._hoja(), '2025A')
+        self.assertEqual((reporte.filas_validas, reporte.por_columna), (2, []))
+
+    def test_textos_de_formato1_vacios(self):
+        reporte = validacion.validar_hoja(self._hoja(introduccion=None, resumen='  '), '2025A')
+        self.assertEqual(reporte.filas_con_error, 1)
+        self.assertEqual(self._problemas(self._hoja(introduccion=None, resumen='  ')),
+                         {('introduccion', validacion.ERROR), ('resumen', validacion.ERROR)})
+
+    def test_modalidad_se_compara_como_se_importa(self):
+        # El importador guarda la modalidad tal cual: en minúsculas quedaría fuera del catálogo
+        self.assertEqual(self._problemas(self._hoja(modalidad='prototipo')), {('modalidad', validacion.ADVERTENCIA)})
+
+
+@override_settings(**AJUSTES_PRUEBAS, CAMBIOS_ACTIVOS=True)
+class CambiosTests(TestCase):
+
+    def _entradas(self):
+        return list(Cambio.objects.order_by('seq').values_list('modelo', 'clave', 'operacion'))
+
+    def test_se_escriben_en_la_transaccion_de_los_datos(self):
+        with transaction.atomic():
+            Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Alumno Uno')
+            # Visible antes del commit: entra o sale junto con los datos
+            self.assertEqual(self._entradas(), [('people.alumno', '000000001', Cambio.ALTA)])
+
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            Alumno.objects.create(codigo_estudiante='000000002', nombre_completo='Alumno Dos')
+            1 / 0
+        self.assertEqual(self._entradas(), [('people.alumno', '000000001', Cambio.ALTA)])
+
+    def test_diferido_combina_por_registro(self):
+        with transaction.atomic(), cambios.diferido():
+            alumno = Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Alumno Uno')
+            alumno.save()
+            temporal = Alumno.objects.create(codigo_estudiante='000000002', nombre_completo='Alumno Dos')
+            temporal.delete()
+            self.assertEqual(self._entradas(), [])
+        self.assertEqual(self._entradas(), [('people.alumno', '000000001', Cambio.ALTA)])
+
+    def test_leer_entrega_lo_confirmado_sin_esperar(self):
+        Alumno.objects.create(codigo_estudiante='000000001', nombre_completo='Alumno Uno')
+        lote = cambios.leer()
+        self.assertEqual([c['clave'] for c in lote['cambios']], ['000000001'])
+        self.assertEqual(lote['cambios'][0]['datos']['nombre_completo'], 'ALUMNO UNO')
+
+    def test_representante_nuevo_registra_solo_las_filas_que_cambian(self):
+        Calendario.asegurar(['2023A'])
+        formato = Formato1.objects.create(folio='P-2023A', introduccion='I', justificacion='J', objetivo='O', resumen='R')
+        proyecto = Proyecto.objects.create(folio='P-2023A', titulo='T', modalidad='PROTOTIPO',
+                                           calendario_registro_id='2023A', formato1=formato)
+        alumnos = [Alumno.objects.create(codigo_estudiante=f'00000000{n}', nombre_completo=f'A{n}') for n in range(3)]
+        anterior = Participacion.objects.create(proyecto=proyecto, alumno=alumnos[0], es_representante=True)
+        Participacion.objects.create(proyecto=proyecto, alumno=alumnos[1])
+        nueva = Participacion.objects.create(proyecto=proyecto, alumno=alumnos[2])
+        Cambio.objects.all().delete()
+
+        nueva.es_representante = True
+        nueva.save()
+        registradas = {c for m, c, _ in self._entradas() if m == 'projects.participacion'}
+        self.assertEqual(registradas, {str(anterior.pk), str(nueva.pk)})
+
+
+@override_settings(**AJUSTES_PRUEBAS, IMPORTACION_TAMANO_MAXIMO_MB=1)
+class SubidaTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.recibidos = []
+        importar = mock.patch.object(views, '_importar', side_effect=self._importar)
+        importar.start()
+        self.addCleanup(importar.stop)
+
+    def _importar(self, request, context, ruta, calendario):
+        with open(ruta, 'rb') as f:
+            self.recibidos.append((f.read(), calendario))
+        return 3, 0
+
+    def _subir(self, datos):
+        return self.client.post('/registro/importar/', {
+            'modo': 'subida', 'calendario': ' 2024a ',
+            'archivo': SimpleUploadedFile('hoja.xlsx', datos),
+        })
+
+    def test_guarda_la_hoja_y_calcula_su_sha256(self):
+        datos = os.urandom(1024 * 1024)
+        respuesta = self._subir(datos)
+
+        self.assertEqual(self.recibidos, [(datos, '2024A')])
+        self.assertEqual(respuesta.context['sha256'], hashlib.sha256(datos).hexdigest())
+        self.assertContains(respuesta, 'Registros exitosos: 3. Fallidos: 0.')
+
+    def test_rechaza_hojas_mayores_al_maximo(self):
+        # Apenas por encima: el corte ocurre al recibir los bloques
+        # Muy por encima: el corte ocurre por el Content-Length declarado
+        for tamano in (1024 * 1024 + 10 * 1024, 3 * 1024 * 1024):
+            with self.subTest(tamano=tamano):
+                respuesta = self._subir(b'x' * tamano)
+                self.assertContains(respuesta, 'El archivo supera el máximo permitido de 1 MB.')
+        self.assertEqual(self.recibidos, [])
+
+
+def _registro(folio, calendario):
+    return {
+        'folio': folio,
+        'asesor': {'codigo_asesor': 'A1', 'nombre_completo': 'Asesor', 'correo_electronico': 'a@example.com'},
+        'formato1': {'introduccion': 'I', 'justificacion': 'J', 'objetivo': 'O', 'resumen': 'R'},
+        'proyecto': {
+            'titulo': folio, 'modalidad': 'PROTOTIPO', 'nivel_competencia': None, 'variante': None,
+            'calendario_registro_id': calendario, 'evidencia_url': None, 'protocolo_dictamen_url': None,
+        },
+        'integrantes': [{'codigo': '000000001', 'nombre': 'Alumno', 'correo': None, 'es_representante': True}],
+    }
+
+
+@override_settings(**AJUSTES_PRUEBAS)
+class CargaHistoricaTests(TransactionTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(RUTA_PROCESADOS=directorio.name, NOMBRE_ARCHIVO_BASE='Formulario - Respuestas.xlsx')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.rutas = {}
+        for calendario in ('2023A', '2024A'):
+            carpeta = os.path.join(directorio.name, calendario, vigilancia.SUBDIRECTORIO)
+            os.makedirs(carpeta)
+            self.rutas[calendario] = os.path.join(carpeta, f'Formulario -{calendario} Respuestas.xlsx')
+            with open(self.rutas[calendario], 'wb') as f:
+                f.write(calendario.encode())
+        self.ruta_indice = os.path.join(directorio.name, 'indice.json')
+
+        # Hilos en lugar de procesos: la lectura simulada debe verse desde el pool
+        self.fallan = set()
+        for parche in (
+            mock.patch.object(carga_historica, 'ProcessPoolExecutor', ThreadPoolExecutor),
+            mock.patch.object(hoja, 'parsear', side_effect=self._parsear),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _parsear(self, ruta, calendario):
+        if calendario in self.fallan:
+            raise ValueError(f'hoja dañada {calendario}')
+        return [_registro(f'P1-{calendario}', calendario)], [], 1
+
+    def _cargar(self):
+        # Índice nuevo en cada corrida, como al volver a lanzar el comando
+        indice = vigilancia.Indice(self.ruta_indice)
+        archivos = carga_historica.pendientes(indice)
+        return archivos, carga_historica.ejecutar(indice, archivos, procesos=2)
+
+    def test_reanuda_solo_las_hojas_pendientes(self):
+        self.fallan = {'2024A'}
+        with self.assertLogs(carga_historica.logger, 'ERROR'):
+            archivos, resultados = self._cargar()
+        self.assertEqual([c for c, _ in archivos], ['2023A', '2024A'])
+        self.assertEqual([(c, r['exitosos'], bool(r['error'])) for _, c, r in resultados], [('2023A', 1, False), ('2024A', 0, True)])
+        self.assertEqual(list(Proyecto.objects.values_list('folio', flat=True)), ['P1-2023A'])
+
+        # Al reanudar solo se reintenta la hoja con error
+        self.fallan = set()
+        archivos, resultados = self._cargar()
+        self.assertEqual(archivos, [('2024A', self.rutas['2024A'])])
+        self.assertEqual(resultados[0][2]['error'], None)
+        self.assertEqual(set(Proyecto.objects.values_list('folio', 'num_participantes')), {('P1-2023A', 1), ('P1-2024A', 1)})
+
+        # Nada pendiente; una hoja solo tocada tampoco vuelve a entrar, una modificada sí
+        self.assertEqual(self._cargar()[0], [])
+        os.utime(self.rutas['2023A'], ns=(0, 0))
+        self.assertEqual(self._cargar()[0], [])
+        with open(self.rutas['2023A'], 'ab') as f:
+            f.write(b' cambio')
+        self.assertEqual(self._cargar()[0], [('2023A', self.rutas['2023A'])])
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('importar/', views.importar_proyectos_view, name='importar_proyectos'), 
+    path('cambios/', views.cambios_view, name='cambios'),
 ]
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Validación en seco de una hoja de importación (no escribe en la base).
+
+Aplica a columnas completas de pandas las mismas reglas que harían fallar o
+saltar una fila en importador.importar_archivo (incluidos los textos de
+Formato1, que no admiten nulos), más las que se importarían
+con datos incorrectos (modalidad fuera de Proyecto.MODALIDAD_CHOICES, URLs
+mal formadas, textos más largos que el campo). Devuelve un resumen por
+columna y el detalle de las filas con problemas.
+"""
+from dataclasses import dataclass, field
+
+from projects.models import Proyecto
+from people.models import Alumno, Asesor
+from . import importador
+
+ERROR = 'error'              # la fila no se importaría
+ADVERTENCIA = 'advertencia'  # la fila se importaría con datos incorrectos
+
+MAXIMO_FILAS_DETALLE = 500
+_URL = r'^https?://[^\s/$.?#][^\s]*$'
+# Columnas de Formato1 (NOT NULL): sin ellas falla el guardado de la fila
+TEXTOS_FORMATO1 = {
+    'introduccion': "Introducción vacía.",
+    'justificacion': "Justificación vacía.",
+    'objetivo': "Objetivo vacío.",
+    'resumen': "Resumen vacío.",
+}
+
+
+@dataclass
+class Problema:
+    columna: str
+    mensaje: str
+    nivel: str
+
+
+@dataclass
+class ReporteValidacion:
+    calendario: str
+    total_filas: int = 0
+    filas_con_error: int = 0
+    filas_con_advertencia: int = 0
+    columnas_faltantes: list = field(default_factory=list)
+    por_columna: list = field(default_factory=list)  # (columna, mensaje, nivel, filas)
+    por_fila: list = field(default_factory=list)     # (fila, folio, [Problema])
+    detalle_truncado: bool = False
+
+    @property
+    def filas_validas(self):
+        return self.total_filas - self.filas_con_error
+
+
+def _limpiar_columna(df, clave):
+    """Equivalente vectorizado de importador.get_clean_value para una columna."""
+    import pandas as pd
+
+    if clave not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    datos = df[clave]
+    if isinstance(datos, pd.DataFrame):
+        # Columnas repetidas: el primer valor no vacío de izquierda a derecha
+        limpias = [_limpiar_serie(datos.iloc[:, i]) for i in range(datos.shape[1])]
+        return pd.concat(limpias, axis=1).bfill(axis=1).iloc[:, 0]
+    return _limpiar_serie(datos)
+
+
+def _limpiar_serie(serie):
+    import numpy as np
+    import pandas as pd
+
+    # Números: sin decimales y 0 como vacío (igual que get_clean_value)
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        es_numero = serie.notna()
+    else:
+        es_numero = serie.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)) & serie.notna()
+    numeros = pd.to_numeric(serie.where(es_numero), errors='coerce')
+    numeros = np.trunc(numeros.where(numeros != 0)).astype('Int64').astype('string')
+
+    texto = serie.astype('string').str.strip().mask(es_numero, numeros)
+    texto = texto.mask(texto == '')
+    return texto.astype(object).where(texto.notna(), None)
+
+
+def _vacio(serie):
+    return serie.isna()
+
+
+def validar_hoja(df, calendario):
+    import pandas as pd
+
+    calendario = calendario.upper()
+    reporte = ReporteValidacion(calendario=calendario, total_filas=len(df))
+    columnas = {
+        clave: _limpiar_columna(df, clave) for clave in (
+            'codigo_de_integrante_1representante', 'nombre_de_integrante_1representante',
+            'codigo_de_integrante_2', 'nombre_de_integrante_2',
+            'codigo_de_integrante_3', 'nombre_de_integrante_3',
+            'codigo_del_asesor', 'nombre_del_asesor', 'correo_institucional_del_asesora',
+            'titulo_del_proyecto', 'modalidad', 'nivel_de_competencias',
+            'sube_tu_evidencia', 'sube_tu_formato', *TEXTOS_FORMATO1,
+        )
+    }
+    obligatorias = ('codigo_de_integrante_1representante', 'codigo_del_asesor', 'titulo_del_proyecto', 'modalidad',
+                    *TEXTOS_FORMATO1)
+    reporte.columnas_faltantes = [c for c in obligatorias if c not in df.columns]
+
+    representante = columnas['codigo_de_integrante_1representante']
+    modalidades = {valor for valor, _ in Proyecto.MODALIDAD_CHOICES}
+    variante = pd.concat([_limpiar_columna(df, c) for c in importador.claves_variante(df)] or
+                         [pd.Series([None] * len(df), index=df.index, dtype=object)], axis=1).bfill(axis=1).iloc[:, 0]
+
+    def largo_mayor(serie, maximo):
+        return serie.notna() & (serie.fillna('').str.len() > maximo)
+
+    def url_invalida(serie):
+        return serie.notna() & ~serie.fillna('').str.match(_URL)
+
+    reglas = [
+        ('codigo_de_integrante_1representante', "Código de representante vacío.", ERROR, _vacio(representante)),
+        ('codigo_del_asesor', "Código del asesor vacío.", ERROR, _vacio(columnas['codigo_del_asesor'])),
+        ('nombre_del_asesor', "Nombre del asesor vacío.", ERROR, _vacio(columnas['nombre_del_asesor'])),
+        ('correo_institucional_del_asesora', "Correo del asesor vacío.", ERROR,
+         _vacio(columnas['correo_institucional_del_asesora'])),
+        ('titulo_del_proyecto', "Título vacío.", ERROR, _vacio(columnas['titulo_del_proyecto'])),
+        ('modalidad', "Modalidad vacía.", ERROR, _vacio(columnas['modalidad'])),
+        # Se compara el valor tal cual: el importador guarda la modalidad sin normalizar
+        ('modalidad', "Modalidad fuera del catálogo.", ADVERTENCIA,
+         columnas['modalidad'].notna() & ~columnas['modalidad'].isin(modalidades)),
+        ('codigo_de_integrante_1representante', "Folio repetido en la hoja (se conserva la última fila).", ADVERTENCIA,
+         representante.notna() & representante.duplicated(keep='last')),
+        ('codigo_del_asesor', f"Código del asesor de más de {Asesor._meta.get_field('codigo_asesor').max_length} caracteres.",
+         ERROR, largo_mayor(columnas['codigo_del_asesor'], Asesor._meta.get_field('codigo_asesor').max_length)),
+        ('titulo_del_proyecto', f"Título de más de {Proyecto._meta.get_field('titulo').max_length} caracteres.",
+         ERROR, largo_mayor(columnas['titulo_del_proyecto'], Proyecto._meta.get_field('titulo').max_length)),
+        ('nivel_de_competencias', f"Nivel de más de {Proyecto._meta.get_field('nivel_competencia').max_length} caracteres.",
+         ERROR, largo_mayor(columnas['nivel_de_competencias'], Proyecto._meta.get_field('nivel_competencia').max_length)),
+        ('variante', f"Variante de más de {Proyecto._meta.get_field('variante').max_length} caracteres.",
+         ERROR, largo_mayor(variante, Proyecto._meta.get_field('variante').max_length)),
+        ('sube_tu_evidencia', "URL de evidencia mal formada.", ADVERTENCIA, url_invalida(columnas['sube_tu_evidencia'])),
+        ('sube_tu_formato', "URL del formato mal formada.", ADVERTENCIA, url_invalida(columnas['sube_tu_formato'])),
+    ]
+    for clave, mensaje in TEXTOS_FORMATO1.items():
+        reglas.append((clave, mensaje, ERROR, _vacio(columnas[clave])))
+    maximo_codigo = Alumno._meta.get_field('codigo_estudiante').max_length
+    for i, sufijo in enumerate(('1representante', '2', '3'), start=1):
+        codigo, nombre = columnas[f'codigo_de_integrante_{sufijo}'], columnas[f'nombre_de_integrante_{sufijo}']
+        reglas.append((f'codigo_de_integrante_{sufijo}', f"Código del integrante {i} de más de {maximo_codigo} caracteres.",
+                       ERROR, largo_mayor(codigo, maximo_codigo)))
+        reglas.append((f'nombre_de_integrante_{sufijo}', f"Integrante {i} sin nombre (no se registrará).", ADVERTENCIA,
+                       codigo.notna() & nombre.isna()))
+        if i > 1:
+            reglas.append((f'codigo_de_integrante_{sufijo}', f"Integrante {i} sin código (no se registrará).", ADVERTENCIA,
+                           codigo.isna() & nombre.notna()))
+
+    mascaras = {}
+    for columna, mensaje, nivel, mascara in reglas:
+        mascara = mascara.fillna(False).astype(bool)
+        filas = int(mascara.sum())
+        if filas:
+            reporte.por_columna.append((columna, mensaje, nivel, filas))
+            mascaras[(columna, mensaje, nivel)] = mascara
+
+    if mascaras:
+        errores = pd.DataFrame({k: v for k, v in mascaras.items() if k[2] == ERROR}, index=df.index)
+        advertencias = pd.DataFrame({k: v for k, v in mascaras.items() if k[2] == ADVERTENCIA}, index=df.index)
+        con_error = errores.any(axis=1) if not errores.empty else pd.Series(False, index=df.index)
+        con_advertencia = advertencias.any(axis=1) if not advertencias.empty else pd.Series(False, index=df.index)
+        reporte.filas_con_error = int(con_error.sum())
+        reporte.filas_con_advertencia = int((con_advertencia & ~con_error).sum())
+
+        todas = pd.DataFrame(mascaras, index=df.index)
+        problematicas = todas.index[todas.any(axis=1)]
+        reporte.detalle_truncado = len(problematicas) > MAXIMO_FILAS_DETALLE
+        claves = list(mascaras)
+        matriz = todas.loc[problematicas[:MAXIMO_FILAS_DETALLE]].to_numpy()
+        for posicion, indice in enumerate(problematicas[:MAXIMO_FILAS_DETALLE]):
+            codigo = representante.loc[indice]
+            reporte.por_fila.append((
+                indice + 2,  # número de fila en Excel (encabezado en la fila 1)
+                f"{codigo}-{calendario}" if codigo else None,
+                [Problema(*claves[j]) for j in matriz[posicion].nonzero()[0]],
+            ))
+
+    reporte.por_columna.sort(key=lambda p: (p[2] != ERROR, -p[3]))
+    return reporte
+
+
+def validar_archivo(ruta, calendario):
+    """Lee y valida la hoja completa sin tocar la base de datos."""
+    return validar_hoja(importador.leer_hoja(ruta), calendario)
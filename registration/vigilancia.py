@@ -0,0 +1,327 @@
+"""
+Vigilancia de RUTA_PROCESADOS para importar automáticamente las hojas nuevas
+o modificadas.
+
+Se vigila el mismo archivo que importa la vista de importación
+(importador.ruta_archivo_calendario, a partir de NOMBRE_ARCHIVO_BASE) en cada
+RUTA_PROCESADOS/<calendario>/1-Procesados/; otros .xlsx se ignoran. Con
+inotify (Linux, vía ctypes, sin dependencias) cada evento marca el archivo
+como pendiente; sin inotify se revisa el árbol por sondeo. Un archivo
+pendiente se importa cuando lleva `espera` segundos sin cambiar de tamaño ni
+de fecha (la sincronización de la carpeta lo escribe en varias partes) y solo
+si su SHA-256 difiere del último importado. Los errores pasajeros (lectura
+del archivo, conexión con la base) se reintentan; cualquier otro error,
+incluidos IntegrityError y DataError, se anota con el hash para no
+reintentar el mismo contenido defectuoso.
+
+El índice en disco (INDICE_IMPORTACIONES) guarda por archivo su tamaño,
+mtime, SHA-256 y el resultado de la última importación. Al reiniciar, los
+archivos cuyo tamaño y mtime coinciden con el índice ni siquiera se leen.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import struct
+import time
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+from django.utils import timezone
+
+from projects.models import Calendario
+from . import importador
+
+logger = logging.getLogger(__name__)
+
+SUBDIRECTORIO = '1-Procesados'
+
+# Errores pasajeros: el archivo desapareció o no se pudo leer, o la base no respondió
+ERRORES_TRANSITORIOS = (OSError, OperationalError, InterfaceError)
+
+
+def calendario_de(ruta):
+    """Calendario de una ruta vigilada, o None si la ruta no se importa."""
+    relativa = os.path.relpath(ruta, settings.RUTA_PROCESADOS)
+    partes = relativa.split(os.sep)
+    if len(partes) != 3 or partes[1] != SUBDIRECTORIO:
+        return None
+    calendario, nombre = partes[0].upper(), partes[2]
+    if not Calendario.CLAVE_VALIDA.match(calendario):
+        return None
+    # Misma regla que la vista de importación: solo el archivo del calendario
+    if nombre != os.path.basename(importador.ruta_archivo_calendario(calendario)):
+        return None
+    return calendario
+
+
+def archivos_vigilados():
+    raiz = settings.RUTA_PROCESADOS
+    if not os.path.isdir(raiz):
+        return []
+    rutas = []
+    for calendario in os.listdir(raiz):
+        carpeta = os.path.join(raiz, calendario, SUBDIRECTORIO)
+        if os.path.isdir(carpeta):
+            rutas.extend(
+                os.path.join(carpeta, nombre) for nombre in os.listdir(carpeta)
+                if calendario_de(os.path.join(carpeta, nombre))
+            )
+    return rutas
+
+
+def _sha256(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _firma_stat(ruta):
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+
+# ====================================================================
+# Índice en disco
+# ====================================================================
+
+class Indice:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.entradas = {}
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                self.entradas = json.load(f)
+
+    def clave(self, ruta):
+        return os.path.relpath(ruta, settings.RUTA_PROCESADOS)
+
+    def sin_cambios(self, ruta, firma):
+        entrada = self.entradas.get(self.clave(ruta))
+        return bool(entrada) and (entrada['tamano'], entrada['mtime_ns']) == tuple(firma)
+
+    def mismo_contenido(self, ruta, sha256):
+        entrada = self.entradas.get(self.clave(ruta))
+        return bool(entrada) and entrada['sha256'] == sha256
+
+    def registrar(self, ruta, firma, sha256, **resultado):
+        anterior = self.entradas.get(self.clave(ruta), {})
+        self.entradas[self.clave(ruta)] = {
+            **anterior, **resultado,
+            'tamano': firma[0], 'mtime_ns': firma[1], 'sha256': sha256,
+        }
+        self.guardar()
+
+    def guardar(self):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.entradas, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(temporal, self.ruta)
+
+
+# ====================================================================
+# Fuentes de eventos
+# ====================================================================
+
+class _Inotify:
+    """Vigilancia recursiva con inotify; `esperar()` devuelve las rutas tocadas."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE_SELF = 0x00000400
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASCARA = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+    _EVENTO = struct.Struct('iIII')
+
+    def __init__(self, raiz):
+        nombre = ctypes.util.find_library('c')
+        if not nombre:
+            raise OSError("No se encontró libc.")
+        self._libc = ctypes.CDLL(nombre, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló.")
+        self.directorios = {}
+        for carpeta, _, _ in os.walk(raiz):
+            self._vigilar(carpeta)
+
+    def _vigilar(self, carpeta):
+        descriptor = self._libc.inotify_add_watch(self.fd, os.fsencode(carpeta), self.MASCARA)
+        if descriptor < 0:
+            logger.warning(f"No se pudo vigilar {carpeta}: {os.strerror(ctypes.get_errno())}")
+            return
+        self.directorios[descriptor] = carpeta
+
+    def esperar(self, timeout):
+        listos, _, _ = select.select([self.fd], [], [], timeout)
+        if not listos:
+            return set()
+        try:
+            datos = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        rutas, posicion = set(), 0
+        while posicion < len(datos):
+            descriptor, mascara, _, longitud = self._EVENTO.unpack_from(datos, posicion)
+            posicion += self._EVENTO.size
+            nombre = os.fsdecode(datos[posicion:posicion + longitud].rstrip(b'\0'))
+            posicion += longitud
+            carpeta = self.directorios.get(descriptor)
+            if carpeta is None:
+                continue
+            if mascara & self.IN_DELETE_SELF:
+                self.directorios.pop(descriptor, None)
+                continue
+            ruta = os.path.join(carpeta, nombre)
+            if mascara & self.IN_ISDIR:
+                # Carpeta nueva (p. ej. un calendario nuevo): vigilarla y revisar su contenido
+                for subcarpeta, _, nombres in os.walk(ruta):
+                    self._vigilar(subcarpeta)
+                    rutas.update(os.path.join(subcarpeta, n) for n in nombres)
+            else:
+                rutas.add(ruta)
+        return {r for r in rutas if calendario_de(r)}
+
+    def cerrar(self):
+        os.close(self.fd)
+
+
+class _Sondeo:
+    """Alternativa sin inotify: compara tamaño y mtime de los archivos vigilados."""
+
+    def __init__(self, raiz, intervalo):
+        self.intervalo = intervalo
+        self.vistos = {ruta: _firma_stat(ruta) for ruta in archivos_vigilados()}
+
+    def esperar(self, timeout):
+        time.sleep(min(timeout, self.intervalo))
+        actuales = {ruta: _firma_stat(ruta) for ruta in archivos_vigilados()}
+        cambiados = {ruta for ruta, firma in actuales.items() if self.vistos.get(ruta) != firma}
+        self.vistos = actuales
+        return cambiados
+
+    def cerrar(self):
+        pass
+
+
+def crear_fuente(sondeo=False, intervalo=5.0):
+    raiz = settings.RUTA_PROCESADOS
+    if not sondeo:
+        try:
+            return _Inotify(raiz)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify no disponible ({e}); se usará sondeo.")
+    return _Sondeo(raiz, intervalo)
+
+
+# ====================================================================
+# Vigilante
+# ====================================================================
+
+class Vigilante:
+    def __init__(self, indice, espera=10.0, sondeo=False, intervalo=5.0, importar=None):
+        self.indice = indice
+        self.espera = espera
+        self.sondeo = sondeo
+        self.intervalo = intervalo
+        self.importar = importar or importador.importar_archivo
+        self.pendientes = {}  # ruta -> (firma_stat, momento en que se vio por última vez)
+
+    def marcar(self, rutas):
+        ahora = time.monotonic()
+        for ruta in rutas:
+            firma = _firma_stat(ruta)
+            if firma is None:
+                self.pendientes.pop(ruta, None)
+            elif ruta not in self.pendientes or self.pendientes[ruta][0] != firma:
+                self.pendientes[ruta] = (firma, ahora)
+
+    def revisar_todo(self):
+        """Marca como pendientes los archivos que no coinciden con el índice."""
+        self.marcar(r for r in archivos_vigilados() if not self.indice.sin_cambios(r, _firma_stat(r) or (0, 0)))
+
+    def procesar_estables(self):
+        """Importa los pendientes que ya no cambian. Devuelve los resultados."""
+        ahora = time.monotonic()
+        resultados = []
+        for ruta, (firma, visto) in list(self.pendientes.items()):
+            actual = _firma_stat(ruta)
+            if actual != firma:
+                self.marcar([ruta])
+                continue
+            if ahora - visto < self.espera:
+                continue
+            del self.pendientes[ruta]
+            resultados.append(self._importar(ruta, firma))
+        return [r for r in resultados if r]
+
+    def _importar(self, ruta, firma):
+        calendario = calendario_de(ruta)
+        close_old_connections()
+        inicio = time.perf_counter()
+        try:
+            sha256 = _sha256(ruta)
+            if self.indice.mismo_contenido(ruta, sha256):
+                # Solo cambió la fecha (p. ej. el sincronizador reescribió el mismo archivo)
+                self.indice.registrar(ruta, firma, sha256)
+                return None
+            logger.info(f"Importando {ruta} (calendario {calendario}).")
+            exitosos, fallidos = self.importar(ruta, calendario)
+            resultado = {'exitosos': exitosos, 'fallidos': fallidos, 'error': None}
+        except ERRORES_TRANSITORIOS as e:
+            # No se anota el hash: se reintenta cuando el archivo vuelva a estar estable
+            logger.exception(f"Falló la importación de {ruta}; se reintentará.")
+            actual = _firma_stat(ruta)
+            if actual is not None:
+                self.pendientes[ruta] = (actual, time.monotonic())
+            return ruta, calendario, {
+                'exitosos': 0, 'fallidos': 0, 'error': str(e),
+                'duracion_s': round(time.perf_counter() - inicio, 2),
+            }
+        except Exception as e:
+            # Error en los datos: se registra el hash para no reintentar el mismo contenido defectuoso
+            logger.exception(f"Falló la importación de {ruta}.")
+            resultado = {'exitosos': 0, 'fallidos': 0, 'error': str(e)}
+        finally:
+            close_old_connections()
+        resultado['duracion_s'] = round(time.perf_counter() - inicio, 2)
+        self.indice.registrar(ruta, firma, sha256, importado=timezone.now().isoformat(timespec='seconds'), **resultado)
+        return ruta, calendario, resultado
+
+    def ejecutar(self, reescaneo=600.0, una_vez=False, al_importar=None):
+        """Ciclo principal. Con `una_vez` revisa el árbol, importa lo pendiente y termina."""
+        self.revisar_todo()
+        if una_vez:
+            self.pendientes = {r: (f, float('-inf')) for r, (f, _) in self.pendientes.items()}
+            return self.procesar_estables()
+
+        fuente = crear_fuente(self.sondeo, self.intervalo)
+        ultimo_reescaneo = time.monotonic()
+        try:
+            while True:
+                timeout = min(self.espera, self.intervalo) if self.pendientes else reescaneo
+                self.marcar(fuente.esperar(timeout))
+                # Reescaneo periódico por si se perdió algún evento (p. ej. desbordamiento de inotify)
+                if time.monotonic() - ultimo_reescaneo >= reescaneo:
+                    self.revisar_todo()
+                    ultimo_reescaneo = time.monotonic()
+                for resultado in self.procesar_estables():
+                    if al_importar:
+                        al_importar(*resultado)
+        finally:
+            fuente.cerrar()